@@ -0,0 +1,79 @@
+"""
+Benchmark of StockIndicator.update() in a single process against the process-pool mode (StockIndicator(workers=N)),
+which shards tickers across processes and exchanges prices/results through shared memory.
+
+Besides wall time, each run reports the compute time of one shard (1/N of the tickers, timed in-process): on a machine
+with at least N free cores the pool update takes roughly that plus the fixed cost of the exchange, so comparing the
+columns shows where the pool starts to pay off even when this machine has fewer cores.
+
+    python benchmarks/bench_indicator_pool.py --tickers 400 1600 --bars 1000 --workers 2 4
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+
+from bench_indicators import make_frame
+from viiquant.stock_indicator import StockIndicator
+from viiquant.stock_price_frame import StockPriceFrame
+
+
+INDICATORS = ['MACD', 'RSI', 'ATR', 'BOLLINGER_BANDS', 'STOCH', 'CHAIKIN', 'SMA', 'EMA', 'STOCH_RSI', 'COMMODITY_CHANNEL_INDEX']
+
+
+def register(ind: StockIndicator):
+    for name in INDICATORS:
+        getattr(ind, name)()
+
+
+def timed_update(ind: StockIndicator, spf: StockPriceFrame, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        # Giả lập một nến mới: phiên bản dữ liệu đổi thì memo và graph không dùng lại được
+        spf._version += 1
+        start = time.perf_counter()
+        ind.update()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[400, 1600])
+    parser.add_argument('--bars', type=int, default=1000, help="bars per ticker")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"cores: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    print(f"{'tickers':>8} {'rows':>9} {'workers':>8} {'serial':>10} {'pool':>10} {'shard':>10} {'max diff':>10}")
+    for n in args.tickers:
+        spf = make_frame(n, args.bars)
+        serial = StockIndicator(make_frame(n, args.bars))
+        register(serial)
+        t_serial = timed_update(serial, serial._spf, args.repeat)
+
+        for workers in args.workers:
+            ind = StockIndicator(spf, workers=workers)
+            register(ind)
+            ind.update()        # khởi động pool
+            t_pool = timed_update(ind, spf, args.repeat)
+            ind.close()
+
+            shard = StockIndicator(StockPriceFrame.from_frame(spf._price_frame.iloc[:spf._price_frame.shape[0] // workers].copy()))
+            start = time.perf_counter()
+            register(shard)
+            t_shard = time.perf_counter() - start
+
+            cols = [c for c in serial._price_frame.columns if c not in ['datetime', 'open', 'high', 'low', 'close', 'volume']]
+            diff = max(float(np.nanmax(np.abs(serial._price_frame[c].values - spf._price_frame[c].values))) for c in cols)
+            print(f"{n:>8} {spf._price_frame.shape[0]:>9} {workers:>8} {t_serial * 1000:>8.1f}ms {t_pool * 1000:>8.1f}ms "
+                  f"{t_shard * 1000:>8.1f}ms {diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of the parameter-sweep API (StockIndicator.sweep) against one StockIndicator call per variant,
+each writing its own column into _price_frame.
+
+Grids: RSI 5-30, MACD fast 8-16 x slow 20-32 (histogram), Bollinger period 10/20/30 x 1.5-3 sigma (width).
+
+    python benchmarks/bench_indicator_sweep.py --tickers 10 100 --bars 1000
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from bench_indicators import make_frame
+from viiquant.stock_indicator import StockIndicator
+
+
+RSI_PERIODS = range(5, 31)
+MACD_FAST = range(8, 17, 2)
+MACD_SLOW = range(20, 33, 3)
+BB_PERIODS = (10, 20, 30)
+BB_SIGMAS = (1.5, 2, 2.5, 3)
+
+
+def per_call(ind: StockIndicator):
+    for p in RSI_PERIODS:
+        ind.RSI(period=p, rsi_col=f"rsi_{p}")
+    for f in MACD_FAST:
+        for s in MACD_SLOW:
+            ind.MACD(f, s, 9, macd_col=f"macd_{f}_{s}", signal_col=f"signal_{f}_{s}")
+    for p in BB_PERIODS:
+        for w in BB_SIGMAS:
+            ind.BOLLINGER_BANDS(p, w, bb_upper_col=f"bbu_{p}_{w}", bb_lower_col=f"bbl_{p}_{w}", bb_width_col=f"bbw_{p}_{w}",
+                                indicator_key=f"bbands_{p}_{w}")
+
+
+def swept(ind: StockIndicator) -> dict:
+    sweep = ind.sweep
+    return {
+        'rsi': sweep.RSI(RSI_PERIODS),
+        'macd': sweep.MACD(MACD_FAST, MACD_SLOW, (9,), output='histogram'),
+        'bbw': sweep.BOLLINGER_BANDS(BB_PERIODS, BB_SIGMAS, output='width')
+    }
+
+
+def max_diff(df, results: dict) -> float:
+    diffs = []
+    for p in RSI_PERIODS:
+        diffs.append(results['rsi'].get(period=p).ravel() - df[f"rsi_{p}"].values)
+    for f in MACD_FAST:
+        for s in MACD_SLOW:
+            diffs.append(results['macd'].get(fast_period=f, slow_period=s).ravel() - (df[f"macd_{f}_{s}"] - df[f"signal_{f}_{s}"]).values)
+    for p in BB_PERIODS:
+        for w in BB_SIGMAS:
+            diffs.append(results['bbw'].get(period=p, sigma_width=w).ravel() - df[f"bbw_{p}_{w}"].values)
+    return max(float(np.nanmax(np.abs(d))) for d in diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--bars', type=int, default=1000, help="bars per ticker")
+    args = parser.parse_args()
+
+    # Hàng trăm cột thêm lần lượt vào _price_frame: pandas cảnh báo frame bị phân mảnh, đó chính là chi phí cần đo
+    warnings.simplefilter('ignore')
+
+    print(f"{'tickers':>8} {'variants':>9} {'per call':>10} {'sweep':>10} {'speedup':>8} {'max diff':>10}")
+    for n in args.tickers:
+        a = StockIndicator(make_frame(n, args.bars))
+        b = StockIndicator(make_frame(n, args.bars))
+
+        start = time.perf_counter()
+        per_call(a)
+        t_call = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = swept(b)
+        t_sweep = time.perf_counter() - start
+
+        variants = sum(r.shape[2] for r in results.values())
+        diff = max_diff(a._price_frame, results)
+        print(f"{n:>8} {variants:>9} {t_call * 1000:>8.1f}ms {t_sweep * 1000:>8.1f}ms {t_call / t_sweep:>7.1f}x {diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
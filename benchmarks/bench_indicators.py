@@ -0,0 +1,129 @@
+"""
+Benchmark of the StockIndicator set: grouped kernels (one pass over every ticker) against the former
+groupby(...).transform(lambda ...) implementation, which runs one Python callback per ticker.
+
+    python benchmarks/bench_indicators.py --tickers 10 100 1000 --bars 1000
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict
+
+from viiquant.stock_price_frame import StockPriceFrame
+from viiquant.stock_indicator import StockIndicator
+
+
+def make_frame(n_tickers: int, n_bars: int, seed: int = 0) -> StockPriceFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_tickers):
+        ticker = f"T{i:04d}"
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.002, n_bars)))
+        spread = np.abs(rng.normal(0, 0.001, n_bars)) * close
+        ts = 1_700_000_000 + 60 * np.arange(n_bars)
+        data[ticker] = pd.DataFrame({
+            'ticker': ticker,
+            'ts': ts,
+            'datetime': pd.to_datetime(ts, unit='s'),
+            'open': close,
+            'high': close + spread,
+            'low': close - spread,
+            'close': close,
+            'volume': rng.integers(100, 10000, n_bars)
+        })
+    return StockPriceFrame(data)
+
+
+def legacy_indicators(spf: StockPriceFrame):
+    """
+    Cách tính cũ (lambda cho từng ticker) của MACD, RSI, ATR, BOLLINGER_BANDS, STOCH, CHAIKIN, SMA, EMA
+    """
+    df = spf._price_frame
+    g = lambda: df.groupby(by='ticker', as_index=False, sort=True)
+
+    df['ma_fast'] = g()['close'].transform(lambda x: x.ewm(span=12, min_periods=12).mean())
+    df['ma_slow'] = g()['close'].transform(lambda x: x.ewm(span=26, min_periods=26).mean())
+    df['macd'] = df['ma_fast'] - df['ma_slow']
+    df['macd_signal'] = g()['macd'].transform(lambda x: x.ewm(span=9, min_periods=9).mean())
+
+    df['price_changed'] = g()['close'].transform(lambda x: x.diff())
+    df['gain'] = g()['price_changed'].transform(lambda x: np.where(x >= 0, x, 0))
+    df['loss'] = g()['price_changed'].transform(lambda x: np.where(x < 0, abs(x), 0))
+    df['avg_gain'] = g()['gain'].transform(lambda x: x.ewm(span=14, min_periods=14).mean())
+    df['avg_loss'] = g()['loss'].transform(lambda x: x.ewm(span=14, min_periods=14).mean())
+    df['rsi_14'] = 100 - (100 / (1 + df['avg_gain'] / df['avg_loss']))
+
+    df['prev_close'] = g()['close'].transform(lambda x: x.shift(1))
+    df['true_range'] = pd.concat([(df['high'] - df['low']).abs(), (df['high'] - df['prev_close']).abs(),
+                                  (df['low'] - df['prev_close']).abs()], axis=1).max(axis=1, skipna=False)
+    df['atr_14'] = g()['true_range'].transform(lambda x: x.ewm(span=14, min_periods=14).mean())
+
+    df['sma'] = g()['close'].transform(lambda x: x.rolling(window=20).mean())
+    df['sigma'] = g()['close'].transform(lambda x: x.rolling(window=20).std())
+    df['bb_upper'] = df['sma'] + 2 * df['sigma']
+    df['bb_lower'] = df['sma'] - 2 * df['sigma']
+
+    df['k_high'] = g()['high'].transform(lambda x: x.rolling(window=14).max())
+    df['k_low'] = g()['low'].transform(lambda x: x.rolling(window=14).min())
+    df['stoch_14'] = 100 * (df['close'] - df['k_low']) / (df['k_high'] - df['k_low'])
+    df['stoch_3'] = g()['stoch_14'].transform(lambda x: x.rolling(window=3).mean())
+
+    df['money_flow_vol'] = ((2 * df['close']) - df['low'] - df['high']) / (df['high'] - df['low']) * df['volume']
+    df['chaikin'] = g()['money_flow_vol'].transform(lambda x: x.ewm(span=3, min_periods=3).mean()) \
+                    - g()['money_flow_vol'].transform(lambda x: x.ewm(span=10, min_periods=10).mean())
+
+    df['sma_20'] = df['sma']
+    df['ema_20'] = g()['close'].transform(lambda x: x.ewm(span=20).mean())
+
+
+def grouped_indicators(spf: StockPriceFrame):
+    ind = StockIndicator(spf)
+    ind.MACD()
+    ind.RSI()
+    ind.ATR()
+    ind.BOLLINGER_BANDS()
+    ind.STOCH()
+    ind.CHAIKIN()
+    ind.SMA()
+    ind.EMA()
+
+
+def timed(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--bars', type=int, default=1000, help="bars per ticker")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'rows':>9} {'lambda':>10} {'grouped':>10} {'speedup':>8} {'max diff':>10}")
+    for n in args.tickers:
+        legacy_spf = make_frame(n, args.bars)
+        grouped_spf = make_frame(n, args.bars)
+
+        legacy = timed(lambda: legacy_indicators(legacy_spf), args.repeat)
+        grouped = timed(lambda: grouped_indicators(grouped_spf), args.repeat)
+
+        cols = ['macd', 'macd_signal', 'rsi_14', 'atr_14', 'bb_upper', 'bb_lower', 'stoch_14', 'stoch_3', 'chaikin', 'sma_20', 'ema_20']
+        diff = max(float(np.nanmax(np.abs(legacy_spf._price_frame[c].values - grouped_spf._price_frame[c].values))) for c in cols)
+
+        print(f"{n:>8} {legacy_spf._price_frame.shape[0]:>9} {legacy * 1000:>8.1f}ms {grouped * 1000:>8.1f}ms {legacy / grouped:>7.1f}x {diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
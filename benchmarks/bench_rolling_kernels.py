@@ -0,0 +1,59 @@
+"""
+Benchmark of viiquant.rolling_kernels against the pandas equivalents on a grouped (per-ticker) minute frame.
+
+CCI's mean absolute deviation used rolling(...).apply(lambda z: pd.Series(z).mad()); Series.mad no longer exists,
+so the reference here is the same Python callback per window computing mean(|z - mean(z)|).
+
+    python benchmarks/bench_rolling_kernels.py --tickers 10 100 --bars 270 --window 20
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from viiquant.grouped_kernels import TickerSegments
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--bars', type=int, default=270, help="bars per ticker (270 = one full session of 1m bars)")
+    parser.add_argument('--window', type=int, default=20)
+    args = parser.parse_args()
+
+    w = args.window
+    print(f"{'tickers':>8} {'case':>12} {'pandas':>10} {'kernel':>10} {'speedup':>8} {'max diff':>10}")
+    for n in args.tickers:
+        rng = np.random.default_rng(0)
+        values = 25000 + np.cumsum(rng.normal(0, 20, n * args.bars))
+        segments = TickerSegments(np.full(n, args.bars))
+        grouped = pd.Series(values).groupby(segments.keys)
+
+        cases = [
+            ('mad', lambda: grouped.transform(lambda x: x.rolling(w).apply(lambda z: np.abs(z - z.mean()).mean(), raw=True)).values,
+                    lambda: segments.rolling_mad(values, w)),
+            ('mean+std', lambda: np.c_[grouped.rolling(w).mean().values, grouped.rolling(w).std().values],
+                         lambda: np.c_[segments.rolling_mean_std(values, w)]),
+            ('min+max', lambda: np.c_[grouped.rolling(w).min().values, grouped.rolling(w).max().values],
+                        lambda: np.c_[segments.rolling_min_max(values, w)]),
+        ]
+        for name, reference, kernel in cases:
+            t_ref, expected = timed(reference)
+            t_kernel, result = timed(kernel)
+            diff = float(np.nanmax(np.abs(np.asarray(expected).reshape(result.shape) - result)))
+            print(f"{n:>8} {name:>12} {t_ref * 1000:>8.1f}ms {t_kernel * 1000:>8.1f}ms {t_ref / t_kernel:>7.1f}x {diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
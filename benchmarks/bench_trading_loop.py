@@ -0,0 +1,135 @@
+"""
+Offline benchmark of the TradingBot loop: fetch -> frame -> indicators -> signals.
+
+Runs against the local FakeMarketServer (no network), or against a fixture recorded earlier with --record
+and replayed with --replay (same arguments and --day are needed so that the requests match).
+
+    python benchmarks/bench_trading_loop.py --tickers 10 100 1000 --bars 20
+    python benchmarks/bench_trading_loop.py --tickers 100 --latency 0.05 --jitter 0.03 --error-rate 0.01
+    python benchmarks/bench_trading_loop.py --tickers 100 --days 0     # history sized from the indicators' warm-up
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from typing import Dict
+from typing import List
+
+from viiquant.constant import TIMEZONE
+from viiquant.data_stock_price import DataStockPrice
+from viiquant.fake_market_server import FakeMarketServer
+from viiquant.trading_bot import TradingBot
+
+
+def last_weekday(before: date) -> date:
+    day = before - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def timed(stats: Dict[str, List[float]], name: str, fn):
+    start = time.perf_counter()
+    # Bot in rất nhiều ra terminal, bỏ qua phần output khi đo
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    stats.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+
+def run_once(n_tickers: int, args) -> Dict[str, List[float]]:
+    day = datetime.strptime(args.day, '%Y-%m-%d').date() if args.day else last_weekday(date.today())
+    tz = ZoneInfo(TIMEZONE)
+
+    server = FakeMarketServer(universe_size=n_tickers, latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, seed=args.seed)
+    market = server.market
+    # Bắt đầu đo lúc 10:00 của phiên, mỗi vòng lặp thị trường chạy thêm đúng một nến
+    market.set_time(datetime(day.year, day.month, day.day, 10, 0, 5, tzinfo=tz).timestamp())
+
+    if not args.replay:
+        server.start()
+
+    dsp = DataStockPrice(vnd_root_uri=server.vnd_root_uri, entrade_root_uri=server.entrade_root_uri, vps_root_uri=server.vps_root_uri,
+                         max_workers=args.workers, record_path=args.record, replay_path=args.replay)
+
+    end_date = datetime(day.year, day.month, day.day)
+    start_date = end_date - timedelta(days=args.days) if args.days > 0 else None
+    bot = TradingBot(start_date=start_date, end_date=end_date, bar_size=args.bar_size, bar_type='m',
+                     max_workers=args.workers, data_stock_price=dsp, frame_backend=args.backend, retention=args.retention,
+                     incremental_indicators=args.incremental)
+
+    assets = [{'ticker': t, 'asset_type': 'equity', 'purchased_date': '', 'qty': 0, 'purchased_price': 0, 'is_owned': False}
+              for t in market.tickers]
+    bot.create_portfolio(assets)
+
+    stats: Dict[str, List[float]] = {}
+    used = bot.set_used_indicators(['macd', 'rsi'])
+    timed(stats, 'history', bot.create_price_frame)
+
+    bot.set_signal_conditions({
+        'buy': f"({used['macd']['macd_col']} > {used['macd']['signal_col']}) and ({used['rsi']['rsi_col']} < 30)",
+        'sell': f"({used['macd']['macd_col']} < {used['macd']['signal_col']}) and ({used['rsi']['rsi_col']} > 70)"
+    }, [used['macd']['macd_col'], used['macd']['signal_col'], used['rsi']['rsi_col']])
+    timed(stats, 'indicators_init', lambda: bot._strategy.set_used_indicators(bot._used_indicators))
+
+    for _ in range(args.bars):
+        market.advance(args.bar_size * 60)
+        timed(stats, 'fetch', bot.get_lastest_row)
+        bot.trim_history()
+        timed(stats, 'indicators', bot._strategy.refresh_indicators)
+        timed(stats, 'signals', bot._strategy.check_signals)
+
+    stats['rows'] = [bot._spf._price_frame.shape[0]]
+    stats['requests'] = [server.request_count]
+    stats['errors'] = [server.error_count]
+
+    dsp.close()
+    if not args.replay:
+        server.stop()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--bars', type=int, default=10, help="number of loop iterations (one new bar each)")
+    parser.add_argument('--days', type=int, default=5, help="calendar days of history loaded at start-up, 0: sized from the indicators' warm-up")
+    parser.add_argument('--bar-size', type=int, default=1)
+    parser.add_argument('--day', default=None, help="simulated session (YYYY-MM-DD), default: last weekday")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--backend', default='pandas', choices=['pandas', 'ring'], help="StockPriceFrame storage backend")
+    parser.add_argument('--retention', type=int, default=None, help="bars kept per ticker by the ring backend (default: warm-up + one session with --days 0, else 10000)")
+    parser.add_argument('--incremental', action='store_true', help="streaming indicators (only new bars are computed)")
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', default=None, help="record every response to this fixture (JSON lines)")
+    parser.add_argument('--replay', default=None, help="replay a recorded fixture instead of the fake server")
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'rows':>9} {'history':>10} {'ind_init':>10} {'fetch':>10} {'indicators':>11} {'signals':>10} {'loop':>10} {'req':>7} {'err':>5}")
+    for n in args.tickers:
+        stats = run_once(n, args)
+        median = {k: float(np.median(v)) * 1000 for k, v in stats.items() if k not in ['rows', 'requests', 'errors']}
+        loop = median['fetch'] + median['indicators'] + median['signals']
+        print(f"{n:>8} {stats['rows'][0]:>9} {median['history']:>8.1f}ms {median['indicators_init']:>8.1f}ms {median['fetch']:>8.1f}ms"
+              f" {median['indicators']:>9.1f}ms {median['signals']:>8.1f}ms {loop:>8.1f}ms {stats['requests'][0]:>7} {stats['errors'][0]:>5}")
+
+
+if __name__ == "__main__":
+    main()
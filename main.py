@@ -1,8 +1,5 @@
 from viiquant.trading_bot import TradingBot
 
-from datetime import datetime
-from datetime import timedelta
-
 #=====================================================================================
 # Tạo danh sách tài sản để khởi tạo danh mục
 assets = [
@@ -40,27 +37,22 @@ indicators = ['macd', 'rsi']
 #Tạo function main
 def main():
 
-    # Apply start_date, end_date để lấy dữ liệu lịch sử làm cơ sở để tính các chỉ số cho lần đầu tiên
-    end_date = datetime.today()
-    start_date = end_date - timedelta(days=15)
-    
-    # Khởi tạo bot
+    # Khởi tạo bot. Không truyền start_date: bot tự lấy số ngày giao dịch vừa đủ để các chỉ báo đã chọn hội tụ
     bot = TradingBot(
-            start_date=start_date,
-            end_date=end_date,
             bar_size=1,
             bar_type='m', # m = minute; H = hourly;
             show_tail_rows=3,
-            write_log=True)
+            write_log=True,
+            cache_path='.cache/price_cache.sqlite') # Cache dữ liệu lịch sử trên đĩa, chỉ lấy thêm phần còn thiếu
     
     bot.create_portfolio(assets)
+
+    # Apply chỉ báo ở trên (trước khi load giá: số nến lịch sử cần lấy tính từ các chỉ báo này)
+    used_indicators = bot.set_used_indicators(indicators)
     
     # Khởi tạo, load dữ liệu giá
     bot.create_price_frame()
 
-    # Apply chỉ báo ở trên
-    used_indicators = bot.set_used_indicators(indicators)
-
     # Thiết lập điều kiện theo cặp chỉ báo để tính ra tính hiệu Buy/Sell
 
     # BOLLINGER BANDS & RSI
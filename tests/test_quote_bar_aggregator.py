@@ -0,0 +1,33 @@
+from viiquant.quote_bar_aggregator import QuoteBarAggregator
+
+
+def quote(price, lot):
+    return {'lastPrice': price, 'lot': lot}
+
+
+def test_hourly_bars_span_bar_size_hours():
+    agg = QuoteBarAggregator(bar_size=2, bar_type='H')
+    assert agg.bar_seconds == 7200
+
+    start = 1_700_006_400  # bội số của 7200
+    assert agg.bucket_of(start + 5000) == start
+
+    # max_gap = 1 giờ: poll mỗi 30 phút vẫn là nến đầy đủ
+    closed = {}
+    for i, (price, lot) in enumerate([(10.0, 100), (11.0, 150), (9.5, 170), (10.5, 200), (12.0, 260)]):
+        closed = agg.update({'AAA': quote(price, lot)}, start + i * 1800)
+        if i < 4:
+            assert closed == {}
+
+    # Snapshot đầu tiên chỉ lấy mốc lot, nến 2 giờ đóng khi sang bucket kế tiếp
+    bars = closed['AAA']
+    assert len(bars) == 1
+    bar = bars[0]
+    assert bar['ts'] == start
+    assert (bar['open'], bar['high'], bar['low'], bar['close']) == (11.0, 11.0, 9.5, 10.5)
+    assert bar['volume'] == 100
+
+
+def test_minute_bars_use_bar_size():
+    assert QuoteBarAggregator(bar_size=5, bar_type='m').bar_seconds == 300
+    assert QuoteBarAggregator(bar_size=1, bar_type='H').bar_seconds == 3600
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from viiquant.ohlcv import FRAME_COLUMNS
+from viiquant.ohlcv import timestamp_to_datetime
+from viiquant.trading_calendar import session_buckets
+
+
+def resample_arrays(tickers: np.ndarray, ts: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                    close: np.ndarray, volume: np.ndarray, bar_size: int = 15, bar_type: str = 'm') -> pd.DataFrame:
+    """
+    Gộp nến 1 phút (đã sort theo ticker rồi ts) thành nến bar_size/bar_type theo phiên giao dịch.
+    Trả về DataFrame các cột FRAME_COLUMNS, ts/datetime là thời điểm bắt đầu của nến
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    n = len(ts)
+    if n == 0:
+        return pd.DataFrame({col: [] for col in FRAME_COLUMNS}, columns=FRAME_COLUMNS)
+
+    tickers = np.asarray(tickers, dtype=object)
+    buckets = session_buckets(ts, bar_size, bar_type)
+
+    # Một nến mới bắt đầu khi đổi ticker hoặc đổi bucket
+    brk = np.r_[True, (tickers[1:] != tickers[:-1]) | (buckets[1:] != buckets[:-1])]
+    starts = np.flatnonzero(brk)
+    ends = np.r_[starts[1:], n] - 1
+
+    volume = np.asarray(volume)
+    return pd.DataFrame({
+        'ticker': tickers[starts],
+        'ts': buckets[starts],
+        'datetime': timestamp_to_datetime(buckets[starts]),
+        'open': np.asarray(open)[starts],
+        'high': np.fmax.reduceat(np.asarray(high), starts),
+        'low': np.fmin.reduceat(np.asarray(low), starts),
+        'close': np.asarray(close)[ends],
+        'volume': np.add.reduceat(np.nan_to_num(volume) if volume.dtype.kind == 'f' else volume, starts)
+    }, columns=FRAME_COLUMNS)
+
+
+def resample_frame(df: pd.DataFrame, bar_size: int = 15, bar_type: str = 'm') -> pd.DataFrame:
+    """
+    Resample một khung giá index (ticker, ts) đã sort (vd. StockPriceFrame.price_frame), chỉ dùng các cột OHLCV
+    """
+    index = df.index
+    return resample_arrays(index.get_level_values('ticker').values, index.get_level_values('ts').values,
+                           df['open'].values, df['high'].values, df['low'].values, df['close'].values, df['volume'].values,
+                           bar_size=bar_size, bar_type=bar_type)
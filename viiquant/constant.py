@@ -0,0 +1,11 @@
+# Múi giờ của thị trường chứng khoán Việt Nam
+TIMEZONE = 'Asia/Ho_Chi_Minh'
+
+# Các phiên giao dịch trong ngày (giờ, phút): sáng 09:00 - 11:30, chiều 13:00 - 15:00
+TRADING_SESSIONS = [
+    ((9, 0), (11, 30)),
+    ((13, 0), (15, 0))
+]
+
+# Số phút giao dịch trong một ngày
+TRADING_MINUTES_PER_DAY = sum((end[0] * 60 + end[1]) - (start[0] * 60 + start[1]) for start, end in TRADING_SESSIONS)
@@ -1,19 +1,49 @@
-import requests as req
+import numpy as np
 import pandas as pd
 
 from datetime import datetime as dt
 from datetime import timezone as tz
 from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
+import threading
+import time
 
 from typing import Union
 from typing import List
 from typing import Optional
 from typing import Any
+from typing import Tuple
+from typing import Dict
+from typing import Callable
+from typing import Iterator
+
+from viiquant.http_client import HttpClient
+from viiquant.http_recorder import RecordingHttpClient
+from viiquant.http_recorder import ReplayHttpClient
+from viiquant.price_cache import PriceCache
+from viiquant.price_provider import PriceProvider
+from viiquant.price_provider import VNDirectProvider
+from viiquant.price_provider import EntradeProvider
+from viiquant.price_provider import VPSProvider
+from viiquant.provider_router import ProviderRouter
+from viiquant.exceptions import DataProviderError
+from viiquant.trading_calendar import session_minutes_elapsed
+from viiquant.ohlcv import build_frame
+from viiquant.ohlcv import empty_frame
+from viiquant.ohlcv import frame_to_rows
+
+
+# Khoảng thời gian (giây) giữa hai lần delta poll một mã chưa có nến nào trong ngày
+IDLE_POLL_INTERVAL = 300
 
 
 class DataStockPrice:
     
-    def __init__(self, vnd_root_uri: str=None, entrade_root_uri: str=None, vps_root_uri:str=None, ticker_type:str='stock'):
+    def __init__(self, vnd_root_uri: str=None, entrade_root_uri: str=None, vps_root_uri:str=None, ticker_type:str='stock',
+                 timeout: Union[float, Tuple[float, float]]=(3.05, 10), max_retries: int=3, http_client: HttpClient=None,
+                 max_workers: int=8, cache_path: str=None, vnd_page_size: int=500, quote_ttl: float=3.0,
+                 providers: List[PriceProvider]=None, hedge: bool=True, record_path: str=None, replay_path: str=None):
         self.VNDIRECT_ROOT_URI = "https://finfo-api.vndirect.com.vn/v4/stock_prices/"
         self.ENTRADE_ROOT_URI = "https://services.entrade.com.vn/chart-api/v2/ohlcs/"
         self.VPS_ROOT_URI = "https://bgapidatafeed.vps.com.vn/getliststockdata/"
@@ -36,152 +66,359 @@ class DataStockPrice:
 
         self._ticker_type = ticker_type
 
-    def get_lastest_price_rows(self, ticker: str, start_date: str, end_date: str, curr_last_timestamp: int, bar_size: int=1, bar_type: str='D') -> List[dict]:
-        lst_prices = self.get_historical_price(ticker, start_date, end_date, bar_size, bar_type)
-        if len(lst_prices) == 0:
+        # Transport dùng chung: giữ kết nối (keep-alive) cho từng host, có timeout và retry.
+        # record_path: ghi lại mọi response vào fixture; replay_path: phát lại fixture, không gọi mạng
+        if http_client is None:
+            if replay_path:
+                http_client = ReplayHttpClient(replay_path)
+            elif record_path:
+                http_client = RecordingHttpClient(record_path, headers=self.headers, timeout=timeout, max_retries=max_retries,
+                                                  pool_maxsize=max(16, max_workers))
+            else:
+                http_client = HttpClient(headers=self.headers, timeout=timeout, max_retries=max_retries, pool_maxsize=max(16, max_workers))
+        self._http = http_client
+
+        # Các provider mặc định, theo thứ tự ưu tiên: nến ngày từ VNDirect (dự phòng Entrade), nến trong ngày từ Entrade, bảng giá từ VPS
+        self._vnd = VNDirectProvider(self._http, self.VNDIRECT_ROOT_URI, page_size=vnd_page_size)
+        self._entrade = EntradeProvider(self._http, self.ENTRADE_ROOT_URI, ticker_type=ticker_type)
+        self._vps = VPSProvider(self._http, self.VPS_ROOT_URI)
+        if providers is None:
+            providers = [self._vnd, self._entrade, self._vps]
+
+        self._router = ProviderRouter(providers, hedge=hedge, max_workers=max(16, 2 * max_workers))
+
+        # Số request chạy song song tối đa khi lấy dữ liệu nhiều ticker
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor = None
+        self._executor_workers = 0
+
+        # Trạng thái delta polling: thời điểm được poll lại của các mã chưa có nến nào trong ngày
+        # và thống kê lần poll gần nhất của từng ticker
+        self._idle_until: Dict[Tuple[str, int, str], float] = {}
+        self._bytes_per_row: float = 0.0
+        self._poll_lock = threading.Lock()
+        self.poll_stats: Dict[str, dict] = {}
+
+        # Snapshot bảng giá VPS dùng chung trong quote_ttl giây, các request giống nhau đang chạy được gộp lại
+        self._quote_ttl = quote_ttl
+        self._quote_lock = threading.Lock()
+        self._quote_snapshot: Dict[str, dict] = {}
+        self._quote_time: float = 0.0
+        self._quote_inflight: Dict[frozenset, Future] = {}
+
+        # Cache dữ liệu lịch sử trên đĩa (tắt nếu không truyền cache_path)
+        self._cache: PriceCache = PriceCache(cache_path) if cache_path else None
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._cache:
+            self._cache.close()
+        self._router.close()
+        self._http.close()
+
+    def _run_per_ticker(self, tasks: Dict[str, Callable[[], Any]], max_workers: int=None) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """
+        Run one task per ticker on the shared thread pool.
+        Returns (results, errors), both keyed by ticker; a failed ticker never hides the others.
+        """
+        results = {}
+        errors = {}
+        if len(tasks) == 0:
+            return results, errors
+
+        max_workers = max_workers if max_workers else self._max_workers
+        if len(tasks) == 1 or max_workers <= 1:
+            for ticker, task in tasks.items():
+                try:
+                    results[ticker] = task()
+                except Exception as err:
+                    errors[ticker] = err
+            return results, errors
+
+        if self._executor is None or self._executor_workers != max_workers:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dsp')
+            self._executor_workers = max_workers
+
+        futures = {ticker: self._executor.submit(task) for ticker, task in tasks.items()}
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result()
+            except Exception as err:
+                errors[ticker] = err
+
+        return results, errors
+
+    def get_historical_prices(self, tickers: List[str], start_date: str, end_date: str, bar_size: int=1, bar_type: str='D',
+                              max_workers: int=None) -> Tuple[Dict[str, List[dict]], Dict[str, Exception]]:
+        """
+        Concurrent version of get_historical_price for many tickers.
+        Returns (data, errors): data[ticker] is the list of bars, errors[ticker] the exception of a failed ticker.
+        """
+        tasks = {}
+        for ticker in tickers:
+            tasks[ticker] = (lambda t=ticker: self.get_historical_price(t, start_date, end_date, bar_size, bar_type))
+
+        return self._run_per_ticker(tasks, max_workers)
+
+    def get_historical_frames(self, tickers: List[str], start_date: str, end_date: str, bar_size: int=1, bar_type: str='D',
+                              max_workers: int=None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+        """
+        Concurrent version of get_historical_frame, same (data, errors) contract as get_historical_prices
+        """
+        tasks = {}
+        for ticker in tickers:
+            tasks[ticker] = (lambda t=ticker: self.get_historical_frame(t, start_date, end_date, bar_size, bar_type))
+
+        return self._run_per_ticker(tasks, max_workers)
+
+    def get_lastest_prices_rows(self, last_timestamps: Dict[str, int], start_date: str, end_date: str, bar_size: int=1, bar_type: str='D',
+                                max_workers: int=None) -> Tuple[Dict[str, List[dict]], Dict[str, Exception]]:
+        """
+        Concurrent version of get_lastest_price_rows, last_timestamps maps each ticker to its current last timestamp
+        """
+        tasks = {}
+        for ticker, ts in last_timestamps.items():
+            tasks[ticker] = (lambda t=ticker, ts=ts: self.get_lastest_price_rows(t, start_date, end_date, ts, bar_size, bar_type))
+
+        return self._run_per_ticker(tasks, max_workers)
+
+    def get_lastest_price_rows(self, ticker: str, start_date: str, end_date: str, curr_last_timestamp: int, bar_size: int=1, bar_type: str='D',
+                               delta: bool=True) -> List[dict]:
+        if delta and bar_type in ['m', 'H'] and curr_last_timestamp:
+            return self.poll_delta_rows(ticker, end_date, curr_last_timestamp, bar_size, bar_type)
+
+        df = self.get_historical_frame(ticker, start_date, end_date, bar_size, bar_type)
+        if df.shape[0] == 0:
             return []
         
         # obj_filtered = filter(lambda x: dt.strptime(x['datetime'], '%Y-%m-%d %H:%M:%S') > dt.strptime(curr_last_time, '%Y-%m-%d %H:%M:%S'), lst_prices)
-        obj_filtered = filter(lambda x: x['ts'] > curr_last_timestamp, lst_prices)
+        df = df[df['ts'].values > curr_last_timestamp]
         # print("get_lastest_price_rows", list(obj_filtered))
 
-        return list(obj_filtered)
+        return frame_to_rows(df)
+
+    def poll_delta_rows(self, ticker: str, end_date: str, curr_last_timestamp: int, bar_size: int=1, bar_type: str='m') -> List[dict]:
+        """
+        Delta poll: chỉ lấy các nến sau curr_last_timestamp (tham số 'from' của Entrade, chính xác tới giây)
+        thay vì tải lại toàn bộ nến trong ngày. Thống kê số dòng/bytes tiết kiệm được lưu ở poll_stats[ticker].
+        """
+        key = (ticker, int(bar_size), bar_type)
+        from_ts = int(curr_last_timestamp) + 1
+        to_ts = int(dt.strptime(f"{end_date} 23:59:59", '%Y-%m-%d %H:%M:%S').timestamp())
+
+        # Số nến mà một lần tải cả ngày sẽ gửi lại (ước lượng theo số phút giao dịch đã qua)
+        bar_minutes = 60 if bar_type == 'H' else int(bar_size)
+        rows_saved = session_minutes_elapsed(int(curr_last_timestamp)) // bar_minutes
+
+        # Mã chưa có nến nào trong ngày (ngừng giao dịch, chưa khớp lệnh): chỉ poll lại sau IDLE_POLL_INTERVAL giây.
+        # Không mất nến: lần poll sau vẫn lấy mọi nến từ curr_last_timestamp
+        if self._idle_until.get(key, 0) > time.time():
+            self.poll_stats[ticker] = {
+                'rows': 0,
+                'bytes': 0,
+                'rows_saved': rows_saved,
+                'bytes_saved': int(rows_saved * self._bytes_per_row),
+                'skipped': True
+            }
+            return []
+
+        df, meta = self._router.call(bar_type, lambda p: p.poll_since(ticker, from_ts, to_ts, bar_size, bar_type))
+        df = df[df['ts'].values > curr_last_timestamp]
+        rows = df.shape[0]
+        nbytes = meta['bytes']
+        prev_time = meta['prev_time']
+        day_start = to_ts - 86399
+
+        with self._poll_lock:
+            # prev_time: nến gần nhất trước from_ts, nằm trước ngày end_date thì hôm nay mã chưa có nến nào
+            if rows == 0 and 0 < prev_time < day_start:
+                self._idle_until[key] = time.time() + IDLE_POLL_INTERVAL
+            else:
+                self._idle_until.pop(key, None)
+
+            if rows > 0:
+                # Trung bình trượt số bytes trên một nến, dùng để ước lượng bytes tiết kiệm được
+                per_row = nbytes / rows
+                self._bytes_per_row = per_row if self._bytes_per_row == 0 else 0.8 * self._bytes_per_row + 0.2 * per_row
+
+        self.poll_stats[ticker] = {
+            'rows': rows,
+            'bytes': nbytes,
+            'rows_saved': rows_saved,
+            'bytes_saved': int(rows_saved * self._bytes_per_row),
+            'skipped': False
+        }
+
+        return frame_to_rows(df)
+
+    def get_poll_summary(self, tickers: List[str]=None) -> dict:
+        """
+        Tổng hợp poll_stats của lần poll gần nhất
+        """
+        tickers = tickers if tickers else list(self.poll_stats.keys())
+        summary = {'rows': 0, 'bytes': 0, 'rows_saved': 0, 'bytes_saved': 0, 'skipped': 0}
+        for ticker in tickers:
+            stats = self.poll_stats.get(ticker)
+            if not stats:
+                continue
+            for k in summary:
+                summary[k] += int(stats[k])
+
+        return summary
         
 
-    def get_historical_price(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> List[Optional[dict]]:
+    def get_historical_price(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D', use_cache: bool=True) -> List[Optional[dict]]:
+        return frame_to_rows(self.get_historical_frame(ticker, start_date, end_date, bar_size, bar_type, use_cache))
 
+    def get_historical_frame(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D', use_cache: bool=True) -> pd.DataFrame:
+        """
+        Columnar version of get_historical_price: one DataFrame with the FRAME_COLUMNS, no per-bar dict
+        """
         start_date = f"{start_date} 00:00:00" # '%Y-%m-%d %H:%M:%S'
         end_date = f"{end_date} 23:59:59" # '%Y-%m-%d %H:%M:%S'
 
-        if bar_type.upper() == 'D':
-            return self.get_historical_price_by_vnd(ticker, start_date, end_date)
-        
-        if bar_type in ['m', 'H']:
-            return self.get_historical_price_by_entrade(ticker, start_date, end_date, bar_size, bar_type)
-        
-        return []
-    
+        if self._cache and use_cache:
+            return self.get_historical_frame_cached(ticker, start_date, end_date, bar_size, bar_type)
 
-    def get_historical_price_by_vnd(self, ticker: str, start_date: str, end_date: str) -> List[Optional[dict]]:
-        _start = dt.strptime(start_date, '%Y-%m-%d %H:%M:%S')
-        _end = dt.strptime(end_date, '%Y-%m-%d %H:%M:%S')
-
-        query = 'code:' + ticker + '~date:gte:' + _start.strftime('%Y-%m-%d') + '~date:lte:' + _end.strftime('%Y-%m-%d')
-        delta = _end - _start
-        _params = {
-            "sort": "date",
-            "size": delta.days + 1,
-            "page": 1,
-            "q": query
-        }
+        return self.fetch_historical_frame(ticker, start_date, end_date, bar_size, bar_type)
 
-        keys_mapping = {
-            'ts': 'ts',
-            'datetime': 'datetime',
-            'open': 'open',
-            'high': 'high',
-            'low': 'low',
-            'close': 'close',
-            'volume': 'nmVolume'
-        }
+    def fetch_historical_frame(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> pd.DataFrame:
+        """
+        Request the providers directly (hedged, with failover), start_date/end_date are '%Y-%m-%d %H:%M:%S' strings
+        """
+        if bar_type not in ['m', 'H'] and bar_type.upper() != 'D':
+            return empty_frame()
+        bar_type = 'D' if bar_type.upper() == 'D' else bar_type
 
-        try:
-            response = req.get(self.VNDIRECT_ROOT_URI, params=_params, headers=self.headers)
-            if response.status_code == 200:
-                json_data = response.json()['data']
-                json_data = sorted(json_data, key=lambda x: x['date'])
-
-                lst_prices: List[dict] = []
-                for i in range(len(json_data)):
-                    item = {
-                        'ticker': ticker
-                    }
-
-                    for k in keys_mapping:
-                        data_key = keys_mapping[k]
-                        if k == 'ts':
-                            item[k] = int(dt.strptime(json_data[i]['date'] + ' ' + json_data[i]['time'], '%Y-%m-%d %H:%M:%S').timestamp())
-                        elif k == 'datetime':
-                            item[k] = json_data[i]['date'] + ' ' + json_data[i]['time']
-                        else:
-                            item[k] = json_data[i][data_key]
-                    
-                    lst_prices.append(item)
-
-                return lst_prices
-
-        except Exception as err:
-            print('ERROR: ', err)
-        
-        return []
-    
+        from_ts, to_ts = self.__range_to_timestamps(start_date, end_date)
+
+        return self._router.call(bar_type, lambda p: p.get_history(ticker, from_ts, to_ts, bar_size, bar_type))
+
+    def iter_historical_frames(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> Iterator[pd.DataFrame]:
+        """
+        Same as fetch_historical_frame but yields the bars chunk by chunk (one VNDirect page at a time) from the
+        primary provider, so long ranges never have to be held in memory at once
+        """
+        if bar_type not in ['m', 'H'] and bar_type.upper() != 'D':
+            return
+        bar_type = 'D' if bar_type.upper() == 'D' else bar_type
+
+        from_ts, to_ts = self.__range_to_timestamps(start_date, end_date)
+
+        yield from self._router.primary(bar_type).iter_history(ticker, from_ts, to_ts, bar_size, bar_type)
+
+    def get_historical_frame_cached(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> pd.DataFrame:
+        """
+        Serve the range from the on-disk cache and request only the missing sub-ranges through the provider router.
+        Only bars of closed sessions (before today) are marked as covered, today's bars are always refetched.
+        A range that fails on every provider is left uncovered (the error is raised after the other ranges are filled).
+        """
+        if bar_type.upper() == 'D':
+            bar_type, bar_size = 'D', 1
+        elif bar_type not in ['m', 'H']:
+            return empty_frame()
+
+        # Các provider có thể thay thế nhau nên cache theo provider chính của loại nến
+        key = (self._router.primary(bar_type).name, ticker, int(bar_size), bar_type)
+
+        start_ts, end_ts = self.__range_to_timestamps(start_date, end_date)
+
+        # Dữ liệu trước ngày hôm nay là bất biến
+        today_ts = int(dt.combine(dt.today().date(), dt.min.time()).timestamp())
+
+        last_error = None
+        for (a, b) in self._cache.missing_ranges(key, start_ts, end_ts):
+            # Qua router như fetch_historical_frame: provider chính chậm thì hedge, lỗi thì chuyển provider khác
+            try:
+                df = self._router.call(bar_type, lambda p, a=a, b=b: p.get_history(ticker, a, b, bar_size, bar_type))
+            except DataProviderError as err:
+                # Mọi provider đều lỗi với khoảng này: vẫn lấp các khoảng còn lại để lần sau chỉ phải tải lại khoảng lỗi
+                last_error = err
+                continue
+            self._cache.put_frame(key, df)
+            self._cache.add_coverage(key, a, min(b, today_ts - 1))
+
+        if last_error is not None:
+            raise last_error
+
+        return build_frame(ticker, **self._cache.get_columns(key, start_ts, end_ts))
     
 
-    def get_historical_price_by_entrade(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> List[Optional[dict]]:
-        _start = dt.strptime(start_date, '%Y-%m-%d %H:%M:%S')
-        _end = dt.strptime(end_date, '%Y-%m-%d %H:%M:%S')
-        resolution = ''
-
-        if bar_type == 'H':
-            resolution = '1H'
-        elif bar_type == 'D':
-            resolution = '1D'
-        else:
-            resolution = bar_size
-            
-        url = f"https://services.entrade.com.vn/chart-api/v2/ohlcs/{self._ticker_type}"
-        _params = {
-            'from': int(_start.timestamp()),
-            'to': int(_end.timestamp()),
-            'symbol': ticker,
-            'resolution': resolution
-        }
+    def get_historical_price_by_vnd(self, ticker: str, start_date: str, end_date: str) -> List[Optional[dict]]:
+        from_ts, to_ts = self.__range_to_timestamps(start_date, end_date)
+        return frame_to_rows(self._vnd.get_history(ticker, from_ts, to_ts))
 
-        # url2 = f"https://services.entrade.com.vn/chart-api/v2/ohlcs/{self._ticker_type}?from={_params['from']}&to={_params['to']}&symbol={_params['symbol']}&resolution={_params['resolution']}"
-        # print(url2)
-
-        keys_mapping = {
-            'ts': 't',
-            'datetime': 't',
-            'open': 'o',
-            'high': 'h',
-            'low': 'l',
-            'close': 'c',
-            'volume': 'v'
-        }
+    def get_historical_price_by_entrade(self, ticker: str, start_date: str, end_date: str, bar_size: int=1, bar_type: str='D') -> List[Optional[dict]]:
+        from_ts, to_ts = self.__range_to_timestamps(start_date, end_date)
+        return frame_to_rows(self._entrade.get_history(ticker, from_ts, to_ts, bar_size, bar_type))
 
-        try:
-            response = req.get(url, params=_params, headers=self.headers)
-            if response.status_code == 200:
-                json_data = response.json()
-                cols = list(json_data.keys())
-                cols.remove('nextTime')
-
-                lst_prices: List[dict] = []
-                for i in range(len(json_data['t'])):
-                    item = {
-                        'ticker': ticker
-                    }
-
-                    for k in keys_mapping:
-                        data_key = keys_mapping[k]
-                        if k == 'datetime':
-                            item[k] = self.__timestamp_to_datetime(json_data[data_key][i])
-                        else:
-                            item[k] = json_data[data_key][i]
-                    
-                    lst_prices.append(item)
-                
-                return lst_prices
-            
-        except Exception as err:
-            print('ERROR: ', err)
-            
-        return []
+    def __range_to_timestamps(self, start_date: str, end_date: str) -> Tuple[int, int]:
+        _fmt = '%Y-%m-%d %H:%M:%S'
+        return int(dt.strptime(start_date, _fmt).timestamp()), int(dt.strptime(end_date, _fmt).timestamp())
     
-    def get_market_quotes(self, tickers:List[str]):
-        url = f"{self.VPS_ROOT_URI}{','.join(tickers)}"
+    def get_market_quotes(self, tickers:List[str], max_age: float=None) -> Dict[str, Optional[dict]]:
+        """
+        Bảng giá hiện tại của các tickers.
+        Trả về từ snapshot gần nhất nếu còn mới hơn max_age (mặc định quote_ttl) giây; nếu đang có request
+        cho cùng tập mã thì chờ kết quả của request đó thay vì gọi VPS thêm lần nữa.
+        Mỗi snapshot đến từ đúng một response, nên các phép tính dùng chung snapshot luôn nhất quán với nhau.
+        """
+        max_age = self._quote_ttl if max_age is None else max_age
+        wanted = frozenset(tickers)
+
+        with self._quote_lock:
+            if wanted.issubset(self._quote_snapshot.keys()) and time.monotonic() - self._quote_time <= max_age:
+                return self.__pick_quotes(self._quote_snapshot, tickers)
+
+            future = None
+            for key in self._quote_inflight:
+                if wanted.issubset(key):
+                    future = self._quote_inflight[key]
+                    break
+
+            owner = future is None
+            if owner:
+                # Lấy luôn các mã đang có trong snapshot để snapshot mới thay thế trọn vẹn snapshot cũ
+                key = wanted.union(self._quote_snapshot.keys())
+                future = Future()
+                self._quote_inflight[key] = future
+
+        if not owner:
+            return self.__pick_quotes(future.result(), tickers)
 
+        try:
+            snapshot = self.fetch_market_quotes(sorted(key))
+            with self._quote_lock:
+                self._quote_snapshot = snapshot
+                self._quote_time = time.monotonic()
+            future.set_result(snapshot)
+        except BaseException as err:
+            # Cả KeyboardInterrupt, SystemExit, ...: future luôn được hoàn tất, các request đang chờ không bị treo
+            if not future.done():
+                future.set_exception(err)
+            raise
+        finally:
+            with self._quote_lock:
+                self._quote_inflight.pop(key, None)
+
+        return self.__pick_quotes(snapshot, tickers)
+
+    def invalidate_quotes(self):
+        with self._quote_lock:
+            self._quote_snapshot = {}
+            self._quote_time = 0.0
+
+    def __pick_quotes(self, snapshot: Dict[str, dict], tickers: List[str]) -> Dict[str, Optional[dict]]:
+        return {ticker: snapshot.get(ticker) for ticker in tickers}
+
+    def fetch_market_quotes(self, tickers:List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Gọi trực tiếp bảng giá (VPS) không qua snapshot
+        """
         rename_cols = {
             'sym': 'Mã CP',
             'c': 'Giá Trần',
@@ -200,26 +437,10 @@ class DataStockPrice:
             'fRoom':'ĐTNN Room'
         }
 
-        data = dict.fromkeys(tickers)
-        try:
-            response = req.get(url, headers=self.headers)
-            if response.status_code == 200:
-                json_data = response.json()
-                for item in json_data:
-                    data[item['sym']] = item
-                return data
-
-        except Exception as err:
-            print('ERROR: ', err)
-        
-        return data
+        return self._router.call('quotes', lambda p: p.get_quotes(tickers))
 
 
     # Callback function for convert utc time
     # def __convert_utc_time(self, x):
     #     d = pd.to_datetime(x, unit='s', origin='unix', utc=True).tz_convert('Asia/Ho_Chi_Minh')
     #     return pd.to_datetime(d.strftime('%Y-%m-%d %H:%M:%S'))
-    
-    
-    def __timestamp_to_datetime(self, timestamp:int):
-        return dt.fromtimestamp(timestamp, tz=ZoneInfo('Asia/Ho_Chi_Minh')).strftime('%Y-%m-%d %H:%M:%S')
\ No newline at end of file
@@ -0,0 +1,48 @@
+from typing import Optional
+
+
+class DataProviderError(Exception):
+    """
+    Base error for every failure when fetching data from a price provider (VNDirect, Entrade, VPS, ...)
+    """
+
+    def __init__(self, message: str, provider: Optional[str] = None, url: Optional[str] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.url = url
+
+    def __str__(self) -> str:
+        msg = super().__str__()
+        if self.provider:
+            msg = f"[{self.provider}] {msg}"
+        if self.url:
+            msg = f"{msg} ({self.url})"
+        return msg
+
+
+class ProviderConnectionError(DataProviderError):
+    """
+    The provider host could not be reached (DNS, refused connection, TLS, reset, ...)
+    """
+
+
+class ProviderTimeoutError(ProviderConnectionError):
+    """
+    The provider did not answer within the configured timeout
+    """
+
+
+class ProviderHTTPError(DataProviderError):
+    """
+    The provider answered with a non-2xx status code
+    """
+
+    def __init__(self, message: str, status_code: int, provider: Optional[str] = None, url: Optional[str] = None):
+        super().__init__(message, provider=provider, url=url)
+        self.status_code = status_code
+
+
+class ProviderResponseError(DataProviderError):
+    """
+    The provider answered 200 but the body is not what we expect (invalid JSON, missing keys, ...)
+    """
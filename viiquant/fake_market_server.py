@@ -0,0 +1,382 @@
+import numpy as np
+
+import argparse
+import json
+import random
+import threading
+import time
+
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+
+from typing import List
+from typing import Dict
+from typing import Tuple
+from typing import Optional
+
+from viiquant.constant import TIMEZONE
+from viiquant.constant import TRADING_SESSIONS
+
+
+class SyntheticMarket:
+    """
+    Deterministic random-walk market: the 1-minute bars of a (ticker, day) only depend on the seed,
+    so every run (and every timeframe) sees the same prices. The market clock can be frozen and moved
+    by hand to replay a trading session at any speed.
+    """
+
+    def __init__(self, universe_size: int = 100, seed: int = 0, tickers: List[str] = None):
+        self.tickers = tickers if tickers else [f"T{i:04d}" for i in range(universe_size)]
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._seed = seed
+
+        self._now: Optional[float] = None
+        self._clock_lock = threading.Lock()
+
+    def now(self) -> float:
+        with self._clock_lock:
+            return self._now if self._now is not None else time.time()
+
+    def set_time(self, ts: float):
+        with self._clock_lock:
+            self._now = ts
+
+    def advance(self, seconds: float):
+        with self._clock_lock:
+            self._now = (self._now if self._now is not None else time.time()) + seconds
+
+    def session_timestamps(self, day: date) -> np.ndarray:
+        """
+        Timestamp bắt đầu của từng phút giao dịch trong ngày (bỏ giờ nghỉ trưa)
+        """
+        tz = ZoneInfo(TIMEZONE)
+        chunks = []
+        for start, end in TRADING_SESSIONS:
+            _start = int(datetime(day.year, day.month, day.day, start[0], start[1], tzinfo=tz).timestamp())
+            _end = int(datetime(day.year, day.month, day.day, end[0], end[1], tzinfo=tz).timestamp())
+            chunks.append(np.arange(_start, _end, 60, dtype=np.int64))
+        return np.concatenate(chunks)
+
+    def minute_bars(self, ticker: str, day: date) -> Dict[str, np.ndarray]:
+        idx = self._index.get(ticker)
+        ts = self.session_timestamps(day)
+        n = len(ts)
+        if idx is None or day.weekday() >= 5:
+            empty = np.empty(0)
+            return {'t': ts[:0], 'o': empty, 'h': empty, 'l': empty, 'c': empty, 'v': empty.astype(np.int64)}
+
+        rng = np.random.default_rng([self._seed, idx, day.toordinal()])
+
+        # Mức giá của ngày dao động chậm quanh giá gốc của ticker
+        base = 10 + (idx * 7919) % 90
+        day_open = base * (1 + 0.1 * np.sin(day.toordinal() / 20 + idx))
+
+        close = day_open * np.exp(np.cumsum(rng.normal(0, 0.0015, n)))
+        open = np.concatenate(([day_open], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.001, n))
+        high = np.maximum(open, close) * (1 + spread)
+        low = np.minimum(open, close) * (1 - spread)
+        volume = rng.integers(1, 500, n, dtype=np.int64) * 100
+
+        return {'t': ts, 'o': np.round(open, 2), 'h': np.round(high, 2), 'l': np.round(low, 2), 'c': np.round(close, 2), 'v': volume}
+
+    def bars(self, ticker: str, from_ts: int, to_ts: int, resolution: str = '1') -> Dict[str, np.ndarray]:
+        """
+        Các nến trong [from_ts, to_ts] đã bắt đầu trước thời điểm hiện tại của thị trường.
+        resolution: số phút ('1', '15', ...), '1H' hoặc '1D' như API Entrade
+        """
+        now = self.now()
+        to_ts = min(to_ts, int(now))
+        tz = ZoneInfo(TIMEZONE)
+
+        day = datetime.fromtimestamp(from_ts, tz=tz).date()
+        last_day = datetime.fromtimestamp(max(to_ts, from_ts), tz=tz).date()
+
+        if resolution.upper() == '1D':
+            seconds = None
+        elif resolution.upper().endswith('H'):
+            seconds = int(resolution[:-1] or 1) * 3600
+        else:
+            seconds = int(resolution) * 60
+
+        chunks: List[Dict[str, np.ndarray]] = []
+        while day <= last_day:
+            m = self.minute_bars(ticker, day)
+            # Chỉ các phút đã diễn ra
+            m = {k: v[m['t'] <= now - 60] for k, v in m.items()} if day == datetime.fromtimestamp(now, tz=tz).date() else m
+            if len(m['t']) > 0:
+                if seconds is None:
+                    midnight = int(datetime(day.year, day.month, day.day, tzinfo=tz).timestamp())
+                    buckets = np.full(len(m['t']), midnight, dtype=np.int64)
+                else:
+                    buckets = (m['t'] // seconds) * seconds
+                chunks.append(self.__aggregate(m, buckets))
+            day += timedelta(days=1)
+
+        if len(chunks) == 0:
+            return {'t': np.empty(0, dtype=np.int64), 'o': np.empty(0), 'h': np.empty(0), 'l': np.empty(0), 'c': np.empty(0),
+                    'v': np.empty(0, dtype=np.int64)}
+
+        out = {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+        mask = (out['t'] >= from_ts) & (out['t'] <= to_ts)
+        return {k: v[mask] for k, v in out.items()}
+
+    def __aggregate(self, m: Dict[str, np.ndarray], buckets: np.ndarray) -> Dict[str, np.ndarray]:
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        return {
+            't': buckets[starts],
+            'o': m['o'][starts],
+            'h': np.maximum.reduceat(m['h'], starts),
+            'l': np.minimum.reduceat(m['l'], starts),
+            'c': m['c'][ends],
+            'v': np.add.reduceat(m['v'], starts)
+        }
+
+    def quote(self, ticker: str) -> Optional[dict]:
+        """
+        Dòng bảng giá (định dạng VPS) của ticker tại thời điểm hiện tại của thị trường
+        """
+        if ticker not in self._index:
+            return None
+
+        now = self.now()
+        day = datetime.fromtimestamp(now, tz=ZoneInfo(TIMEZONE)).date()
+        m = self.minute_bars(ticker, day)
+        if len(m['t']) == 0:
+            return None
+
+        ref = float(m['o'][0])
+        n = int(np.searchsorted(m['t'], now, side='right'))
+        if n == 0:
+            last_price, lot, high, low, last_volume = ref, 0, ref, ref, 0
+        else:
+            # Giá khớp gần nhất nằm giữa open và close của phút hiện tại
+            frac = min((now - m['t'][n - 1]) / 60, 1.0)
+            last_price = round(float(m['o'][n - 1] + (m['c'][n - 1] - m['o'][n - 1]) * frac), 2)
+            lot = int(m['v'][:n - 1].sum() + m['v'][n - 1] * frac)
+            high = float(max(m['h'][:n].max(), last_price))
+            low = float(min(m['l'][:n].min(), last_price))
+            last_volume = int(m['v'][n - 1])
+
+        return {
+            'sym': ticker,
+            'c': round(ref * 1.07, 2),
+            'f': round(ref * 0.93, 2),
+            'r': ref,
+            'lot': lot,
+            'highPrice': high,
+            'lowPrice': low,
+            'avePrice': round((high + low) / 2, 2),
+            'lastPrice': last_price,
+            'lastVolume': last_volume,
+            'ot': round(last_price - ref, 2),
+            'changePc': round((last_price - ref) / ref * 100, 2),
+            'fBVol': 0,
+            'fSVolume': 0,
+            'fRoom': 0
+        }
+
+
+class _FakeMarketHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fake: FakeMarketServer = self.server.fake
+        fake.on_request()
+
+        delay = fake.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        if fake.should_fail():
+            return self.__send(503, {'error': 'injected failure'})
+
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            if parts.path.startswith(fake.VND_PATH):
+                body = fake.vnd_response(query)
+            elif parts.path.startswith(fake.ENTRADE_PATH):
+                body = fake.entrade_response(query)
+            elif parts.path.startswith(fake.VPS_PATH):
+                body = fake.vps_response(unquote(parts.path[len(fake.VPS_PATH):]))
+            else:
+                return self.__send(404, {'error': 'not found'})
+        except (KeyError, ValueError) as err:
+            return self.__send(400, {'error': str(err)})
+
+        self.__send(200, body)
+
+    def __send(self, status: int, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeMarketServer:
+    """
+    Local stand-in for the VNDirect / Entrade / VPS APIs serving a SyntheticMarket, with configurable
+    latency, jitter and error rate. Point DataStockPrice at vnd_root_uri / entrade_root_uri / vps_root_uri.
+    """
+
+    VND_PATH = '/vnd/'
+    ENTRADE_PATH = '/entrade/'
+    VPS_PATH = '/vps/'
+
+    def __init__(self, market: SyntheticMarket = None, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, universe_size: int = 100, seed: int = 0):
+        self.market = market if market else SyntheticMarket(universe_size=universe_size, seed=seed)
+        self.latency = latency # second
+        self.jitter = jitter # second
+        self.error_rate = error_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), _FakeMarketHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread: threading.Thread = None
+
+    @property
+    def root_uri(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def vnd_root_uri(self) -> str:
+        return self.root_uri + self.VND_PATH
+
+    @property
+    def entrade_root_uri(self) -> str:
+        return self.root_uri + self.ENTRADE_PATH
+
+    @property
+    def vps_root_uri(self) -> str:
+        return self.root_uri + self.VPS_PATH
+
+    def on_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.error_count += 1
+        return fail
+
+    def vnd_response(self, query: Dict[str, str]) -> dict:
+        # q = 'code:FPT~date:gte:2023-01-01~date:lte:2023-06-30'
+        ticker = query['q'].split('~')[0][len('code:'):]
+        tz = ZoneInfo(TIMEZONE)
+        _from, _to = self.__vnd_dates(query['q'])
+        from_ts = int(_from.replace(tzinfo=tz).timestamp())
+        to_ts = int((_to + timedelta(days=1)).replace(tzinfo=tz).timestamp()) - 1
+
+        bars = self.market.bars(ticker, from_ts, to_ts, '1D')
+        size = int(query.get('size', 20))
+        page = int(query.get('page', 1))
+        total = len(bars['t'])
+        lo, hi = (page - 1) * size, min(page * size, total)
+
+        records = []
+        for i in range(lo, hi):
+            records.append({
+                'code': ticker,
+                'date': datetime.fromtimestamp(int(bars['t'][i]), tz=tz).strftime('%Y-%m-%d'),
+                'time': '00:00:00',
+                'open': float(bars['o'][i]),
+                'high': float(bars['h'][i]),
+                'low': float(bars['l'][i]),
+                'close': float(bars['c'][i]),
+                'nmVolume': int(bars['v'][i])
+            })
+
+        return {'data': records, 'currentPage': page, 'size': size, 'totalElements': total,
+                'totalPages': max(1, -(-total // size))}
+
+    def __vnd_dates(self, q: str) -> Tuple[datetime, datetime]:
+        _from = _to = None
+        for item in q.split('~'):
+            if item.startswith('date:gte:'):
+                _from = datetime.strptime(item[len('date:gte:'):], '%Y-%m-%d')
+            elif item.startswith('date:lte:'):
+                _to = datetime.strptime(item[len('date:lte:'):], '%Y-%m-%d')
+        if _from is None or _to is None:
+            raise ValueError("Missing date range in q")
+        return _from, _to
+
+    def entrade_response(self, query: Dict[str, str]) -> dict:
+        bars = self.market.bars(query['symbol'], int(query['from']), int(query['to']), query.get('resolution', '1'))
+        if len(bars['t']) == 0:
+            # Như Entrade (UDF no_data): chỉ có nextTime = nến gần nhất trước khoảng được hỏi (tìm lùi tối đa 7 ngày)
+            before = self.market.bars(query['symbol'], int(query['from']) - 7 * 86400, int(query['from']) - 1, query.get('resolution', '1'))
+            if len(before['t']) > 0:
+                return {'s': 'no_data', 'nextTime': int(before['t'][-1])}
+        return {k: v.tolist() for k, v in bars.items()}
+
+    def vps_response(self, tickers: str) -> List[dict]:
+        quotes = [self.market.quote(ticker) for ticker in tickers.split(',') if ticker]
+        return [q for q in quotes if q is not None]
+
+    def start(self) -> 'FakeMarketServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-market', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeMarketServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local VNDirect/Entrade/VPS stand-in serving a synthetic market")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--universe', type=int, default=100, help="number of synthetic tickers (T0000, T0001, ...)")
+    parser.add_argument('--latency', type=float, default=0.0, help="base latency per request, seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="uniform jitter around the latency, seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeMarketServer(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, universe_size=args.universe, seed=args.seed)
+    print(f"VNDirect: {server.vnd_root_uri}")
+    print(f"Entrade:  {server.entrade_root_uri}")
+    print(f"VPS:      {server.vps_root_uri}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
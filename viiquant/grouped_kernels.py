@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from viiquant import rolling_kernels
+
+try:
+    # Các kernel Cython mà pandas dùng cho rolling/ewm, nhận biên cửa sổ [start, end) tuỳ ý cho từng dòng
+    from pandas._libs.window import aggregations as window_aggregations
+except ImportError:
+    window_aggregations = None
+
+
+class TickerSegments:
+    """
+    Các đoạn liên tục của từng ticker trong một khung giá đã sort theo (ticker, ts).
+
+    Các phép theo nhóm (shift, diff, ewm, rolling) chạy trên toàn bộ mảng một lần: shift/diff là phép NumPy,
+    ewm/rolling gọi thẳng kernel Cython của pandas với biên cửa sổ của từng ticker (một lần gọi cho mọi ticker),
+    không có callback Python cho từng ticker. Kết quả giống hệt groupby(...).ewm/rolling của pandas.
+    Kernel được kiểm tra với API public khi import, không khớp (hoặc đổi chữ ký) thì dùng groupby(...).ewm/rolling
+    """
+
+    def __init__(self, lengths: np.ndarray):
+        self._lengths = np.asarray(lengths, dtype=np.int64)
+        self._starts = np.r_[0, np.cumsum(self._lengths)[:-1]] if len(self._lengths) > 0 else np.empty(0, dtype=np.int64)
+        self._n = int(self._lengths.sum())
+        self._keys: np.ndarray = None
+        self._offsets: np.ndarray = None
+
+    @classmethod
+    def from_positions(cls, positions: Dict[str, Tuple[int, int]]) -> 'TickerSegments':
+        return cls(np.asarray([end - start for start, end in positions.values()], dtype=np.int64))
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self._lengths
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self._starts
+
+    @property
+    def keys(self) -> np.ndarray:
+        """
+        Số thứ tự đoạn (ticker) của từng dòng
+        """
+        if self._keys is None:
+            self._keys = np.repeat(np.arange(len(self._lengths)), self._lengths)
+        return self._keys
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        Vị trí của từng dòng trong đoạn của nó (0 là nến đầu tiên của ticker)
+        """
+        if self._offsets is None:
+            self._offsets = np.arange(self._n) - np.repeat(self._starts, self._lengths)
+        return self._offsets
+
+    def tile(self, reps: int) -> 'TickerSegments':
+        """
+        Các đoạn của reps mảng cùng độ dài nối tiếp nhau (vd. nhiều biến thể tham số của cùng một chuỗi),
+        để một lần gọi kernel tính cho mọi biến thể
+        """
+        return TickerSegments(np.tile(self._lengths, reps))
+
+    def count(self, values: np.ndarray) -> np.ndarray:
+        """
+        Số giá trị khác NaN tính tới từng dòng, theo từng ticker
+        """
+        notna = ~np.isnan(values)
+        if notna.all():
+            return self.offsets + 1
+        total = np.cumsum(notna)
+        before = np.r_[0, total][self._starts]
+        return total - np.repeat(before, self._lengths)
+
+    def shift(self, values: np.ndarray, periods: int = 1) -> np.ndarray:
+        out = np.full(self._n, np.nan)
+        if periods < self._n:
+            out[periods:] = values[:self._n - periods]
+        out[self.offsets < periods] = np.nan
+        return out
+
+    def diff(self, values: np.ndarray, periods: int = 1) -> np.ndarray:
+        return values - self.shift(values, periods)
+
+    def ewm_mean(self, values: np.ndarray, span: float = None, alpha: float = None, min_periods: int = 0) -> np.ndarray:
+        """
+        ewm(span | alpha, min_periods).mean() theo từng ticker (adjust=True, ignore_na=False)
+        """
+        if self._n == 0:
+            return np.empty(0)
+        values = np.asarray(values, dtype=np.float64)
+
+        if window_aggregations is not None:
+            try:
+                return self._kernel_ewm_mean(values, span, alpha, min_periods)
+            except TypeError:
+                # Chữ ký kernel private đã đổi ở bản pandas này: dùng API public
+                pass
+        grouped = pd.Series(values, copy=False).groupby(self.keys, sort=False)
+        return grouped.ewm(span=span, alpha=alpha, min_periods=min_periods).mean().to_numpy()
+
+    def _kernel_ewm_mean(self, values: np.ndarray, span: float, alpha: float, min_periods: int) -> np.ndarray:
+        com = (span - 1) / 2.0 if alpha is None else 1.0 / alpha - 1.0
+        return window_aggregations.ewm(values, self._starts, self._starts + self._lengths, max(int(min_periods), 1),
+                                       com, True, False, None, True)
+
+    def window_bounds(self, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Biên [start, end) của cửa sổ window dòng kết thúc tại từng dòng, không vượt qua đầu đoạn của ticker
+        """
+        end = np.arange(1, self._n + 1, dtype=np.int64)
+        start = np.maximum(end - int(window), np.repeat(self._starts, self._lengths))
+        return start, end
+
+    def rolling(self, values: np.ndarray, window: int, how: str = 'mean') -> np.ndarray:
+        """
+        rolling(window).<how>() theo từng ticker (min_periods = window), how: mean, std, var, min, max, sum
+        """
+        if self._n == 0:
+            return np.empty(0)
+        values = np.asarray(values, dtype=np.float64)
+
+        if window_aggregations is not None:
+            try:
+                return self._kernel_rolling(values, window, how)
+            except TypeError:
+                # Chữ ký kernel private đã đổi ở bản pandas này: dùng API public
+                pass
+        grouped = pd.Series(values, copy=False).groupby(self.keys, sort=False)
+        return getattr(grouped.rolling(window), how)().to_numpy()
+
+    def _kernel_rolling(self, values: np.ndarray, window: int, how: str) -> np.ndarray:
+        start, end = self.window_bounds(window)
+        if how in ['var', 'std']:
+            result = window_aggregations.roll_var(values, start, end, int(window), ddof=1)
+            return np.sqrt(result) if how == 'std' else result
+        return getattr(window_aggregations, f"roll_{how}")(values, start, end, int(window))
+
+    def rolling_mean_std(self, values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        return rolling_kernels.rolling_mean_std(values, window, self.offsets)
+
+    def rolling_mean_std_many(self, values: np.ndarray, windows: List[int]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        return rolling_kernels.rolling_mean_std_many(values, windows, self.offsets)
+
+    def rolling_mad(self, values: np.ndarray, window: int, mean: np.ndarray = None) -> np.ndarray:
+        return rolling_kernels.rolling_mad(values, window, self.offsets, mean=mean)
+
+    def rolling_min(self, values: np.ndarray, window: int) -> np.ndarray:
+        return rolling_kernels.rolling_min(values, window, self.offsets)
+
+    def rolling_max(self, values: np.ndarray, window: int) -> np.ndarray:
+        return rolling_kernels.rolling_max(values, window, self.offsets)
+
+    def rolling_min_max(self, values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        return rolling_kernels.rolling_min_max(values, window, self.offsets)
+
+
+def _check_window_aggregations() -> bool:
+    """
+    Kernel Cython là API private của pandas, chữ ký có thể đổi giữa các bản: so kết quả với groupby(...).ewm/rolling
+    trên một mẫu nhỏ (có NaN, nhiều ticker) trước khi dùng
+    """
+    values = np.array([1.0, 2.5, np.nan, 4.0, 3.0, 5.5, 2.0, 6.0, 7.5, 1.0, 2.0, 8.0])
+    segments = TickerSegments(np.array([3, 9]))
+    grouped = pd.Series(values).groupby(segments.keys, sort=False)
+    try:
+        checks = [(segments._kernel_ewm_mean(values, span, alpha, min_periods),
+                   grouped.ewm(span=span, alpha=alpha, min_periods=min_periods).mean())
+                  for span, alpha, min_periods in [(3, None, 0), (None, 0.25, 3)]]
+        checks += [(segments._kernel_rolling(values, 3, how), getattr(grouped.rolling(3), how)())
+                   for how in ['mean', 'std', 'var', 'min', 'max', 'sum']]
+        return all(np.allclose(fast, public.to_numpy(), equal_nan=True) for fast, public in checks)
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+if window_aggregations is not None and not _check_window_aggregations():
+    window_aggregations = None
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+import os
+import re
+import uuid
+
+from typing import List
+from typing import Dict
+from typing import Iterable
+
+from viiquant.ohlcv import FRAME_COLUMNS
+from viiquant.ohlcv import timestamp_to_datetime
+from viiquant.ohlcv import concat_frames
+from viiquant.ohlcv import empty_frame
+from viiquant.stock_price_frame import StockPriceFrame
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+    ipc = None
+
+
+class HistoryStore:
+    """
+    On-disk columnar store of OHLCV bars (Arrow IPC files), partitioned by ticker and date:
+
+        <root>/<bar_size><bar_type>/<ticker>/<YYYY>.arrow      daily bars, one file per year
+        <root>/<bar_size><bar_type>/<ticker>/<YYYY-MM>.arrow   intraday bars, one file per month
+
+    Files are uncompressed and read through a memory map, so opening a slice is almost free: only the partitions
+    overlapping the time range are opened, only the requested columns are touched, and the pages are shared by
+    every process reading the same files. Partitions are rewritten atomically (write to a temp file, then rename).
+    """
+
+    COLUMNS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, root: str):
+        if pa is None:
+            raise ImportError("HistoryStore requires pyarrow (pip install pyarrow)")
+        self._root = root
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def __folder(self, ticker: str, bar_size: int, bar_type: str) -> str:
+        return os.path.join(self._root, f"{bar_size}{bar_type}", ticker)
+
+    @staticmethod
+    def __partition_keys(ts: np.ndarray, bar_type: str) -> np.ndarray:
+        """
+        Tên partition (theo giờ Việt Nam) của từng nến: 'YYYY' với nến ngày, 'YYYY-MM' với nến trong ngày
+        """
+        unit = 'Y' if bar_type.upper() == 'D' else 'M'
+        return timestamp_to_datetime(ts).astype(f'datetime64[{unit}]').astype(str)
+
+    def tickers(self, bar_size: int = 1, bar_type: str = 'D') -> List[str]:
+        folder = os.path.join(self._root, f"{bar_size}{bar_type}")
+        if not os.path.isdir(folder):
+            return []
+        return sorted(os.listdir(folder))
+
+    def partitions(self, ticker: str, bar_size: int = 1, bar_type: str = 'D') -> List[str]:
+        folder = self.__folder(ticker, bar_size, bar_type)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f[:-6] for f in os.listdir(folder) if re.fullmatch(r'\d{4}(-\d{2})?\.arrow', f))
+
+    def __read_table(self, path: str, columns: List[str] = None) -> 'pa.Table':
+        # Memory map: read_all() không copy dữ liệu, các trang chỉ được nạp khi thực sự đọc tới
+        with pa.memory_map(path, 'r') as source:
+            table = ipc.open_file(source).read_all()
+        return table.select(columns) if columns else table
+
+    def __write_table(self, path: str, table: 'pa.Table'):
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+    def write(self, ticker: str, df: pd.DataFrame, bar_size: int = 1, bar_type: str = 'D'):
+        """
+        Ghi các nến của một ticker (DataFrame có cột ts, open, high, low, close, volume).
+        Nến trùng ts với dữ liệu đã có được ghi đè
+        """
+        if df.shape[0] == 0:
+            return
+
+        folder = self.__folder(ticker, bar_size, bar_type)
+        os.makedirs(folder, exist_ok=True)
+
+        df = df[self.COLUMNS]
+        keys = self.__partition_keys(df['ts'].values.astype(np.int64), bar_type)
+        for key in np.unique(keys):
+            path = os.path.join(folder, f"{key}.arrow")
+            part = df[keys == key]
+            if os.path.exists(path):
+                part = pd.concat([self.__read_table(path).to_pandas(), part], ignore_index=True)
+
+            part = part.drop_duplicates(subset='ts', keep='last').sort_values('ts', kind='stable')
+            part = part.astype({'ts': np.int64})
+            self.__write_table(path, pa.Table.from_pandas(part, preserve_index=False))
+
+    def write_frame(self, df: pd.DataFrame, bar_size: int = 1, bar_type: str = 'D'):
+        """
+        Ghi một khung giá nhiều ticker (cột ticker hoặc index (ticker, ts))
+        """
+        if 'ticker' not in df.columns:
+            df = df.reset_index()
+        for ticker, group in df.groupby('ticker', sort=False):
+            self.write(ticker, group, bar_size, bar_type)
+
+    def read(self, ticker: str, start_ts: int = None, end_ts: int = None, columns: List[str] = None,
+             bar_size: int = 1, bar_type: str = 'D') -> pd.DataFrame:
+        """
+        Các nến của ticker trong [start_ts, end_ts] (dạng FRAME_COLUMNS, hoặc chỉ ticker, ts và các cột trong columns).
+        Chỉ mở các partition giao với khoảng thời gian, cắt theo ts bằng tìm kiếm nhị phân trên cột ts đã sort
+        """
+        columns = [c for c in (columns if columns else self.COLUMNS) if c in self.COLUMNS and c != 'ts']
+
+        partitions = self.partitions(ticker, bar_size, bar_type)
+        if start_ts is not None or end_ts is not None:
+            bounds = self.__partition_keys(np.asarray([start_ts if start_ts is not None else 0,
+                                                        end_ts if end_ts is not None else 2**31], dtype=np.int64), bar_type)
+            partitions = [p for p in partitions if bounds[0] <= p <= bounds[1]]
+
+        frames = []
+        folder = self.__folder(ticker, bar_size, bar_type)
+        for key in partitions:
+            table = self.__read_table(os.path.join(folder, f"{key}.arrow"), ['ts'] + columns)
+            ts = table.column('ts').to_numpy()
+            lo = np.searchsorted(ts, start_ts, side='left') if start_ts is not None else 0
+            hi = np.searchsorted(ts, end_ts, side='right') if end_ts is not None else len(ts)
+            if hi > lo:
+                frames.append(table.slice(lo, hi - lo).to_pandas())
+
+        df = concat_frames(frames) if len(frames) > 0 else empty_frame()[['ts'] + columns]
+        df.insert(0, 'ticker', np.full(df.shape[0], ticker, dtype=object))
+        df.insert(2, 'datetime', timestamp_to_datetime(df['ts'].values.astype(np.int64)))
+        return df[[c for c in FRAME_COLUMNS if c in df.columns]]
+
+    def read_frames(self, tickers: Iterable[str], start_ts: int = None, end_ts: int = None, columns: List[str] = None,
+                    bar_size: int = 1, bar_type: str = 'D') -> Dict[str, pd.DataFrame]:
+        return {ticker: self.read(ticker, start_ts, end_ts, columns, bar_size, bar_type) for ticker in tickers}
+
+    def open_frame(self, tickers: Iterable[str] = None, start_ts: int = None, end_ts: int = None,
+                   bar_size: int = 1, bar_type: str = 'D', **kwargs) -> StockPriceFrame:
+        """
+        StockPriceFrame trên một lát cắt (tickers x [start_ts, end_ts]) của store, kwargs được chuyển cho StockPriceFrame
+        """
+        tickers = tickers if tickers is not None else self.tickers(bar_size, bar_type)
+        return StockPriceFrame(self.read_frames(tickers, start_ts, end_ts, None, bar_size, bar_type), **kwargs)
@@ -0,0 +1,134 @@
+import requests as req
+from requests.adapters import HTTPAdapter
+
+import random
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+from typing import Dict
+from typing import Tuple
+from typing import Union
+from typing import Optional
+from typing import Any
+
+from viiquant.exceptions import DataProviderError
+from viiquant.exceptions import ProviderConnectionError
+from viiquant.exceptions import ProviderTimeoutError
+from viiquant.exceptions import ProviderHTTPError
+from viiquant.exceptions import ProviderResponseError
+
+
+class HttpClient:
+    """
+    Connection-pooled HTTP transport used by DataStockPrice.
+    One keep-alive session per provider host, with timeouts and bounded retries (jittered exponential backoff).
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, headers: Dict[str, str] = None, timeout: Union[float, Tuple[float, float]] = (3.05, 10),
+                 max_retries: int = 3, backoff_factor: float = 0.5, backoff_max: float = 8.0, pool_maxsize: int = 16):
+        self._headers = headers or {}
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._backoff_max = backoff_max
+        self._pool_maxsize = pool_maxsize
+
+        self._sessions: Dict[str, req.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str) -> req.Session:
+        """
+        Lấy session (keep-alive) của host tương ứng với url, tạo mới nếu chưa có
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = req.Session()
+                session.headers.update(self._headers)
+
+                # Retry được xử lý ở get() để có jitter, adapter chỉ lo connection pool
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize, max_retries=0)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[host] = session
+
+        return session
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Full-jitter exponential backoff. A valid Retry-After header (seconds) takes precedence.
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self._backoff_max)
+            except ValueError:
+                pass
+
+        cap = min(self._backoff_max, self._backoff_factor * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+            timeout: Union[float, Tuple[float, float]] = None, provider: str = None, stream: bool = False) -> req.Response:
+        """
+        GET with retry on connection errors, timeouts and retryable status codes.
+        Raises a DataProviderError subclass when every attempt failed.
+        """
+        session = self.get_session(url)
+        timeout = timeout if timeout is not None else self._timeout
+
+        last_error: DataProviderError = None
+        for attempt in range(self._max_retries + 1):
+            retry_after = None
+            try:
+                response = session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+            except req.exceptions.Timeout as err:
+                last_error = ProviderTimeoutError(f"Timeout after {attempt + 1} attempt(s): {err}", provider=provider, url=url)
+            except req.exceptions.ConnectionError as err:
+                last_error = ProviderConnectionError(f"Connection failed after {attempt + 1} attempt(s): {err}", provider=provider, url=url)
+            except req.exceptions.RequestException as err:
+                raise DataProviderError(str(err), provider=provider, url=url) from err
+            else:
+                if 200 <= response.status_code < 300:
+                    return response
+
+                last_error = ProviderHTTPError(f"HTTP {response.status_code}", response.status_code, provider=provider, url=response.url)
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+                if response.status_code not in self.RETRY_STATUSES:
+                    raise last_error
+
+            if attempt < self._max_retries:
+                time.sleep(self.backoff_delay(attempt, retry_after))
+
+        raise last_error
+
+    def get_json(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                 timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Any:
+        response = self.get(url, params=params, headers=headers, timeout=timeout, provider=provider)
+        try:
+            return response.json()
+        except ValueError as err:
+            raise ProviderResponseError(f"Invalid JSON body: {err}", provider=provider, url=response.url) from err
+
+    def get_json_with_size(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                           timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Tuple[Any, int]:
+        """
+        Same as get_json but also returns the size of the body in bytes
+        """
+        response = self.get(url, params=params, headers=headers, timeout=timeout, provider=provider)
+        try:
+            return response.json(), len(response.content)
+        except ValueError as err:
+            raise ProviderResponseError(f"Invalid JSON body: {err}", provider=provider, url=response.url) from err
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
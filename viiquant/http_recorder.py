@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+from typing import Any
+
+from viiquant.http_client import HttpClient
+from viiquant.exceptions import ProviderResponseError
+
+
+def request_key(url: str, params: Dict[str, Any] = None, ignore_params: Tuple[str, ...] = ()) -> str:
+    """
+    Khoá của một request: path của url + query (sắp xếp theo tên tham số), bỏ qua các tham số trong ignore_params.
+    Không tính host để fixture vẫn dùng được khi server đổi địa chỉ/port
+    """
+    path = urlsplit(url).path
+    if not params:
+        return path
+    items = sorted((k, str(v)) for k, v in params.items() if k not in ignore_params)
+    return f"{path}?{urlencode(items)}" if items else path
+
+
+class RecordingHttpClient(HttpClient):
+    """
+    HttpClient that also appends every successful JSON response to a fixture file (JSON lines),
+    so a session against the live APIs can be replayed later with ReplayHttpClient.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self._path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._file_lock = threading.Lock()
+
+    def __record(self, url: str, params: Dict[str, Any], body: Any, nbytes: int, elapsed: float):
+        line = json.dumps({'key': request_key(url, params), 'body': body, 'bytes': nbytes, 'elapsed': round(elapsed, 6)},
+                          ensure_ascii=False)
+        with self._file_lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def get_json(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                 timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Any:
+        return self.get_json_with_size(url, params=params, headers=headers, timeout=timeout, provider=provider)[0]
+
+    def get_json_with_size(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                           timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Tuple[Any, int]:
+        start = time.perf_counter()
+        body, nbytes = super().get_json_with_size(url, params=params, headers=headers, timeout=timeout, provider=provider)
+        self.__record(url, params, body, nbytes, time.perf_counter() - start)
+        return body, nbytes
+
+    def close(self):
+        super().close()
+        with self._file_lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplayHttpClient(HttpClient):
+    """
+    Serve the responses of a fixture written by RecordingHttpClient, no network involved.
+
+    Responses recorded several times for the same request are returned in recording order, the last one
+    is repeated once exhausted. With realtime=True the recorded latency of each response is replayed too.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, ignore_params: Tuple[str, ...] = (), **kwargs):
+        super().__init__(**kwargs)
+        self._realtime = realtime
+        self._ignore_params = ignore_params
+
+        self._responses: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._replay_lock = threading.Lock()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                key = self.__normalize(item['key'])
+                self._responses.setdefault(key, []).append(item)
+
+    def __normalize(self, key: str) -> str:
+        if not self._ignore_params or '?' not in key:
+            return key
+        path, query = key.split('?', 1)
+        items = [kv for kv in query.split('&') if kv.split('=', 1)[0] not in self._ignore_params]
+        return f"{path}?{'&'.join(items)}" if items else path
+
+    def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+            timeout: Union[float, Tuple[float, float]] = None, provider: str = None, stream: bool = False):
+        raise ProviderResponseError("Raw responses are not recorded, use get_json", provider=provider, url=url)
+
+    def get_json(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                 timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Any:
+        return self.get_json_with_size(url, params=params, headers=headers, timeout=timeout, provider=provider)[0]
+
+    def get_json_with_size(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                           timeout: Union[float, Tuple[float, float]] = None, provider: str = None) -> Tuple[Any, int]:
+        key = request_key(url, params, self._ignore_params)
+
+        with self._replay_lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise ProviderResponseError(f"No recorded response for {key}", provider=provider, url=url)
+            idx = self._cursor.get(key, 0)
+            self._cursor[key] = idx + 1
+            item = responses[min(idx, len(responses) - 1)]
+
+        if self._realtime:
+            time.sleep(item.get('elapsed', 0))
+
+        return item['body'], item.get('bytes', 0)
+
+    def rewind(self):
+        with self._replay_lock:
+            self._cursor.clear()
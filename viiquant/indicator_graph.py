@@ -0,0 +1,151 @@
+import numpy as np
+
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+from viiquant.stock_price_frame import StockPriceFrame
+
+
+# Khoá của một node: tuple (phép tính, nguồn, tham số...), vd. ('ewm', ('col', 'close'), 12.5)
+NodeKey = Tuple
+
+
+class IndicatorGraph:
+    """
+    DAG of primitive nodes shared by every indicator of a StockIndicator.
+
+    Each node (a column, diff, ewm, rolling mean/std, ...) is identified by its operation, its source nodes and its
+    parameters, and is computed at most once per data version of the StockPriceFrame: MACD, EMA and CHAIKIN reuse the
+    same ewm(close, span), RSI and STOCH_RSI the same diff/gain/loss chain, SMA and BOLLINGER_BANDS the same rolling mean.
+    Intermediate results live in scratch buffers of the graph, never in columns of the price frame.
+    """
+
+    def __init__(self, spf: StockPriceFrame = None):
+        self._spf: StockPriceFrame = spf
+        self._values: Dict[NodeKey, np.ndarray] = {}
+        self._deps: Dict[NodeKey, Tuple[NodeKey, ...]] = {}
+        self._version: int = -1
+        self._hits: int = 0
+
+    def set_price_frame(self, spf: StockPriceFrame):
+        self._spf = spf
+        self.clear()
+
+    @property
+    def spf(self) -> StockPriceFrame:
+        return self._spf
+
+    def clear(self):
+        self._values = {}
+        self._deps = {}
+        self._version = -1
+
+    @property
+    def nodes(self) -> Dict[NodeKey, Tuple[NodeKey, ...]]:
+        """
+        Các node đã tính ở phiên bản dữ liệu hiện tại và các node nguồn của chúng
+        """
+        return dict(self._deps)
+
+    @property
+    def hits(self) -> int:
+        """
+        Số lần một node được dùng lại thay vì tính lại
+        """
+        return self._hits
+
+    def __check_version(self):
+        if self._version != self._spf.version:
+            self._values = {}
+            self._deps = {}
+            self._version = self._spf.version
+
+    def node(self, key: NodeKey, compute: Callable[[], np.ndarray], deps: Tuple[NodeKey, ...] = ()) -> NodeKey:
+        self.__check_version()
+        if key in self._values:
+            self._hits += 1
+        else:
+            self._values[key] = compute()
+            self._deps[key] = tuple(deps)
+        return key
+
+    def value(self, key: NodeKey) -> np.ndarray:
+        self.__check_version()
+        return self._values[key]
+
+    def __getitem__(self, key: NodeKey) -> np.ndarray:
+        return self.value(key)
+
+    # Các node cơ bản
+
+    def column(self, name: str) -> NodeKey:
+        return self.node(('col', name), lambda: self._spf._price_frame[name].to_numpy(dtype=np.float64))
+
+    def apply(self, name: str, fn: Callable[..., np.ndarray], *srcs: NodeKey) -> NodeKey:
+        """
+        Node tính từng phần tử từ các node nguồn, name phải xác định duy nhất phép tính fn
+        """
+        def compute():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return fn(*[self.value(src) for src in srcs])
+        return self.node(('apply', name) + srcs, compute, srcs)
+
+    def shift(self, src: NodeKey, periods: int = 1) -> NodeKey:
+        return self.node(('shift', src, periods), lambda: self._spf.get_segments().shift(self.value(src), periods), (src,))
+
+    def diff(self, src: NodeKey, periods: int = 1) -> NodeKey:
+        shifted = self.shift(src, periods)
+        return self.node(('diff', src, periods), lambda: self.value(src) - self.value(shifted), (src, shifted))
+
+    def count(self, src: NodeKey) -> NodeKey:
+        """
+        Số giá trị khác NaN tính tới từng dòng, theo từng ticker
+        """
+        return self.node(('count', src), lambda: self._spf.get_segments().count(self.value(src)), (src,))
+
+    def ewm(self, src: NodeKey, span: float = None, alpha: float = None, min_periods: int = 0) -> NodeKey:
+        """
+        ewm(...).mean() theo ticker. Giá trị ewm không phụ thuộc min_periods (chỉ là che các dòng đầu),
+        nên các chỉ báo dùng cùng span với min_periods khác nhau vẫn dùng chung một lần tính
+        """
+        com = (span - 1) / 2.0 if alpha is None else 1.0 / alpha - 1.0
+        base = self.node(('ewm', src, com),
+                         lambda: self._spf.get_segments().ewm_mean(self.value(src), alpha=1.0 / (1.0 + com)), (src,))
+        if min_periods <= 1:
+            return base
+
+        count = self.count(src)
+        return self.node(('ewm', src, com, int(min_periods)),
+                         lambda: np.where(self.value(count) >= min_periods, self.value(base), np.nan), (base, count))
+
+    def __mean_std(self, src: NodeKey, window: int) -> Tuple[NodeKey, NodeKey]:
+        key = ('mean_std', src, int(window))
+        self.node(key, lambda: np.vstack(self._spf.get_segments().rolling_mean_std(self.value(src), window)), (src,))
+        mean = self.node(('mean', src, int(window)), lambda: self.value(key)[0], (key,))
+        std = self.node(('std', src, int(window)), lambda: self.value(key)[1], (key,))
+        return mean, std
+
+    def mean(self, src: NodeKey, window: int) -> NodeKey:
+        return self.__mean_std(src, window)[0]
+
+    def std(self, src: NodeKey, window: int) -> NodeKey:
+        return self.__mean_std(src, window)[1]
+
+    def mad(self, src: NodeKey, window: int) -> NodeKey:
+        mean = self.mean(src, window)
+        return self.node(('mad', src, int(window)),
+                         lambda: self._spf.get_segments().rolling_mad(self.value(src), window, mean=self.value(mean)), (src, mean))
+
+    def min(self, src: NodeKey, window: int) -> NodeKey:
+        return self.node(('min', src, int(window)), lambda: self._spf.get_segments().rolling_min(self.value(src), window), (src,))
+
+    def max(self, src: NodeKey, window: int) -> NodeKey:
+        return self.node(('max', src, int(window)), lambda: self._spf.get_segments().rolling_max(self.value(src), window), (src,))
+
+    def min_max(self, src: NodeKey, window: int) -> Tuple[NodeKey, NodeKey]:
+        key = ('min_max', src, int(window))
+        self.node(key, lambda: np.vstack(self._spf.get_segments().rolling_min_max(self.value(src), window)), (src,))
+        low = self.node(('min', src, int(window)), lambda: self.value(key)[0], (key,))
+        high = self.node(('max', src, int(window)), lambda: self.value(key)[1], (key,))
+        return low, high
@@ -0,0 +1,206 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from viiquant.stock_price_frame import StockPriceFrame
+
+
+# Các cột giá mà chỉ báo cần, chép một lần vào shared memory cho mọi process con
+INPUT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Dưới số dòng này chi phí gửi việc sang process con lớn hơn phần tính được chia ra
+MIN_ROWS = 200000
+
+
+def available_cpus() -> int:
+    """
+    Số CPU process này được phép dùng (theo affinity nếu hệ điều hành hỗ trợ)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def output_columns(params: dict) -> List[str]:
+    """
+    Các cột kết quả của một chỉ báo: mọi tham số *_col có giá trị (vd. bb_width_col = None thì không có cột bbw)
+    """
+    return [v for k, v in params.items() if k.endswith('_col') and v]
+
+
+def _run_shard(task: dict, inputs: memoryview, outputs: memoryview):
+    # Import ở đây: stock_indicator import module này
+    from viiquant.stock_indicator import StockIndicator
+
+    n = task['rows']
+    start, end = task['start'], task['end']
+    data = np.ndarray((len(INPUT_COLUMNS), n), dtype=np.float64, buffer=inputs)
+    ts = np.ndarray(n, dtype=np.int64, buffer=inputs, offset=data.nbytes)
+    out = np.ndarray((task['slots'], n), dtype=np.float64, buffer=outputs)
+
+    # Dựng index từ codes: không phải factorize lại mảng tên ticker dài bằng số dòng
+    ts_levels, ts_codes = np.unique(ts[start:end], return_inverse=True)
+    ticker_codes = np.repeat(np.arange(len(task['tickers'])), task['lengths'])
+    index = pd.MultiIndex(levels=[pd.Index(task['tickers']), ts_levels], codes=[ticker_codes, ts_codes], names=['ticker', 'ts'])
+    frame = pd.DataFrame({col: data[i, start:end] for i, col in enumerate(INPUT_COLUMNS)}, index=index, copy=True)
+
+    # Mỗi (chỉ báo, cột) một hàng riêng trong outputs: chỉ báo sau ghi đè cùng tên cột không làm mất kết quả của chỉ báo trước
+    indicator = StockIndicator(StockPriceFrame.from_frame(frame))
+    slot = 0
+    for name, params in task['indicators']:
+        getattr(indicator, name)(**params)
+        for col in output_columns(params):
+            out[slot, start:end] = indicator._price_frame[col].to_numpy(dtype=np.float64)
+            slot += 1
+
+
+# Các khối shared memory process con đang gắn vào, giữ giữa các lần update (pool dùng lại khối khi đủ chỗ)
+_attached: Dict[str, SharedMemory] = {}
+
+
+def _attach(name: str) -> SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        shm = SharedMemory(name=name)
+        _attached[name] = shm
+    return shm
+
+
+def _compute_shard(task: dict):
+    # Bỏ các khối cũ mà pool đã thay bằng khối lớn hơn
+    for name in [name for name in _attached if name not in (task['inputs'], task['outputs'])]:
+        try:
+            _attached.pop(name).close()
+        except BufferError:
+            pass
+    _run_shard(task, _attach(task['inputs']).buf, _attach(task['outputs']).buf)
+
+
+class IndicatorPool:
+    """
+    Tính các chỉ báo của StockIndicator song song trên nhiều process, chia theo nhóm ticker liên tục
+    (mỗi chỉ báo độc lập giữa các ticker).
+
+    Giá (open/high/low/close/volume, ts) được chép một lần vào shared memory, mỗi process con đọc trực tiếp đoạn dòng
+    của nhóm ticker của nó và ghi kết quả vào một khối shared memory khác: không có DataFrame nào bị pickle qua lại,
+    chỉ có tên chỉ báo, tham số và danh sách ticker của từng nhóm
+    """
+
+    def __init__(self, max_workers: int = None, min_rows: int = MIN_ROWS):
+        # Không dùng nhiều process hơn số CPU: trên máy một CPU pool chỉ làm chậm (accepts luôn False)
+        cpus = available_cpus()
+        self._max_workers = min(max_workers, cpus) if max_workers else cpus
+        self._min_rows = min_rows
+        self._executor: ProcessPoolExecutor = None
+
+        # Khối đầu vào/kết quả được dùng lại giữa các lần compute, chỉ cấp lại khi khung giá lớn hơn
+        self._blocks: Dict[str, SharedMemory] = {}
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for key in list(self._blocks):
+            self.__release(key)
+
+    def __release(self, key: str):
+        shm = self._blocks.pop(key)
+        try:
+            shm.close()
+        except BufferError:
+            # Còn view trên buffer (vd. traceback của một lần compute lỗi): segment vẫn được unlink
+            pass
+        shm.unlink()
+
+    def __block(self, key: str, size: int) -> SharedMemory:
+        shm = self._blocks.get(key)
+        if shm is not None and shm.size >= size:
+            return shm
+        if shm is not None:
+            self.__release(key)
+        # Dư 25% để khung giá lớn dần theo từng nến không phải cấp lại khối mỗi lần
+        shm = SharedMemory(create=True, size=max(1, size + size // 4))
+        self._blocks[key] = shm
+        return shm
+
+    def accepts(self, spf: StockPriceFrame) -> bool:
+        """
+        Có đáng chia việc cho process con không: có ít nhất hai CPU (max_workers đã giới hạn theo số CPU),
+        đủ dòng và đủ ticker cho ít nhất hai nhóm
+        """
+        return self._max_workers > 1 and spf.row_count() >= self._min_rows and len(spf.get_group_indices()) > 1
+
+    def __shards(self, lengths: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Chia các ticker thành tối đa max_workers nhóm liên tục [ticker đầu, ticker cuối) có số dòng gần bằng nhau
+        """
+        bounds = np.r_[0, np.cumsum(lengths)]
+        n_shards = min(self._max_workers, len(lengths))
+        cuts = np.searchsorted(bounds, np.linspace(0, bounds[-1], n_shards + 1)[1:-1])
+        cuts = np.unique(np.r_[0, cuts, len(lengths)])
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    def compute(self, spf: StockPriceFrame, indicators: List[Tuple[str, dict]]) -> List[Dict[str, np.ndarray]]:
+        """
+        Tính các chỉ báo (tên phương thức của StockIndicator, tham số) trên toàn bộ khung giá.
+        Trả về các cột kết quả của từng chỉ báo theo đúng thứ tự, không ghi vào _price_frame
+        """
+        frame = spf._price_frame
+        positions = sorted(spf.get_group_indices().items(), key=lambda item: item[1][0])
+        n = frame.shape[0]
+        tickers = [ticker for ticker, _ in positions]
+        lengths = np.asarray([end - start for _, (start, end) in positions], dtype=np.int64)
+        columns = [output_columns(params) for _, params in indicators]
+        n_slots = sum(len(cols) for cols in columns)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+
+        inputs = self.__block('inputs', (len(INPUT_COLUMNS) + 1) * n * 8)
+        outputs = self.__block('outputs', n_slots * n * 8)
+
+        data = np.ndarray((len(INPUT_COLUMNS), n), dtype=np.float64, buffer=inputs.buf)
+        for i, col in enumerate(INPUT_COLUMNS):
+            data[i] = frame[col].to_numpy(dtype=np.float64)
+        ts = np.ndarray(n, dtype=np.int64, buffer=inputs.buf, offset=data.nbytes)
+        ts[:] = frame.index.levels[1].values[frame.index.codes[1]]
+        del data, ts
+
+        bounds = np.r_[0, np.cumsum(lengths)]
+        tasks = []
+        for first, last in self.__shards(lengths):
+            tasks.append({
+                'inputs': inputs.name,
+                'outputs': outputs.name,
+                'rows': n,
+                'slots': n_slots,
+                'start': int(bounds[first]),
+                'end': int(bounds[last]),
+                'tickers': tickers[first:last],
+                'lengths': lengths[first:last],
+                'indicators': indicators
+            })
+        # Lỗi của một nhóm được ném lại ở đây (cùng traceback của process con)
+        list(self._executor.map(_compute_shard, tasks))
+
+        out = np.ndarray((n_slots, n), dtype=np.float64, buffer=outputs.buf)
+        results = []
+        slot = 0
+        for cols in columns:
+            results.append({col: out[slot + j].copy() for j, col in enumerate(cols)})
+            slot += len(cols)
+        del out
+
+        return results
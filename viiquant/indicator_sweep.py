@@ -0,0 +1,196 @@
+import numpy as np
+
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+from viiquant.indicator_graph import IndicatorGraph
+
+
+class SweepResult:
+    """
+    Kết quả quét tham số của một chỉ báo: values[ticker, time, param].
+    Trục time là hợp các ts của mọi ticker (sắp xếp tăng dần), ô không có nến của ticker là NaN.
+    params[j] là bộ tham số của values[:, :, j]
+    """
+
+    def __init__(self, name: str, params: List[dict], values: np.ndarray, tickers: List[str], ts: np.ndarray):
+        self._name = name
+        self._params = params
+        self._values = values
+        self._tickers = tickers
+        self._ts = ts
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def params(self) -> List[dict]:
+        return self._params
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def tickers(self) -> List[str]:
+        return self._tickers
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self._values.shape
+
+    def index(self, **params) -> int:
+        """
+        Vị trí trên trục param của biến thể khớp các tham số đã cho
+        """
+        for j, variant in enumerate(self._params):
+            if all(variant.get(k) == v for k, v in params.items()):
+                return j
+        raise KeyError(f"No {self._name} variant with {params}")
+
+    def get(self, ticker: str = None, **params) -> np.ndarray:
+        """
+        Ma trận (ticker x time) của một biến thể tham số, hoặc chuỗi theo time của một ticker
+        """
+        j = self.index(**params)
+        if ticker is None:
+            return self._values[:, :, j]
+        return self._values[self._tickers.index(ticker), :, j]
+
+
+class IndicatorSweep:
+    """
+    Tính nhiều biến thể tham số của một chỉ báo trong một lượt, kết quả là mảng 3 chiều (SweepResult),
+    không thêm cột nào vào _price_frame.
+
+    Các node không phụ thuộc tham số (close, diff, gain/loss, ewm của close) lấy từ IndicatorGraph của StockIndicator
+    nên dùng chung với các chỉ báo đã đăng ký. Phần phụ thuộc tham số được tính chung khi có thể: mọi period của rolling
+    mean/std dùng một lần cộng dồn, signal của mọi cặp MACD tính trong một lần gọi ewm. Giá trị trung gian của từng
+    biến thể không được giữ lại sau khi ghi vào kết quả
+    """
+
+    def __init__(self, indicator: 'StockIndicator', dtype: np.dtype = np.float64):
+        self._indicator = indicator
+        self._dtype = np.dtype(dtype)
+
+    @property
+    def graph(self) -> IndicatorGraph:
+        return self._indicator.graph
+
+    def __result(self, name: str, params: List[dict]) -> Tuple[SweepResult, np.ndarray, object]:
+        """
+        SweepResult rỗng (NaN), mảng (param, ticker x time) cùng bộ nhớ với values và vị trí trong đó của từng dòng _price_frame.
+        values được cấp phát theo thứ tự param trước nên mỗi biến thể ghi vào một vùng liên tục
+        """
+        spf = self.graph.spf
+        index = spf._price_frame.index
+        segments = spf.get_segments()
+
+        ts, time_index = np.unique(index.levels[1].values[index.codes[1]], return_inverse=True)
+        n_tickers = len(segments.lengths)
+        planes = np.full((len(params), n_tickers * len(ts)), np.nan, dtype=self._dtype)
+        values = planes.reshape(len(params), n_tickers, len(ts)).transpose(1, 2, 0)
+
+        rows = segments.keys * len(ts) + time_index
+        if len(rows) == planes.shape[1]:
+            # Mọi ticker có đủ nến ở mọi ts: các dòng của _price_frame đúng thứ tự trong mỗi mặt phẳng
+            rows = slice(None)
+        result = SweepResult(name, params, values, list(spf.get_group_indices().keys()), ts)
+        return result, planes, rows
+
+    def RSI(self, periods: Iterable[int] = range(5, 31), ewm: bool = True) -> SweepResult:
+        periods = [int(p) for p in periods]
+        g = self.graph
+        segments = g.spf.get_segments()
+        gain, loss = self._indicator._gain_loss()
+        result, planes, rows = self.__result('rsi', [{'period': p} for p in periods])
+
+        if ewm == True:
+            averages = ((segments.ewm_mean(g[gain], span=p, min_periods=p),
+                         segments.ewm_mean(g[loss], span=p, min_periods=p)) for p in periods)
+        else:
+            # Trung bình trượt của mọi period lấy từ cùng một lần cộng dồn gain (loss)
+            averages = ((up, down) for (up, _), (down, _) in zip(segments.rolling_mean_std_many(g[gain], periods),
+                                                                   segments.rolling_mean_std_many(g[loss], periods)))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, (up, down) in enumerate(averages):
+                planes[j, rows] = 100 - (100 / (1 + up / down))
+        return result
+
+    def MACD(self, fast_periods: Iterable[int] = range(8, 17, 2), slow_periods: Iterable[int] = range(20, 33, 3),
+             signal_periods: Iterable[int] = (9,), output: str = 'macd') -> SweepResult:
+        """
+        Lưới fast x slow x signal (bỏ các cặp fast >= slow). output: 'macd', 'signal' hoặc 'histogram' (macd - signal)
+        """
+        if output not in ['macd', 'signal', 'histogram']:
+            raise ValueError(f"Unknown MACD output '{output}'")
+
+        signal_periods = [int(p) for p in signal_periods]
+        pairs = [(int(f), int(s)) for f in fast_periods for s in slow_periods if f < s]
+        g = self.graph
+        segments = g.spf.get_segments()
+        result, planes, rows = self.__result(f"macd_{output}", [
+            {'fast_period': f, 'slow_period': s, 'macd_signal_period': sp} for f, s in pairs for sp in signal_periods
+        ])
+
+        # ewm của close cho từng span là node của graph: dùng chung với MACD/EMA đã đăng ký
+        close = g.column('close')
+        spans = sorted(set(p for pair in pairs for p in pair))
+        ma = {p: g[g.ewm(close, span=p, min_periods=p)] for p in spans}
+
+        macd = np.empty((len(pairs), len(g[close])))
+        for i, (f, s) in enumerate(pairs):
+            np.subtract(ma[f], ma[s], out=macd[i])
+
+        # Các cặp (fast, slow) nối tiếp nhau như các ticker riêng: signal của mọi cặp trong một lần gọi ewm
+        tiled = segments.tile(len(pairs))
+        for k, sp in enumerate(signal_periods):
+            signal = None if output == 'macd' else tiled.ewm_mean(macd.ravel(), span=sp, min_periods=sp).reshape(macd.shape)
+            for i in range(len(pairs)):
+                if output == 'macd':
+                    values = macd[i]
+                elif output == 'signal':
+                    values = signal[i]
+                else:
+                    values = macd[i] - signal[i]
+                planes[i * len(signal_periods) + k, rows] = values
+        return result
+
+    def BOLLINGER_BANDS(self, periods: Iterable[int] = (20,), sigma_widths: Iterable[float] = (1.5, 2, 2.5, 3),
+                        output: str = 'upper') -> SweepResult:
+        """
+        Lưới period x sigma_width. output: 'upper', 'lower', 'width' ((upper - lower) / sma * 100) hoặc 'percent_b'
+        """
+        if output not in ['upper', 'lower', 'width', 'percent_b']:
+            raise ValueError(f"Unknown BOLLINGER_BANDS output '{output}'")
+
+        periods = [int(p) for p in periods]
+        sigma_widths = list(sigma_widths)
+        g = self.graph
+        segments = g.spf.get_segments()
+        result, planes, rows = self.__result(f"bb_{output}", [
+            {'period': p, 'sigma_width': w} for p in periods for w in sigma_widths
+        ])
+
+        close = g[g.column('close')]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Mean/std của mọi period từ cùng một lần cộng dồn, các sigma_width chỉ là phép nhân
+            for i, (sma, sigma) in enumerate(segments.rolling_mean_std_many(close, periods)):
+                for k, width in enumerate(sigma_widths):
+                    if output == 'upper':
+                        values = sma + width * sigma
+                    elif output == 'lower':
+                        values = sma - width * sigma
+                    elif output == 'width':
+                        values = 2 * width * sigma / sma * 100
+                    else:
+                        values = (close - (sma - width * sigma)) / (2 * width * sigma)
+                    planes[i * len(sigma_widths) + k, rows] = values
+        return result
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+from typing import Iterable
+
+from viiquant.constant import TIMEZONE
+
+
+# Các cột của một khung dữ liệu giá
+FRAME_COLUMNS = ['ticker', 'ts', 'datetime', 'open', 'high', 'low', 'close', 'volume']
+
+
+def timestamp_to_datetime(ts: np.ndarray) -> np.ndarray:
+    """
+    Epoch seconds -> naive datetime64 theo giờ Việt Nam, chuyển múi giờ cho cả mảng một lần
+    """
+    return pd.to_datetime(ts, unit='s', utc=True).tz_convert(TIMEZONE).tz_localize(None).values
+
+
+def datetime_to_timestamp(local_dt: np.ndarray) -> np.ndarray:
+    """
+    Naive datetime64 theo giờ Việt Nam -> epoch seconds
+    """
+    utc = pd.DatetimeIndex(local_dt).tz_localize(TIMEZONE).tz_convert('UTC').tz_localize(None)
+    return utc.values.astype('datetime64[s]').astype(np.int64)
+
+
+def build_frame(ticker: str, ts: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                volume: np.ndarray, datetime: np.ndarray = None) -> pd.DataFrame:
+    """
+    Build a price DataFrame (FRAME_COLUMNS) straight from column arrays
+    """
+    if datetime is None:
+        datetime = timestamp_to_datetime(ts)
+
+    return pd.DataFrame({
+        'ticker': np.full(len(ts), ticker, dtype=object),
+        'ts': ts,
+        'datetime': datetime,
+        'open': open,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    }, columns=FRAME_COLUMNS)
+
+
+def empty_frame() -> pd.DataFrame:
+    return build_frame('', np.empty(0, dtype=np.int64), *[np.empty(0, dtype=np.float64)] * 4, np.empty(0, dtype=np.int64))
+
+
+def concat_frames(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    frames = [df for df in chunks if df.shape[0] > 0]
+    if len(frames) == 0:
+        return empty_frame()
+    if len(frames) == 1:
+        return frames[0]
+
+    df = pd.concat(frames, ignore_index=True)
+    if not df['ts'].is_monotonic_increasing:
+        df = df.sort_values('ts', kind='stable', ignore_index=True)
+    return df
+
+
+def frame_to_rows(df: pd.DataFrame) -> List[dict]:
+    """
+    Chuyển DataFrame về dạng list[dict] cũ (datetime là chuỗi '%Y-%m-%d %H:%M:%S')
+    """
+    if df.shape[0] == 0:
+        return []
+    return df.assign(datetime=df['datetime'].dt.strftime('%Y-%m-%d %H:%M:%S')).to_dict(orient='records')
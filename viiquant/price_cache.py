@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+import os
+import sqlite3
+import threading
+
+from typing import List
+from typing import Tuple
+from typing import Dict
+
+
+# Khoá của một chuỗi dữ liệu trong cache: (provider, ticker, bar_size, bar_type)
+CacheKey = Tuple[str, str, int, str]
+
+
+class PriceCache:
+    """
+    On-disk OHLCV cache backed by SQLite.
+    Bars are stored per (provider, ticker, bar_size, bar_type), together with the time ranges already fetched,
+    so only the missing ranges have to be requested from the provider.
+    """
+
+    COLUMNS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, path: str):
+        self._path = path
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+    def create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    provider TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    bar_size INTEGER NOT NULL,
+                    bar_type TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    PRIMARY KEY (provider, ticker, bar_size, bar_type, ts)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    provider TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    bar_size INTEGER NOT NULL,
+                    bar_type TEXT NOT NULL,
+                    start_ts INTEGER NOT NULL,
+                    end_ts INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS coverage_key
+                ON coverage (provider, ticker, bar_size, bar_type, start_ts)
+            """)
+
+    def get_coverage(self, key: CacheKey) -> List[Tuple[int, int]]:
+        """
+        Các khoảng thời gian [start_ts, end_ts] (inclusive) đã có trong cache, đã sắp xếp và không chồng lên nhau
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT start_ts, end_ts FROM coverage
+                WHERE provider=? AND ticker=? AND bar_size=? AND bar_type=?
+                ORDER BY start_ts
+            """, key).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def missing_ranges(self, key: CacheKey, start_ts: int, end_ts: int) -> List[Tuple[int, int]]:
+        """
+        Các khoảng con của [start_ts, end_ts] chưa có trong cache
+        """
+        missing = []
+        cursor = start_ts
+        for (a, b) in self.get_coverage(key):
+            if b < cursor:
+                continue
+            if a > end_ts:
+                break
+            if a > cursor:
+                missing.append((cursor, a - 1))
+            cursor = max(cursor, b + 1)
+            if cursor > end_ts:
+                break
+
+        if cursor <= end_ts:
+            missing.append((cursor, end_ts))
+
+        return missing
+
+    def add_coverage(self, key: CacheKey, start_ts: int, end_ts: int):
+        """
+        Ghi nhận [start_ts, end_ts] đã được lấy đầy đủ, gộp với các khoảng liền kề/chồng lên
+        """
+        if end_ts < start_ts:
+            return
+
+        with self._lock, self._conn:
+            rows = self._conn.execute("""
+                SELECT start_ts, end_ts FROM coverage
+                WHERE provider=? AND ticker=? AND bar_size=? AND bar_type=?
+                  AND start_ts <= ? AND end_ts >= ?
+            """, (*key, end_ts + 1, start_ts - 1)).fetchall()
+
+            for (a, b) in rows:
+                start_ts = min(start_ts, a)
+                end_ts = max(end_ts, b)
+
+            self._conn.execute("""
+                DELETE FROM coverage
+                WHERE provider=? AND ticker=? AND bar_size=? AND bar_type=?
+                  AND start_ts >= ? AND end_ts <= ?
+            """, (*key, start_ts, end_ts))
+            self._conn.execute("""
+                INSERT INTO coverage (provider, ticker, bar_size, bar_type, start_ts, end_ts)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (*key, start_ts, end_ts))
+
+    def put_frame(self, key: CacheKey, df: pd.DataFrame):
+        if df.shape[0] == 0:
+            return
+
+        columns = [df[c].tolist() for c in self.COLUMNS]
+        values = [(*key, *row) for row in zip(*columns)]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO bars (provider, ticker, bar_size, bar_type, ts, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, values)
+
+    def get_columns(self, key: CacheKey, start_ts: int, end_ts: int) -> Dict[str, np.ndarray]:
+        """
+        Các cột ts/open/high/low/close/volume (mảng NumPy) của khoảng [start_ts, end_ts], sắp xếp theo ts
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT ts, open, high, low, close, volume FROM bars
+                WHERE provider=? AND ticker=? AND bar_size=? AND bar_type=? AND ts BETWEEN ? AND ?
+                ORDER BY ts
+            """, (*key, start_ts, end_ts)).fetchall()
+
+        block = np.array(rows, dtype=np.float64).reshape(len(rows), len(self.COLUMNS))
+        columns = {c: block[:, i] for i, c in enumerate(self.COLUMNS)}
+        columns['ts'] = columns['ts'].astype(np.int64)
+        columns['volume'] = columns['volume'].astype(np.int64)
+
+        return columns
+
+    def clear(self, key: CacheKey = None):
+        with self._lock, self._conn:
+            if key is None:
+                self._conn.execute("DELETE FROM bars")
+                self._conn.execute("DELETE FROM coverage")
+            else:
+                where = "provider=? AND ticker=? AND bar_size=? AND bar_type=?"
+                self._conn.execute(f"DELETE FROM bars WHERE {where}", key)
+                self._conn.execute(f"DELETE FROM coverage WHERE {where}", key)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
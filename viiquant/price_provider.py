@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+from datetime import datetime as dt
+
+from typing import List
+from typing import Dict
+from typing import Tuple
+from typing import Iterator
+from typing import Optional
+
+from viiquant.http_client import HttpClient
+from viiquant.exceptions import DataProviderError
+from viiquant.exceptions import ProviderResponseError
+from viiquant.ohlcv import build_frame
+from viiquant.ohlcv import empty_frame
+from viiquant.ohlcv import concat_frames
+from viiquant.ohlcv import datetime_to_timestamp
+
+
+class PriceProvider:
+    """
+    Base class of a price backend. Each provider declares what it can serve:
+    the bar types of its history (bar_types) and whether it has a live price board (supports_quotes).
+    """
+
+    name: str = ''
+    bar_types: Tuple[str, ...] = ()
+    supports_quotes: bool = False
+
+    def supports(self, capability: str) -> bool:
+        """
+        capability: một bar_type ('m', 'H', 'D') hoặc 'quotes'
+        """
+        if capability == 'quotes':
+            return self.supports_quotes
+        return capability in self.bar_types
+
+    def iter_history(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> Iterator[pd.DataFrame]:
+        """
+        Yield the bars of [from_ts, to_ts] as FRAME_COLUMNS DataFrame chunks
+        """
+        raise DataProviderError(f"History is not supported", provider=self.name)
+
+    def get_history(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> pd.DataFrame:
+        return concat_frames(self.iter_history(ticker, from_ts, to_ts, bar_size, bar_type))
+
+    def poll_since(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'm') -> Tuple[pd.DataFrame, dict]:
+        """
+        Các nến từ from_ts, kèm thông tin của response: {'bytes': số bytes,
+        'prev_time': ts của nến gần nhất trước from_ts khi không có nến nào, 0 nếu provider không cho biết}
+        """
+        df = self.get_history(ticker, from_ts, to_ts, bar_size, bar_type)
+        return df, {'bytes': 0, 'prev_time': 0}
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[dict]]:
+        raise DataProviderError(f"Quotes are not supported", provider=self.name)
+
+
+class VNDirectProvider(PriceProvider):
+
+    name = 'vndirect'
+    bar_types = ('D',)
+
+    def __init__(self, http: HttpClient, root_uri: str = "https://finfo-api.vndirect.com.vn/v4/stock_prices/", page_size: int = 500):
+        self._http = http
+        self.ROOT_URI = root_uri
+        self._page_size = page_size
+
+    def iter_history(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> Iterator[pd.DataFrame]:
+        """
+        Lấy dữ liệu VNDirect theo từng trang (sắp xếp tăng dần theo ngày), mỗi trang được parse và trả về ngay
+        """
+        _start = dt.fromtimestamp(from_ts)
+        _end = dt.fromtimestamp(to_ts)
+
+        query = 'code:' + ticker + '~date:gte:' + _start.strftime('%Y-%m-%d') + '~date:lte:' + _end.strftime('%Y-%m-%d')
+        delta = _end - _start
+        _params = {
+            "sort": "date",
+            "size": min(self._page_size, delta.days + 1),
+            "page": 1,
+            "q": query
+        }
+
+        while True:
+            json_data = self._http.get_json(self.ROOT_URI, params=_params, provider=self.name)
+            if not isinstance(json_data, dict) or 'data' not in json_data:
+                raise ProviderResponseError("Missing 'data' in response", provider=self.name, url=self.ROOT_URI)
+
+            records = json_data['data']
+            if len(records) > 0:
+                yield self.parse_records(ticker, records)
+
+            # Dừng khi đã tới trang cuối (totalPages nếu API có trả về, nếu không thì trang thiếu)
+            total_pages = json_data.get('totalPages')
+            if total_pages is not None:
+                if _params['page'] >= total_pages:
+                    break
+            elif len(records) < _params['size']:
+                break
+
+            _params['page'] += 1
+
+    def parse_records(self, ticker: str, records: List[dict]) -> pd.DataFrame:
+        """
+        VNDirect trả về danh sách record, chuyển thẳng sang các cột và parse ngày giờ một lần cho cả cột
+        """
+        if len(records) == 0:
+            return empty_frame()
+
+        raw = pd.DataFrame.from_records(records, columns=['date', 'time', 'open', 'high', 'low', 'close', 'nmVolume'])
+        local_dt = pd.to_datetime(raw['date'] + ' ' + raw['time'], format='%Y-%m-%d %H:%M:%S')
+        ts = datetime_to_timestamp(local_dt.values)
+
+        df = build_frame(ticker, ts, raw['open'].values, raw['high'].values, raw['low'].values,
+                         raw['close'].values, raw['nmVolume'].values, datetime=local_dt.values)
+
+        return df.sort_values('ts', kind='stable', ignore_index=True)
+
+
+class EntradeProvider(PriceProvider):
+
+    name = 'entrade'
+    bar_types = ('m', 'H', 'D')
+
+    def __init__(self, http: HttpClient, root_uri: str = "https://services.entrade.com.vn/chart-api/v2/ohlcs/", ticker_type: str = 'stock'):
+        self._http = http
+        self.ROOT_URI = root_uri
+        self._ticker_type = ticker_type
+
+    def iter_history(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> Iterator[pd.DataFrame]:
+        json_data, _ = self.request(ticker, from_ts, to_ts, bar_size, bar_type)
+        yield self.parse_arrays(ticker, json_data)
+
+    def poll_since(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'm') -> Tuple[pd.DataFrame, dict]:
+        json_data, nbytes = self.request(ticker, from_ts, to_ts, bar_size, bar_type)
+
+        # Kiểu UDF: response no_data chỉ có nextTime = thời điểm của nến gần nhất TRƯỚC khoảng được hỏi
+        # (không phải thời điểm sẽ có nến mới)
+        prev_time = json_data.get('nextTime') or 0
+        if prev_time > 10**12:
+            prev_time = prev_time // 1000
+
+        return self.parse_arrays(ticker, json_data), {'bytes': nbytes, 'prev_time': prev_time}
+
+    def request(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> Tuple[dict, int]:
+        """
+        Gọi API Entrade, trả về (json, số bytes của response)
+        """
+        resolution = ''
+
+        if bar_type == 'H':
+            resolution = '1H'
+        elif bar_type == 'D':
+            resolution = '1D'
+        else:
+            resolution = bar_size
+
+        url = f"{self.ROOT_URI}{self._ticker_type}"
+        _params = {
+            'from': from_ts,
+            'to': to_ts,
+            'symbol': ticker,
+            'resolution': resolution
+        }
+
+        json_data, nbytes = self._http.get_json_with_size(url, params=_params, provider=self.name)
+        if not isinstance(json_data, dict):
+            raise ProviderResponseError("Expected a JSON object", provider=self.name, url=url)
+
+        return json_data, nbytes
+
+    def parse_arrays(self, ticker: str, json_data: dict) -> pd.DataFrame:
+        """
+        Entrade trả về các mảng song song t/o/h/l/c/v: chuyển thẳng thành mảng NumPy, không tạo dict cho từng nến
+        """
+        if not {'t', 'o', 'h', 'l', 'c', 'v'}.issubset(json_data.keys()):
+            # Không có nến nào trong khoảng thời gian: API chỉ trả về nextTime (nến gần nhất trước khoảng đó)
+            if 'nextTime' in json_data:
+                return empty_frame()
+            raise ProviderResponseError("Missing OHLCV arrays in response", provider=self.name, url=self.ROOT_URI)
+
+        return build_frame(
+                    ticker,
+                    np.asarray(json_data['t'], dtype=np.int64),
+                    np.asarray(json_data['o'], dtype=np.float64),
+                    np.asarray(json_data['h'], dtype=np.float64),
+                    np.asarray(json_data['l'], dtype=np.float64),
+                    np.asarray(json_data['c'], dtype=np.float64),
+                    np.asarray(json_data['v'], dtype=np.int64))
+
+
+class VPSProvider(PriceProvider):
+
+    name = 'vps'
+    supports_quotes = True
+
+    def __init__(self, http: HttpClient, root_uri: str = "https://bgapidatafeed.vps.com.vn/getliststockdata/"):
+        self._http = http
+        self.ROOT_URI = root_uri
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[dict]]:
+        url = f"{self.ROOT_URI}{','.join(tickers)}"
+
+        data = dict.fromkeys(tickers)
+        json_data = self._http.get_json(url, provider=self.name)
+        if not isinstance(json_data, list):
+            raise ProviderResponseError("Expected a list of quotes", provider=self.name, url=url)
+
+        for item in json_data:
+            data[item['sym']] = item
+
+        return data
+
+
+class ReplayProvider(PriceProvider):
+    """
+    Local provider serving bars and quotes kept in memory (recorded earlier or generated), no network involved
+    """
+
+    name = 'replay'
+
+    def __init__(self, bar_types: Tuple[str, ...] = ('m', 'H', 'D'), supports_quotes: bool = True):
+        self.bar_types = bar_types
+        self.supports_quotes = supports_quotes
+
+        self._frames: Dict[Tuple[str, int, str], pd.DataFrame] = {}
+        self._quotes: Dict[str, dict] = {}
+
+    def add_frame(self, ticker: str, bar_size: int, bar_type: str, df: pd.DataFrame):
+        key = (ticker, 1 if bar_type == 'D' else int(bar_size), bar_type)
+        if key in self._frames:
+            df = concat_frames([self._frames[key], df]).drop_duplicates(subset='ts', keep='last', ignore_index=True)
+        self._frames[key] = df
+
+    def set_quotes(self, quotes: Dict[str, dict]):
+        self._quotes.update(quotes)
+
+    def iter_history(self, ticker: str, from_ts: int, to_ts: int, bar_size: int = 1, bar_type: str = 'D') -> Iterator[pd.DataFrame]:
+        key = (ticker, 1 if bar_type == 'D' else int(bar_size), bar_type)
+        df = self._frames.get(key)
+        if df is None:
+            yield empty_frame()
+            return
+
+        ts = df['ts'].values
+        yield df.iloc[np.searchsorted(ts, from_ts, side='left'):np.searchsorted(ts, to_ts, side='right')].reset_index(drop=True)
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[dict]]:
+        return {ticker: self._quotes.get(ticker) for ticker in tickers}
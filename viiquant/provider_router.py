@@ -0,0 +1,166 @@
+import numpy as np
+
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
+
+from typing import List
+from typing import Dict
+from typing import Callable
+from typing import Any
+
+from viiquant.price_provider import PriceProvider
+from viiquant.exceptions import DataProviderError
+
+
+class ProviderRouter:
+    """
+    Route each request to the providers able to serve it, in priority order.
+
+    Failover: when the primary raises a DataProviderError the next capable provider is tried.
+    Hedging: when the primary has not answered within its p95 latency budget, the same request is also sent
+    to the next capable provider and the first successful answer wins. When only one provider has the capability
+    (intraday bars: Entrade only), the hedge is a duplicate request to that provider (hedge_same_provider);
+    a duplicate is never sent on error, failover only moves to another provider.
+    """
+
+    def __init__(self, providers: List[PriceProvider], hedge: bool = True, hedge_quantile: float = 95,
+                 min_samples: int = 20, default_budget: float = 1.5, max_workers: int = 16, hedge_same_provider: bool = True):
+        self._providers = providers
+        self._hedge = hedge
+        self._hedge_same_provider = hedge_same_provider
+        self._hedge_quantile = hedge_quantile
+        self._min_samples = min_samples
+        self._default_budget = default_budget
+
+        # Độ trễ (giây) của các request thành công gần nhất theo từng provider
+        self._latencies: Dict[str, deque] = {p.name: deque(maxlen=200) for p in providers}
+        self._lock = threading.Lock()
+
+        # Pool riêng, tránh deadlock khi được gọi từ bên trong thread pool của DataStockPrice
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='router')
+
+        self.hedge_count = 0
+
+    @property
+    def providers(self) -> List[PriceProvider]:
+        return self._providers
+
+    def candidates(self, capability: str) -> List[PriceProvider]:
+        return [p for p in self._providers if p.supports(capability)]
+
+    def primary(self, capability: str) -> PriceProvider:
+        candidates = self.candidates(capability)
+        if len(candidates) == 0:
+            raise DataProviderError(f"No provider supports '{capability}'")
+        return candidates[0]
+
+    def get_provider(self, name: str) -> PriceProvider:
+        for p in self._providers:
+            if p.name == name:
+                return p
+        return None
+
+    def latency_budget(self, provider: PriceProvider) -> float:
+        """
+        p95 (hedge_quantile) độ trễ của provider, dùng giá trị mặc định khi chưa đủ mẫu
+        """
+        with self._lock:
+            samples = list(self._latencies.setdefault(provider.name, deque(maxlen=200)))
+        if len(samples) < self._min_samples:
+            return self._default_budget
+        return float(np.percentile(samples, self._hedge_quantile))
+
+    def latency_stats(self) -> Dict[str, dict]:
+        stats = {}
+        with self._lock:
+            for name, samples in self._latencies.items():
+                if len(samples) == 0:
+                    continue
+                arr = np.asarray(samples)
+                stats[name] = {'count': len(arr), 'p50': float(np.percentile(arr, 50)), 'p95': float(np.percentile(arr, 95))}
+        return stats
+
+    def __timed(self, provider: PriceProvider, fn: Callable[[PriceProvider], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn(provider)
+        with self._lock:
+            self._latencies.setdefault(provider.name, deque(maxlen=200)).append(time.perf_counter() - start)
+        return result
+
+    def call(self, capability: str, fn: Callable[[PriceProvider], Any]) -> Any:
+        """
+        Run fn(provider) on the best provider for capability, with hedging and failover
+        """
+        candidates = self.candidates(capability)
+        if len(candidates) == 0:
+            raise DataProviderError(f"No provider supports '{capability}'")
+
+        if not self._hedge or (len(candidates) == 1 and not self._hedge_same_provider):
+            return self.__call_sequential(candidates, fn)
+
+        if len(candidates) == 1:
+            # Một provider duy nhất: hedge bằng một request trùng tới chính nó, lỗi thì không gửi lại
+            return self.__call_hedged(candidates * 2, fn, failover=False)
+
+        return self.__call_hedged(candidates, fn)
+
+    def __call_sequential(self, candidates: List[PriceProvider], fn: Callable[[PriceProvider], Any]) -> Any:
+        last_error = None
+        for provider in candidates:
+            try:
+                return self.__timed(provider, fn)
+            except DataProviderError as err:
+                last_error = err
+        raise last_error
+
+    def __call_hedged(self, candidates: List[PriceProvider], fn: Callable[[PriceProvider], Any], failover: bool = True) -> Any:
+        pending: Dict[Future, PriceProvider] = {}
+        remaining = list(candidates)
+        last_error = None
+
+        primary = remaining.pop(0)
+        pending[self._executor.submit(self.__timed, primary, fn)] = primary
+        budget = self.latency_budget(primary)
+
+        while len(pending) > 0:
+            # Chỉ chờ trong budget khi còn provider dự phòng, hết budget thì gửi thêm request (hedge)
+            timeout = budget if len(remaining) > 0 else None
+            done, _ = wait(list(pending.keys()), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if len(done) == 0:
+                backup = remaining.pop(0)
+                pending[self._executor.submit(self.__timed, backup, fn)] = backup
+                with self._lock:
+                    self.hedge_count += 1
+                budget = self.latency_budget(backup)
+                continue
+
+            for future in done:
+                del pending[future]
+                try:
+                    result = future.result()
+                except DataProviderError as err:
+                    last_error = err
+                    continue
+
+                # Request còn lại vẫn chạy nền, kết quả của nó bị bỏ qua
+                for other in pending:
+                    other.cancel()
+                return result
+
+            # Provider vừa trả lỗi: chuyển ngay sang provider kế tiếp (failover)
+            if failover and len(pending) == 0 and len(remaining) > 0:
+                backup = remaining.pop(0)
+                pending[self._executor.submit(self.__timed, backup, fn)] = backup
+                budget = self.latency_budget(backup)
+
+        raise last_error
+
+    def close(self):
+        self._executor.shutdown(wait=False)
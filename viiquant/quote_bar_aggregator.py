@@ -0,0 +1,133 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from typing import List
+from typing import Dict
+from typing import Optional
+
+from viiquant.constant import TIMEZONE
+
+
+class QuoteBarAggregator:
+    """
+    Build OHLCV bars locally from successive snapshots of the VPS price board (DataStockPrice.get_market_quotes).
+    Price comes from 'lastPrice', volume from the increase of the cumulative 'lot' between two snapshots.
+
+    A bar is emitted once a snapshot taken after its end time arrives. Bars that were not observed from start
+    to end (first bar after start-up, missed polls, ...) are flagged as partial so they can be reconciled
+    with the provider's own bars.
+    """
+
+    def __init__(self, bar_size: int = 1, bar_type: str = 'm', volume_unit: int = 1, max_gap: float = None):
+        self._bar_seconds = int(bar_size) * (3600 if bar_type == 'H' else 60)
+        self._volume_unit = volume_unit
+
+        # Khoảng cách tối đa giữa hai snapshot liên tiếp, lớn hơn thì coi như đã lỡ poll
+        self._max_gap = max_gap if max_gap else self._bar_seconds / 2
+
+        # Nến đang hình thành và lot (khối lượng cộng dồn) gần nhất của từng ticker
+        self._bars: Dict[str, dict] = {}
+        self._last_lot: Dict[str, int] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._first_seen: Dict[str, float] = {}
+
+        self._partial: Dict[str, List[int]] = {}
+
+    @property
+    def bar_seconds(self) -> int:
+        return self._bar_seconds
+
+    def bucket_of(self, ts: float) -> int:
+        return int(ts // self._bar_seconds) * self._bar_seconds
+
+    def update(self, quotes: Dict[str, Optional[dict]], now_ts: float) -> Dict[str, List[dict]]:
+        """
+        Đưa một snapshot bảng giá vào bộ gom nến, trả về các nến đã đóng (dạng dict giống DataStockPrice.get_lastest_price_rows)
+        """
+        closed = self.flush(now_ts)
+        bucket = self.bucket_of(now_ts)
+
+        for ticker, quote in quotes.items():
+            if not quote:
+                continue
+
+            price = quote.get('lastPrice')
+            lot = quote.get('lot')
+            if price is None or lot is None or price <= 0:
+                continue
+
+            last_lot = self._last_lot.get(ticker)
+            last_seen = self._last_seen.get(ticker)
+            self._last_lot[ticker] = lot
+            self._last_seen[ticker] = now_ts
+
+            if last_lot is None:
+                self._first_seen[ticker] = now_ts
+                continue
+
+            missed = now_ts - last_seen > self._max_gap
+
+            # lot giảm nghĩa là đã sang phiên mới
+            volume = lot - last_lot if lot >= last_lot else lot
+            if volume <= 0:
+                continue
+
+            bar = self._bars.get(ticker)
+            if bar is None:
+                bar = {
+                    'ticker': ticker,
+                    'ts': bucket,
+                    'open': price,
+                    'high': price,
+                    'low': price,
+                    'close': price,
+                    'volume': 0,
+                    # Không quan sát được từ đầu nến (khởi động, lỡ poll, ...) thì nến chưa đầy đủ
+                    'partial': self._first_seen[ticker] > bucket or missed
+                }
+                self._bars[ticker] = bar
+            else:
+                bar['high'] = max(bar['high'], price)
+                bar['low'] = min(bar['low'], price)
+                bar['close'] = price
+                bar['partial'] = bar['partial'] or missed
+
+            bar['volume'] += volume * self._volume_unit
+
+        return closed
+
+    def flush(self, now_ts: float) -> Dict[str, List[dict]]:
+        """
+        Đóng các nến đã hết thời gian (bucket kết thúc trước now_ts)
+        """
+        bucket = self.bucket_of(now_ts)
+        closed: Dict[str, List[dict]] = {}
+
+        for ticker in list(self._bars.keys()):
+            bar = self._bars[ticker]
+            if bar['ts'] >= bucket:
+                continue
+
+            del self._bars[ticker]
+            if bar.pop('partial'):
+                self._partial.setdefault(ticker, []).append(bar['ts'])
+
+            bar['datetime'] = datetime.fromtimestamp(bar['ts'], tz=ZoneInfo(TIMEZONE)).strftime('%Y-%m-%d %H:%M:%S')
+            closed.setdefault(ticker, []).append(bar)
+
+        return closed
+
+    def pop_partial(self) -> Dict[str, List[int]]:
+        """
+        Lấy (và xoá) danh sách ts của các nến chưa đầy đủ cần đối chiếu lại với Entrade
+        """
+        partial = self._partial
+        self._partial = {}
+        return partial
+
+    def reset(self):
+        self._bars.clear()
+        self._last_lot.clear()
+        self._last_seen.clear()
+        self._first_seen.clear()
+        self._partial.clear()
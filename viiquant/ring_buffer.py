@@ -0,0 +1,354 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+from typing import Dict
+from typing import Any
+from typing import Union
+
+
+# Các cột cơ bản của một nến và kiểu dữ liệu trong ring buffer
+BAR_DTYPES: Dict[str, np.dtype] = {
+    'ts': np.dtype(np.int64),
+    'datetime': np.dtype('datetime64[ns]'),
+    'open': np.dtype(np.float64),
+    'high': np.dtype(np.float64),
+    'low': np.dtype(np.float64),
+    'close': np.dtype(np.float64),
+    'volume': np.dtype(np.int64)
+}
+
+
+# Schema gọn: giá dạng float32 (đủ chính xác cho giá cổ phiếu tính theo nghìn đồng)
+COMPACT_BAR_DTYPES: Dict[str, np.dtype] = dict(BAR_DTYPES, **{
+    'open': np.dtype(np.float32),
+    'high': np.dtype(np.float32),
+    'low': np.dtype(np.float32),
+    'close': np.dtype(np.float32)
+})
+
+
+def missing_value(dtype: np.dtype) -> Any:
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+    return 0
+
+
+class TickerRingBuffer:
+    """
+    Preallocated columnar ring buffer holding the last `capacity` bars of one ticker.
+
+    Mirrored layout (default): every value is written at position p and p + capacity, so the retained bars are
+    always one contiguous slice of each column and column() returns a view, never a copy. The price is 2x the
+    memory of every column (indicator columns included).
+    mirrored = False: each column holds exactly capacity values; column() is a view until the buffer wraps
+    around, then a copy of the two halves.
+    Appending a bar and reading the last (or n-th previous) bar are O(1).
+    """
+
+    def __init__(self, capacity: int, dtypes: Dict[str, np.dtype] = None, mirrored: bool = True):
+        self._capacity = int(capacity)
+        self._mirrored = mirrored
+        self._dtypes: Dict[str, np.dtype] = {}
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._missing: Dict[str, Any] = {}
+
+        # Vị trí ghi kế tiếp (trong [0, capacity)) và số nến đang giữ
+        self._head = 0
+        self._size = 0
+
+        for col, dtype in (dtypes if dtypes else BAR_DTYPES).items():
+            self.add_column(col, dtype)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def mirrored(self) -> bool:
+        return self._mirrored
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._buffers.keys())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+    def add_column(self, name: str, dtype: Union[np.dtype, str] = np.float64):
+        if name in self._buffers:
+            return
+        dtype = np.dtype(dtype)
+        buf = np.empty((2 if self._mirrored else 1) * self._capacity, dtype=dtype)
+        buf.fill(missing_value(dtype))
+        self._dtypes[name] = dtype
+        self._buffers[name] = buf
+        self._missing[name] = missing_value(dtype)
+
+    def __start(self) -> int:
+        return (self._head - self._size) % self._capacity
+
+    def __put(self, buf: np.ndarray, pos: Union[int, np.ndarray], values: Any):
+        buf[pos] = values
+        if self._mirrored:
+            buf[pos + self._capacity] = values
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Các giá trị của cột theo thứ tự thời gian: view (không copy), trừ khi mirrored = False và buffer đã quay vòng
+        """
+        start = self.__start()
+        buf = self._buffers[name]
+        if self._mirrored or start + self._size <= self._capacity:
+            return buf[start:start + self._size]
+        return np.concatenate([buf[start:], buf[:start + self._size - self._capacity]])
+
+    def set_values(self, columns: Dict[str, np.ndarray], offsets: np.ndarray = None):
+        """
+        Ghi đè giá trị của các cột (vd. cột chỉ báo): cả cột theo thứ tự thời gian, hoặc tại các vị trí offsets
+        (0 là nến cũ nhất đang giữ)
+        """
+        if offsets is None:
+            offsets = np.arange(self._size)
+        pos = (self.__start() + np.asarray(offsets, dtype=np.int64)) % self._capacity
+        for col, values in columns.items():
+            self.__put(self._buffers[col], pos, values)
+
+    def last_ts(self) -> int:
+        if self._size == 0:
+            return None
+        return int(self._buffers['ts'][(self._head - 1) % self._capacity])
+
+    def __write(self, pos: int, values: Dict[str, Any]):
+        # Ghi từng ô (không qua __put): đường nóng khi thêm từng nến
+        mirror = pos + self._capacity if self._mirrored else None
+        for col, buf in self._buffers.items():
+            v = values.get(col, self._missing[col])
+            buf[pos] = v
+            if mirror is not None:
+                buf[mirror] = v
+
+    def append(self, values: Dict[str, Any]):
+        """
+        Thêm một nến (dict theo tên cột). Nến trùng ts với nến cuối thì ghi đè, nến cũ hơn thì được chèn lại đúng thứ tự
+        """
+        ts = int(values['ts'])
+        last_ts = self.last_ts()
+        if last_ts is not None and ts <= last_ts:
+            if ts == last_ts:
+                self.__write((self._head - 1) % self._capacity, values)
+            else:
+                self.extend({col: np.asarray([values[col]]) for col in values if col in self._buffers})
+            return
+
+        self.__write(self._head, values)
+        self._head = (self._head + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def extend(self, columns: Dict[str, np.ndarray]):
+        """
+        Thêm nhiều nến dạng cột (đã sort theo ts). Chỉ giữ lại capacity nến mới nhất
+        """
+        ts = np.asarray(columns['ts'], dtype=np.int64)
+        n = len(ts)
+        if n == 0:
+            return
+
+        last_ts = self.last_ts()
+        if last_ts is not None and ts[0] <= last_ts:
+            # Có nến trùng/cũ hơn: gộp với dữ liệu hiện có rồi ghi lại toàn bộ
+            columns = self.__merge(columns)
+            ts = columns['ts']
+            n = len(ts)
+            self._head = 0
+            self._size = 0
+
+        keep = min(n, self._capacity)
+        pos = (self._head + np.arange(keep)) % self._capacity
+        for col, buf in self._buffers.items():
+            if col in columns:
+                values = np.asarray(columns[col])[n - keep:]
+            else:
+                values = missing_value(self._dtypes[col])
+            self.__put(buf, pos, values)
+
+        self._head = (self._head + keep) % self._capacity
+        self._size = min(self._size + keep, self._capacity)
+
+    def __merge(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        merged = {}
+        for col in self._buffers:
+            old = self.column(col)
+            new = np.asarray(columns[col]) if col in columns else np.full(len(columns['ts']), missing_value(self._dtypes[col]), dtype=self._dtypes[col])
+            merged[col] = np.concatenate([old, new.astype(self._dtypes[col], copy=False)])
+
+        # Sort ổn định theo ts, dòng mới (đứng sau) thắng khi trùng ts
+        order = np.argsort(merged['ts'], kind='stable')
+        ts = merged['ts'][order]
+        last = np.r_[ts[1:] != ts[:-1], True]
+        order = order[last]
+        return {col: values[order] for col, values in merged.items()}
+
+    def tail(self, n: int = 1) -> Dict[str, np.ndarray]:
+        """
+        n nến cuối (hoặc ít hơn nếu chưa đủ) dạng cột
+        """
+        k = min(n, self._size)
+        start = (self._head - k) % self._capacity
+        if self._mirrored or start + k <= self._capacity:
+            return {col: buf[start:start + k] for col, buf in self._buffers.items()}
+        return {col: self.column(col)[self._size - k:] for col in self._buffers}
+
+    def row(self, n: int = 1) -> dict:
+        """
+        Nến thứ n tính từ cuối (n = 1 là nến mới nhất), {} nếu không đủ dữ liệu
+        """
+        if n < 1 or n > self._size:
+            return {}
+        pos = (self._head - n) % self._capacity
+        return {col: buf[pos] for col, buf in self._buffers.items()}
+
+    def frame(self) -> pd.DataFrame:
+        """
+        DataFrame index theo ts, các cột là view trên buffer (không copy nếu mirrored)
+        """
+        index = pd.Index(self.column('ts'), name='ts', copy=False)
+        data = {col: self.column(col) for col in self._buffers if col != 'ts'}
+        return pd.DataFrame(data, index=index, copy=False)
+
+
+class RingBufferStore:
+    """
+    One TickerRingBuffer per ticker with a fixed retention (number of bars kept per ticker), so the memory
+    footprint stays bounded however long the session runs.
+    """
+
+    def __init__(self, retention: int = 10000, dtypes: Dict[str, np.dtype] = None, mirrored: bool = True):
+        self._retention = int(retention)
+        self._mirrored = mirrored
+        self._dtypes: Dict[str, np.dtype] = dict(dtypes if dtypes else BAR_DTYPES)
+        self._buffers: Dict[str, TickerRingBuffer] = {}
+
+    @property
+    def retention(self) -> int:
+        return self._retention
+
+    @property
+    def tickers(self) -> List[str]:
+        return sorted(self._buffers.keys())
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._dtypes.keys())
+
+    @property
+    def dtypes(self) -> Dict[str, np.dtype]:
+        return self._dtypes
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+    def buffer(self, ticker: str) -> TickerRingBuffer:
+        buf = self._buffers.get(ticker)
+        if buf is None:
+            buf = TickerRingBuffer(self._retention, self._dtypes, self._mirrored)
+            self._buffers[ticker] = buf
+        return buf
+
+    def add_column(self, name: str, dtype: Union[np.dtype, str] = np.float64):
+        self._dtypes.setdefault(name, np.dtype(dtype))
+        for buf in self._buffers.values():
+            buf.add_column(name, dtype)
+
+    def load_frame(self, df: pd.DataFrame):
+        """
+        Nạp một khung giá index (ticker, ts) đã sort, mỗi ticker chỉ giữ lại retention nến cuối
+        """
+        if df.shape[0] == 0:
+            return
+        flat = df.reset_index()
+        bounds = np.flatnonzero(np.r_[True, flat['ticker'].values[1:] != flat['ticker'].values[:-1], True])
+        for i in range(len(bounds) - 1):
+            lo, hi = bounds[i], bounds[i + 1]
+            ticker = flat['ticker'].values[lo]
+            self.buffer(ticker).extend({col: flat[col].values[lo:hi] for col in self._dtypes if col in flat.columns})
+
+    def append_rows(self, new_rows: Dict[str, List[dict]]):
+        for ticker in new_rows:
+            buf = self.buffer(ticker)
+            for item in new_rows[ticker]:
+                values = dict(item)
+                if 'datetime' in values:
+                    values['datetime'] = pd.Timestamp(values['datetime']).to_datetime64()
+                buf.append(values)
+
+    def previous_row_at(self, ticker: str, n: int = 1) -> dict:
+        buf = self._buffers.get(ticker)
+        if buf is None:
+            return {}
+        row = buf.row(n)
+        for col in row:
+            row[col] = pd.Timestamp(row[col]) if col == 'datetime' else row[col].item()
+        return row
+
+    def ticker_frame(self, ticker: str) -> pd.DataFrame:
+        return self.buffer(ticker).frame()
+
+    def nbytes_by_ticker(self) -> Dict[str, int]:
+        return {ticker: self._buffers[ticker].nbytes for ticker in self.tickers}
+
+    def nbytes_by_column(self) -> Dict[str, int]:
+        copies = 2 if self._mirrored else 1
+        return {col: sum(copies * buf.capacity * dtype.itemsize for buf in self._buffers.values()) for col, dtype in self._dtypes.items()}
+
+    def concat_column(self, name: str) -> np.ndarray:
+        """
+        Giá trị cột name của mọi ticker theo thứ tự của to_frame (ticker sort tăng dần, bỏ ticker rỗng), chỉ copy một cột
+        """
+        columns = [self._buffers[t].column(name) for t in self.tickers if self._buffers[t].size > 0]
+        if len(columns) == 0:
+            return np.empty(0, dtype=self._dtypes[name])
+        return np.concatenate(columns)
+
+    def tail_columns(self, n: int = 1) -> Dict[str, np.ndarray]:
+        """
+        n nến cuối của mỗi ticker (thứ tự như to_frame) dạng cột, kèm cột 'ticker'
+        """
+        tickers = [t for t in self.tickers if self._buffers[t].size > 0]
+        tails = [self._buffers[t].tail(n) for t in tickers]
+        columns = {'ticker': np.repeat(np.asarray(tickers, dtype=object), [len(tail['ts']) for tail in tails])}
+        for col, dtype in self._dtypes.items():
+            columns[col] = np.concatenate([tail[col] for tail in tails]) if len(tails) > 0 else np.empty(0, dtype=dtype)
+        return columns
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Ghép tất cả ticker thành một khung giá index (ticker, ts) như StockPriceFrame (có copy)
+        """
+        tickers = [t for t in self.tickers if self._buffers[t].size > 0]
+        if len(tickers) == 0:
+            index = pd.MultiIndex.from_arrays([[], np.empty(0, dtype=np.int64)], names=['ticker', 'ts'])
+            return pd.DataFrame({col: np.empty(0, dtype=dtype) for col, dtype in self._dtypes.items() if col != 'ts'}, index=index)
+
+        # Index dựng từ codes: không factorize lại mảng tên ticker dài bằng số dòng
+        sizes = [self._buffers[t].size for t in tickers]
+        ts_codes, ts_levels = pd.factorize(np.concatenate([self._buffers[t].column('ts') for t in tickers]), sort=True)
+        index = pd.MultiIndex(levels=[pd.Index(tickers, dtype=object), ts_levels],
+                              codes=[np.repeat(np.arange(len(tickers)), sizes), ts_codes],
+                              names=['ticker', 'ts'], verify_integrity=False)
+
+        data = {}
+        for col in self._dtypes:
+            if col == 'ts':
+                continue
+            data[col] = np.concatenate([self._buffers[t].column(col) for t in tickers])
+
+        return pd.DataFrame(data, index=index, copy=False)
@@ -0,0 +1,173 @@
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+
+# Số phần tử tối đa (dòng x window) của một khối cửa sổ tạm khi tính theo khối, ~8MB float64
+CHUNK_ELEMENTS = 1 << 20
+
+# Số cửa sổ tối thiểu của mỗi khối cộng dồn trong rolling_mean_std (khối ngắn: tổng tích luỹ nhỏ, sai số nhỏ)
+CHUNK_ROWS = 256
+
+
+def _valid_mask(values: np.ndarray, window: int, offsets: np.ndarray = None, nan_count: np.ndarray = None) -> np.ndarray:
+    """
+    Dòng có đủ window giá trị khác NaN (min_periods = window) và cửa sổ không vắt sang ticker trước (offsets: vị trí trong đoạn).
+    nan_count: số NaN cộng dồn (bắt đầu bằng 0) nếu đã có, dùng chung khi kiểm tra nhiều window
+    """
+    n = len(values)
+    valid = np.zeros(n, dtype=bool)
+    if n < window:
+        return valid
+
+    if nan_count is None:
+        nan_count = np.r_[0, np.cumsum(np.isnan(values))]
+    valid[window - 1:] = (nan_count[window:] - nan_count[:n - window + 1]) == 0
+    if offsets is not None:
+        valid &= offsets >= window - 1
+    return valid
+
+
+def _chunks(n_windows: int, window: int):
+    step = max(1, CHUNK_ELEMENTS // max(window, 1))
+    for lo in range(0, n_windows, step):
+        yield lo, min(lo + step, n_windows)
+
+
+def rolling_mean_std(values: np.ndarray, window: int, offsets: np.ndarray = None, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean và std của cửa sổ window trong một lượt O(n): tổng bậc một và bậc hai lấy từ hiệu hai tổng tích luỹ.
+    Mảng được chia thành các khối ngắn, mỗi khối trừ đi một giá trị tham chiếu của khối trước khi cộng dồn
+    nên tổng tích luỹ luôn nhỏ (không mất chính xác với giá lớn hoặc chuỗi dài)
+    """
+    return next(rolling_mean_std_many(values, [window], offsets, ddof))
+
+
+def rolling_mean_std_many(values: np.ndarray, windows: List[int], offsets: np.ndarray = None, ddof: int = 1) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Như rolling_mean_std cho nhiều độ dài cửa sổ, dùng chung một lần cộng dồn: khối được tính theo cửa sổ lớn nhất,
+    mỗi cửa sổ chỉ còn là hiệu hai cột của tổng tích luỹ. Kết quả được trả lần lượt theo windows (generator),
+    chỉ giữ trong bộ nhớ kết quả đang dùng
+    """
+    values = np.asarray(values, dtype=np.float64)
+    windows = [int(w) for w in windows]
+    n = len(values)
+    if n == 0:
+        for _ in windows:
+            yield np.full(n, np.nan), np.full(n, np.nan)
+        return
+
+    # Đệm trước max_window - 1 phần tử: cửa sổ kết thúc ở dòng e nằm trọn trong hàng e // chunk
+    max_window = max(windows)
+    chunk = max(CHUNK_ROWS, 4 * max_window)
+    n_chunks = -(-n // chunk)
+    padded = np.zeros(n_chunks * chunk + 2 * (max_window - 1))
+    padded[max_window - 1:max_window - 1 + n] = values
+
+    # Mỗi hàng: các giá trị cần cho chunk cửa sổ liên tiếp (view, các hàng chồng lên nhau max_window - 1 phần tử)
+    rows = sliding_window_view(padded, chunk + max_window - 1)[:n_chunks * chunk:chunk]
+    ref = rows[:, max_window - 1].copy()
+    missing = np.isnan(ref)
+    if missing.any():
+        with np.errstate(invalid='ignore'):
+            ref[missing] = np.nan_to_num(np.nanmean(rows[missing], axis=1))
+
+    d = rows - ref[:, None]
+    d[np.isnan(d)] = 0          # dòng có NaN trong cửa sổ bị che ở cuối
+    c1 = np.zeros((n_chunks, d.shape[1] + 1))
+    c2 = np.zeros((n_chunks, d.shape[1] + 1))
+    np.cumsum(d, axis=1, out=c1[:, 1:])
+    np.cumsum(d * d, axis=1, out=c2[:, 1:])
+    base = np.repeat(ref, chunk)[:n]
+    nan_count = np.r_[0, np.cumsum(np.isnan(values))]
+
+    for window in windows:
+        lo = max_window - window
+        s1 = (c1[:, max_window:max_window + chunk] - c1[:, lo:lo + chunk]).ravel()[:n]
+        s2 = (c2[:, max_window:max_window + chunk] - c2[:, lo:lo + chunk]).ravel()[:n]
+        mean = base + s1 / window
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.maximum((s2 - s1 * s1 / window) / (window - ddof), 0))
+
+        invalid = ~_valid_mask(values, window, offsets, nan_count)
+        mean[invalid] = np.nan
+        std[invalid] = np.nan
+        yield mean, std
+
+
+def rolling_mad(values: np.ndarray, window: int, offsets: np.ndarray = None, mean: np.ndarray = None) -> np.ndarray:
+    """
+    Mean absolute deviation (trung bình |x - mean| của cửa sổ), thay cho rolling(...).apply(lambda z: pd.Series(z).mad()).
+    Có thể truyền sẵn mean (vd. từ rolling_mean_std) để khỏi tính lại
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mad = np.full(n, np.nan)
+    if n < window:
+        return mad
+
+    if mean is None:
+        mean = rolling_mean_std(values, window, offsets)[0]
+
+    windows = sliding_window_view(values, window)
+    for lo, hi in _chunks(len(windows), window):
+        center = mean[window - 1 + lo:window - 1 + hi, None]
+        mad[window - 1 + lo:window - 1 + hi] = np.abs(windows[lo:hi] - center).mean(axis=1)
+
+    mad[~_valid_mask(values, window, offsets)] = np.nan
+    return mad
+
+
+def _van_herk(values: np.ndarray, window: int, op: np.ufunc, fill: float) -> np.ndarray:
+    """
+    Thuật toán van Herk / Gil-Werman: max (min) của mọi cửa sổ trong O(n), không phụ thuộc window.
+    Chia mảng thành các khối dài window, lấy tích luỹ xuôi (g) và ngược (h) trong từng khối,
+    cửa sổ [i - window + 1, i] nằm trên tối đa hai khối nên kết quả là op(h[i - window + 1], g[i])
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, fill)
+    padded[:n] = np.where(np.isnan(values), fill, values)
+    blocks = padded.reshape(n_blocks, window)
+
+    g = op.accumulate(blocks, axis=1).ravel()
+    h = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    i = np.arange(window - 1, n)
+    out[window - 1:] = op(h[i - window + 1], g[i])
+    return out
+
+
+def rolling_max(values: np.ndarray, window: int, offsets: np.ndarray = None) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = _van_herk(values, window, np.maximum, -np.inf)
+    out[~_valid_mask(values, window, offsets)] = np.nan
+    return out
+
+
+def rolling_min(values: np.ndarray, window: int, offsets: np.ndarray = None) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = _van_herk(values, window, np.minimum, np.inf)
+    out[~_valid_mask(values, window, offsets)] = np.nan
+    return out
+
+
+def rolling_min_max(values: np.ndarray, window: int, offsets: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min và max của cùng một chuỗi, dùng chung một lần kiểm tra NaN/biên ticker
+    """
+    values = np.asarray(values, dtype=np.float64)
+    invalid = ~_valid_mask(values, window, offsets)
+    low = _van_herk(values, window, np.minimum, np.inf)
+    high = _van_herk(values, window, np.maximum, -np.inf)
+    low[invalid] = np.nan
+    high[invalid] = np.nan
+    return low, high
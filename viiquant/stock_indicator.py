@@ -2,21 +2,63 @@ import numpy as np
 import pandas as pd
 import inspect
 
+from collections import OrderedDict
 from typing import List
+from typing import Dict
 from typing import Any
+from typing import Tuple
 
 # from pandas.core.groupby import DataFrameGroupBy
 
 from viiquant.stock_price_frame import StockPriceFrame
+from viiquant.indicator_graph import IndicatorGraph
+from viiquant.indicator_sweep import IndicatorSweep
+from viiquant.indicator_pool import IndicatorPool
+from viiquant.streaming_indicator import StreamingIndicator
+from viiquant.streaming_indicator import STREAMING_INDICATORS
+
+
+# Số kết quả chỉ báo (tên, tham số, phiên bản dữ liệu) tối đa được giữ lại
+MEMO_SIZE = 32
+
+# Sai số hội tụ của ewm khi tính số nến khởi động: tỉ trọng tối đa của phần lịch sử không được lấy về
+WARMUP_TOLERANCE = 1e-3
+
+
+def ewm_warmup(span: float = None, alpha: float = None, tolerance: float = WARMUP_TOLERANCE) -> int:
+    """
+    Số nến n để ewm (adjust=True) hội tụ: phần trọng số của các nến trước đó, (1 - alpha)^n, không quá tolerance.
+    Với span = 26, tolerance = 1e-3: 90 nến
+    """
+    alpha = 2.0 / (span + 1.0) if alpha is None else alpha
+    if alpha >= 1:
+        return 1
+    return int(np.ceil(np.log(tolerance) / np.log(1.0 - alpha)))
 
 
 class StockIndicator:
 
-    def __init__(self, spf: StockPriceFrame=None):
+    def __init__(self, spf: StockPriceFrame=None, incremental: bool=False, memo_size: int=MEMO_SIZE, workers: int=0):
         self._spf: StockPriceFrame = None
-        self._price_frame: pd.DataFrame = None
-        self._ticker_groupby = None
         self._curr_indicators: dict = {}
+
+        # incremental = True: update() chỉ tính các nến mới cho các chỉ báo có bản tính tăng dần (STREAMING_INDICATORS)
+        self._incremental = incremental
+        self._streams: Dict[str, StreamingIndicator] = {}
+
+        # Các phép tính trung gian (ewm, diff, rolling mean, ...) dùng chung giữa các chỉ báo, tính một lần mỗi phiên bản dữ liệu
+        self._graph: IndicatorGraph = IndicatorGraph()
+
+        # Kết quả đã tính: (tên chỉ báo, tham số, phiên bản dữ liệu) -> {cột: giá trị}, LRU tối đa memo_size kết quả.
+        # _written: khoá của kết quả đang nằm trong từng cột của _price_frame
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_size = memo_size
+        self._written: Dict[str, tuple] = {}
+        self._memo_hits: int = 0
+        self._memo_misses: int = 0
+
+        # workers > 1: update() chia các ticker cho một process pool (khung giá lớn, xem IndicatorPool.accepts)
+        self._pool: IndicatorPool = IndicatorPool(workers) if workers > 1 else None
         self._indicator_signals: dict = {}
         self._indicator_compared_signals: dict = {}
 
@@ -25,8 +67,52 @@ class StockIndicator:
 
     def set_price_frame(self, spf: StockPriceFrame):
         self._spf: StockPriceFrame = spf
-        self._price_frame: pd.DataFrame = spf._price_frame
-        self._ticker_groupby = spf.ticker_groupby_prop
+        self._streams = {}
+        self._graph.set_price_frame(spf)
+        self._memo = OrderedDict()
+        self._written = {}
+
+    def set_workers(self, workers: int):
+        if self._pool:
+            self._pool.close()
+        self._pool = IndicatorPool(workers) if workers > 1 else None
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
+
+    def set_incremental(self, incremental: bool=True):
+        self._incremental = incremental
+        self._streams = {}
+
+    @property
+    def _price_frame(self) -> pd.DataFrame:
+        # Luôn đọc dataframe hiện tại của StockPriceFrame (có thể được thay bằng object mới khi nối thêm dữ liệu)
+        return self._spf._price_frame if self._spf else None
+
+    @property
+    def graph(self) -> IndicatorGraph:
+        return self._graph
+
+    @property
+    def sweep(self) -> IndicatorSweep:
+        """
+        Quét nhiều bộ tham số của RSI/MACD/BOLLINGER_BANDS trong một lượt, kết quả (ticker x time x param) không ghi vào _price_frame
+        """
+        return IndicatorSweep(self)
+
+    @property
+    def memo_stats(self) -> dict:
+        return {
+            'entries': len(self._memo),
+            'hits': self._memo_hits,
+            'misses': self._memo_misses
+        }
+
+    @property
+    def _ticker_groupby(self):
+        # Groupby được StockPriceFrame cache theo phiên bản dữ liệu
+        return self._spf.get_ticker_groupby() if self._spf else None
 
     def MACD(self, fast_period:int = 12, slow_period:int = 26, macd_signal_period:int = 9,
              macd_col:str = 'macd', signal_col:str = 'macd_signal', indicator_key:str = None) -> pd.DataFrame:
@@ -44,18 +130,20 @@ class StockIndicator:
             'params': local_data,
             'function': self.MACD
         }
-        
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['ma_fast'] = groupby['close'].transform(lambda x: x.ewm(span=fast_period, min_periods=fast_period).mean())
-        self._price_frame['ma_slow'] = groupby['close'].transform(lambda x: x.ewm(span=slow_period, min_periods=slow_period).mean())
-        self._price_frame[macd_col] = self._price_frame['ma_fast'] - self._price_frame['ma_slow']
+        if self.__recall('MACD', local_data):
+            return self._price_frame
 
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame[signal_col] = groupby[macd_col].transform(lambda x: x.ewm(span=macd_signal_period, min_periods=macd_signal_period).mean())
         
-        self._price_frame.drop(columns=['ma_fast', 'ma_slow'], axis=1, inplace=True)
-
-        return self._price_frame
+        g = self._graph
+        close = g.column('close')
+        ma_fast = g.ewm(close, span=fast_period, min_periods=fast_period)
+        ma_slow = g.ewm(close, span=slow_period, min_periods=slow_period)
+        macd = g.apply('sub', np.subtract, ma_fast, ma_slow)
+
+        return self.__write('MACD', local_data, {
+            macd_col: g[macd],
+            signal_col: g[g.ewm(macd, span=macd_signal_period, min_periods=macd_signal_period)]
+        })
     
     def SMA(self, period:int = 20, sma_col:str = 'sma_20', indicator_key:str = None) -> pd.DataFrame:
         local_data = locals()
@@ -68,10 +156,12 @@ class StockIndicator:
             'params': local_data,
             'function': self.SMA
         }
-        
-        self._price_frame[sma_col] = self._spf.get_ticker_groupby()['close'].transform(lambda x: x.rolling(window=period).mean())
+        if self.__recall('SMA', local_data):
+            return self._price_frame
 
-        return self._price_frame
+        
+        g = self._graph
+        return self.__write('SMA', local_data, {sma_col: g[g.mean(g.column('close'), period)]})
     
     def EMA(self, period:int = 20, alpha:float = 0, ema_col:str = 'ema_20', indicator_key:str = None) -> pd.DataFrame:
         local_data = locals()
@@ -84,13 +174,16 @@ class StockIndicator:
             'params': local_data,
             'function': self.EMA
         }
+        if self.__recall('EMA', local_data):
+            return self._price_frame
 
+        # span và alpha không dùng chung được trong ewm: alpha hợp lệ thì dùng alpha thay cho span
+        g = self._graph
         if 0 < alpha <= 1:
-            self._price_frame[ema_col] = self._spf.get_ticker_groupby()['close'].transform(lambda x: x.ewm(span=period, alpha=alpha).mean())
+            ema = g.ewm(g.column('close'), alpha=alpha)
         else:
-            self._price_frame[ema_col] = self._spf.get_ticker_groupby()['close'].transform(lambda x: x.ewm(span=period).mean())
-            
-        return self._price_frame
+            ema = g.ewm(g.column('close'), span=period)
+        return self.__write('EMA', local_data, {ema_col: g[ema]})
     
     
     def RSI(self, period:int = 14, ewm:bool = True, rsi_col:str = 'rsi_14', indicator_key:str = None) -> pd.DataFrame:
@@ -108,22 +201,10 @@ class StockIndicator:
             'params': local_data,
             'function': self.RSI
         }
+        if self.__recall('RSI', local_data):
+            return self._price_frame
 
-        self._price_frame['price_changed'] = self._spf.get_ticker_groupby()['close'].transform(lambda x: x.diff())
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['gain'] = groupby['price_changed'].transform(lambda x: np.where(x >= 0, x, 0))
-        self._price_frame['loss'] = groupby['price_changed'].transform(lambda x: np.where(x < 0, abs(x), 0))
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['avg_gain'] = groupby['gain'].transform(lambda x: x.ewm(span=period, min_periods=period).mean() if ewm == True else x.rolling(window=period).mean())
-        self._price_frame['avg_loss'] = groupby['loss'].transform(lambda x: x.ewm(span=period, min_periods=period).mean() if ewm == True else x.rolling(window=period).mean())
-
-        self._price_frame['relative_strength'] = self._price_frame['avg_gain'] / self._price_frame['avg_loss']
-        self._price_frame[rsi_col] = 100 - (100 / (1 + self._price_frame['relative_strength']))
-
-        self._price_frame.drop(columns=['price_changed', 'gain', 'loss', 'avg_gain', 'avg_loss', 'relative_strength'], axis=1, inplace=True)
-        return self._price_frame
+        return self.__write('RSI', local_data, {rsi_col: self._graph[self._rsi(period, ewm)]})
     
     def STOCH_RSI(self, period:int = 14, ewm:bool = True, stochrsi_col:str = 'stochrsi_14', indicator_key:str = None) -> pd.DataFrame:
         """
@@ -140,25 +221,14 @@ class StockIndicator:
             'params': local_data,
             'function': self.STOCH_RSI
         }
-
-        self._price_frame['price_changed'] = self._spf.get_ticker_groupby()['close'].transform(lambda x: x.diff())
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['gain'] = groupby['price_changed'].transform(lambda x: np.where(x >= 0, x, 0))
-        self._price_frame['loss'] = groupby['price_changed'].transform(lambda x: np.where(x < 0, abs(x), 0))
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['avg_gain'] = groupby['gain'].transform(lambda x: x.ewm(span=period, min_periods=period).mean() if ewm == True else x.rolling(window=period).mean())
-        self._price_frame['avg_loss'] = groupby['loss'].transform(lambda x: x.ewm(span=period, min_periods=period).mean() if ewm == True else x.rolling(window=period).mean())
-
-        self._price_frame['relative_strength'] = self._price_frame['avg_gain'] / self._price_frame['avg_loss']
-        self._price_frame['tmp_rsi'] = 100 - (100 / (1 + self._price_frame['relative_strength']))
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame[stochrsi_col] = 100 * (groupby['tmp_rsi'].transform(lambda x: x) - groupby['tmp_rsi'].transform(lambda x: x.rolling(period).min())) / (groupby['tmp_rsi'].transform(lambda x: x.rolling(period).max()) - groupby['tmp_rsi'].transform(lambda x: x.rolling(period).min()))
-
-        self._price_frame.drop(columns=['price_changed', 'gain', 'loss', 'avg_gain', 'avg_loss', 'relative_strength', 'tmp_rsi'], axis=1, inplace=True)
-        return self._price_frame
+        if self.__recall('STOCH_RSI', local_data):
+            return self._price_frame
+
+        g = self._graph
+        rsi = self._rsi(period, ewm)
+        rsi_min, rsi_max = g.min_max(rsi, period)
+        stoch_rsi = g.apply('stoch', lambda x, low, high: 100 * (x - low) / (high - low), rsi, rsi_min, rsi_max)
+        return self.__write('STOCH_RSI', local_data, {stochrsi_col: g[stoch_rsi]})
     
     def ATR(self, period:int = 14, ewm:bool = True, atr_col:str = 'atr_14', indicator_key:str = None) -> pd.DataFrame:
         local_data = locals()
@@ -171,18 +241,17 @@ class StockIndicator:
             'params': local_data,
             'function': self.ATR
         }
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['prev_close'] = groupby['close'].transform(lambda x: x.shift(1))
-        self._price_frame['HmL'] = abs(self._price_frame['high'] - self._price_frame['low'])
-        self._price_frame['HmPrvC'] = abs(self._price_frame['high'] - self._price_frame['prev_close'])
-        self._price_frame['LmPrvC'] = abs(self._price_frame['low'] - self._price_frame['prev_close'])
-        self._price_frame['true_range'] = self._price_frame[['HmL', 'HmPrvC', 'LmPrvC']].max(axis=1, skipna=False)
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame[atr_col] = groupby['true_range'].transform(lambda x: x.ewm(span=period, min_periods=period).mean() if ewm == True else x.rolling(window=period).mean())
-        
-        self._price_frame.drop(columns=['prev_close', 'HmL', 'HmPrvC', 'LmPrvC', 'true_range'], axis=1, inplace=True)
-        return self._price_frame
+        if self.__recall('ATR', local_data):
+            return self._price_frame
+
+        g = self._graph
+        true_range = self._true_range()
+
+        if ewm == True:
+            atr = g.ewm(true_range, span=period, min_periods=period)
+        else:
+            atr = g.mean(true_range, period)
+        return self.__write('ATR', local_data, {atr_col: g[atr]})
 
     def BOLLINGER_BANDS(self, period:int = 20, sigma_width:int = 2, bb_upper_col:str = 'bb_upper', bb_lower_col:str = 'bb_lower', bb_width_col:str = 'bbw', indicator_key:str = 'bbands') -> pd.DataFrame:
         local_data = locals()
@@ -192,18 +261,21 @@ class StockIndicator:
             'params': local_data,
             'function': self.BOLLINGER_BANDS
         }
+        if self.__recall('BOLLINGER_BANDS', local_data):
+            return self._price_frame
 
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['sma'] = groupby['close'].transform(lambda x: x.rolling(window=period).mean())
-        self._price_frame['sigma'] = groupby['close'].transform(lambda x: x.rolling(window=period).std())
+        g = self._graph
+        close = g.column('close')
+        sma = g[g.mean(close, period)]
+        sigma = g[g.std(close, period)]
 
-        self._price_frame[bb_upper_col] = self._price_frame['sma'] + (sigma_width * self._price_frame['sigma'])
-        self._price_frame[bb_lower_col] = self._price_frame['sma'] - (sigma_width * self._price_frame['sigma'])
+        upper = sma + (sigma_width * sigma)
+        lower = sma - (sigma_width * sigma)
+        outputs = {bb_upper_col: upper, bb_lower_col: lower}
         if bb_width_col:
-            self._price_frame[bb_width_col] = (self._price_frame[bb_upper_col] - self._price_frame[bb_lower_col])/self._price_frame["sma"] * 100
-
-        self._price_frame.drop(columns=['sma', 'sigma'], axis=1, inplace=True)
-        return self._price_frame
+            with np.errstate(divide='ignore', invalid='ignore'):
+                outputs[bb_width_col] = (upper - lower) / sma * 100
+        return self.__write('BOLLINGER_BANDS', local_data, outputs)
     
     def COMMODITY_CHANNEL_INDEX(self, period:int = 20, use_mad:bool = True, cci_col:str = 'cci_20', indicator_key:str = None) -> pd.DataFrame:
         local_data = locals()
@@ -216,22 +288,20 @@ class StockIndicator:
             'params': local_data,
             'function': self.COMMODITY_CHANNEL_INDEX
         }
+        if self.__recall('COMMODITY_CHANNEL_INDEX', local_data):
+            return self._price_frame
 
-
-        self._price_frame['tp'] = (self._price_frame['high'] + self._price_frame['low'] + self._price_frame['close']) / 3
-
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['tp_sma'] = groupby['tp'].transform(lambda x: x.rolling(window=period).mean())
-        self._price_frame['tp_mad'] = groupby['tp'].transform(lambda x: x.rolling(window=period).apply(lambda z: pd.Series(z).mad()))
-        self._price_frame['tp_std'] = groupby['tp'].transform(lambda x: x.rolling(window=period).std())
+        g = self._graph
+        tp = g.apply('typical_price', lambda h, l, c: (h + l + c) / 3, g.column('high'), g.column('low'), g.column('close'))
+        tp_sma = g.mean(tp, period)
 
         if use_mad == True:
-            self._price_frame[cci_col] = (self._price_frame['tp'] - self._price_frame['tp_sma']) / (self._price_frame['tp_mad'] * 0.015)
+            # Mean absolute deviation (Series.mad đã bị bỏ khỏi pandas)
+            deviation = g.mad(tp, period)
         else:
-            self._price_frame[cci_col] = (self._price_frame['tp'] - self._price_frame['tp_sma']) / (self._price_frame['tp_std'] * 0.015)
-
-        self._price_frame.drop(columns=['tp', 'tp_sma', 'tp_mad', 'tp_std'], axis=1, inplace=True)
-        return self._price_frame
+            deviation = g.std(tp, period)
+        cci = g.apply('cci', lambda x, mean, dev: (x - mean) / (dev * 0.015), tp, tp_sma, deviation)
+        return self.__write('COMMODITY_CHANNEL_INDEX', local_data, {cci_col: g[cci]})
     
     def STOCH(self, k_period:int = 14, d_period:int = 3, stoch_k_col:str = 'stoch_14', stoch_d_col:str = 'stoch_3', indicator_key:str = 'stoch') -> pd.DataFrame:
         """
@@ -246,18 +316,19 @@ class StockIndicator:
             'params': local_data,
             'function': self.STOCH
         }
-        
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['k_high'] = groupby['high'].transform(lambda x: x.rolling(window=k_period).max())
-        self._price_frame['k_low'] = groupby['low'].transform(lambda x: x.rolling(window=k_period).min())
+        if self.__recall('STOCH', local_data):
+            return self._price_frame
 
-        self._price_frame[stoch_k_col] = 100 * (self._price_frame['close'] - self._price_frame['k_low']) / (self._price_frame['k_high'] - self._price_frame['k_low'])
         
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame[stoch_d_col] = groupby[stoch_k_col].transform(lambda x: x.rolling(window=d_period).mean())
-
-        self._price_frame.drop(columns=['k_high', 'k_low'], axis=1, inplace=True)
-        return self._price_frame
+        g = self._graph
+        k_high = g.max(g.column('high'), k_period)
+        k_low = g.min(g.column('low'), k_period)
+
+        stoch_k = g.apply('stoch', lambda x, low, high: 100 * (x - low) / (high - low), g.column('close'), k_low, k_high)
+        return self.__write('STOCH', local_data, {
+            stoch_k_col: g[stoch_k],
+            stoch_d_col: g[g.mean(stoch_k, d_period)]
+        })
     
 
     def CHAIKIN(self, fast_period:int = 3, slow_period:int = 10, chaikin_col:str = 'chaikin', indicator_key:str = 'chaikin') -> pd.DataFrame:
@@ -272,18 +343,101 @@ class StockIndicator:
             'params': local_data,
             'function': self.CHAIKIN
         }
+        if self.__recall('CHAIKIN', local_data):
+            return self._price_frame
 
-        self._price_frame['money_flow_mult'] = ((2 * self._price_frame['close']) - self._price_frame['low'] - self._price_frame['high']) / (self._price_frame['high'] - self._price_frame['low'])
-        self._price_frame['money_flow_vol'] = self._price_frame['money_flow_mult'] * self._price_frame['volume']
+        g = self._graph
+        money_flow_vol = g.apply('money_flow_vol', lambda h, l, c, v: ((2 * c) - l - h) / (h - l) * v,
+                                 g.column('high'), g.column('low'), g.column('close'), g.column('volume'))
 
-        groupby = self._spf.get_ticker_groupby()
-        self._price_frame['money_flow_vol_fast'] = groupby['money_flow_vol'].transform(lambda x: x.ewm(span=fast_period, min_periods=fast_period).mean())
-        self._price_frame['money_flow_vol_slow'] = groupby['money_flow_vol'].transform(lambda x: x.ewm(span=slow_period, min_periods=slow_period).mean())
-        self._price_frame[chaikin_col] = self._price_frame['money_flow_vol_fast'] - self._price_frame['money_flow_vol_slow']
+        money_flow_vol_fast = g.ewm(money_flow_vol, span=fast_period, min_periods=fast_period)
+        money_flow_vol_slow = g.ewm(money_flow_vol, span=slow_period, min_periods=slow_period)
+        chaikin = g.apply('sub', np.subtract, money_flow_vol_fast, money_flow_vol_slow)
+        return self.__write('CHAIKIN', local_data, {chaikin_col: g[chaikin]})
 
-        self._price_frame.drop(columns=['money_flow_mult', 'money_flow_vol', 'money_flow_vol_fast', 'money_flow_vol_slow'], axis=1, inplace=True)
+    def __memo_key(self, name: str, params: dict) -> tuple:
+        # indicator_key chỉ là tên đăng ký, không ảnh hưởng kết quả
+        args = tuple(sorted((k, v) for k, v in params.items() if k != 'indicator_key'))
+        return (name, args, self._spf.version)
+
+    def __recall(self, name: str, params: dict) -> bool:
+        """
+        Dùng lại kết quả của chỉ báo name đã tính với cùng tham số trên cùng phiên bản dữ liệu.
+        Cột vẫn đang giữ đúng kết quả đó thì không ghi lại: update() khi không có nến mới không tính gì cả
+        """
+        key = self.__memo_key(name, params)
+        outputs = self._memo.get(key)
+        if outputs is None:
+            self._memo_misses += 1
+            return False
+
+        columns = self._spf.columns
+        stale = [col for col in outputs if self._written.get(col) != key or col not in columns]
+        if any(outputs[col] is None for col in stale):
+            # Bản tính tăng dần không giữ giá trị, cột của nó đã bị ghi đè: phải tính lại
+            self._memo_misses += 1
+            return False
+
+        self._memo.move_to_end(key)
+        self._memo_hits += 1
+        self._spf.set_columns({col: outputs[col] for col in stale})
+        for col in stale:
+            self._written[col] = key
+        if stale:
+            self._spf.apply_schema()
+        return True
+
+    def __remember(self, name: str, params: dict, outputs: Dict[str, np.ndarray]):
+        key = self.__memo_key(name, params)
+
+        # Phiên bản dữ liệu chỉ tăng: kết quả của các phiên bản cũ không bao giờ được dùng lại
+        for old in [k for k in self._memo if k[2] != key[2]]:
+            del self._memo[old]
+
+        self._memo[key] = outputs
+        self._memo.move_to_end(key)
+        while len(self._memo) > self._memo_size:
+            self._memo.popitem(last=False)
+
+        for col in outputs:
+            self._written[col] = key
+
+    def __write(self, name: str, params: dict, outputs: Dict[str, np.ndarray]) -> pd.DataFrame:
+        # Gán cột copy mảng nên giá trị giữ trong memo không bị thay đổi theo _price_frame
+        self._spf.set_columns(outputs)
+        self._spf.apply_schema()
+        self.__remember(name, params, outputs)
         return self._price_frame
 
+    def _gain_loss(self) -> Tuple[tuple, tuple]:
+        g = self._graph
+        price_changed = g.diff(g.column('close'))
+
+        # Nến đầu tiên của mỗi ticker (diff NaN) có gain = loss = 0
+        gain = g.apply('gain', lambda x: np.where(x >= 0, x, 0), price_changed)
+        loss = g.apply('loss', lambda x: np.where(x < 0, np.abs(x), 0), price_changed)
+        return gain, loss
+
+    def _rsi(self, period: int, ewm: bool) -> tuple:
+        g = self._graph
+        gain, loss = self._gain_loss()
+
+        if ewm == True:
+            avg_gain = g.ewm(gain, span=period, min_periods=period)
+            avg_loss = g.ewm(loss, span=period, min_periods=period)
+        else:
+            avg_gain = g.mean(gain, period)
+            avg_loss = g.mean(loss, period)
+
+        return g.apply('rsi', lambda up, down: 100 - (100 / (1 + up / down)), avg_gain, avg_loss)
+
+    def _true_range(self) -> tuple:
+        g = self._graph
+        prev_close = g.shift(g.column('close'))
+        # max(axis=1, skipna=False): NaN nếu một trong ba khoảng là NaN
+        return g.apply('true_range', lambda h, l, pc: np.maximum(np.maximum(np.abs(h - l), np.abs(h - pc)), np.abs(l - pc)),
+                       g.column('high'), g.column('low'), prev_close)
+
     def get_available_indicators(self):
         methods = inspect.getmembers(self, lambda attr: inspect.ismethod(attr))   
         # methods_filtered = [m for m in methods if not(m[0].startswith("__") and m[0].endswith("__")) and m[0].isupper()]
@@ -299,14 +453,102 @@ class StockIndicator:
                         # print(method[0], sig.parameters[arg].name, sig.parameters[arg].default)
 
         return available_indicator
+
+    def indicator_warmup(self, name: str, params: dict = None, tolerance: float = WARMUP_TOLERANCE) -> int:
+        """
+        Số nến lịch sử một chỉ báo cần để giá trị ở nến cuối cùng đúng (rolling đủ cửa sổ, ewm hội tụ trong tolerance).
+        name: tên phương thức (MACD, rsi, ...), params: tham số của nó, thiếu tham số nào thì lấy giá trị mặc định
+        """
+        method = getattr(self, name.upper(), None)
+        if not inspect.ismethod(method):
+            raise ValueError(f"Unknown indicator '{name}'")
+        p = inspect.signature(method).bind_partial(**(params if params else {}))
+        p.apply_defaults()
+        p = p.arguments
+        name = name.upper()
+
+        if name == 'MACD':
+            # signal là ewm của macd: cần thêm phần khởi động của nó sau khi macd đã hội tụ
+            slow = max(ewm_warmup(p['fast_period'], tolerance=tolerance), ewm_warmup(p['slow_period'], tolerance=tolerance),
+                       p['fast_period'], p['slow_period'])
+            return slow + max(ewm_warmup(p['macd_signal_period'], tolerance=tolerance), p['macd_signal_period'])
+        if name == 'EMA':
+            if 0 < p['alpha'] <= 1:
+                return ewm_warmup(alpha=p['alpha'], tolerance=tolerance)
+            return ewm_warmup(p['period'], tolerance=tolerance)
+        if name in ['RSI', 'ATR', 'STOCH_RSI']:
+            # Thêm một nến cho diff (gain/loss) hoặc close trước đó (true range)
+            bars = 1 + (max(ewm_warmup(p['period'], tolerance=tolerance), p['period']) if p['ewm'] == True else p['period'])
+            return bars + p['period'] - 1 if name == 'STOCH_RSI' else bars
+        if name in ['SMA', 'BOLLINGER_BANDS', 'COMMODITY_CHANNEL_INDEX']:
+            return p['period']
+        if name == 'STOCH':
+            return p['k_period'] + p['d_period'] - 1
+        if name == 'CHAIKIN':
+            return max(ewm_warmup(p['fast_period'], tolerance=tolerance), ewm_warmup(p['slow_period'], tolerance=tolerance),
+                       p['fast_period'], p['slow_period'])
+        raise ValueError(f"Unknown indicator '{name}'")
+
+    def warmup_bars(self, tolerance: float = WARMUP_TOLERANCE) -> Dict[str, int]:
+        """
+        Số nến khởi động của từng chỉ báo đã đăng ký (indicator_key -> số nến)
+        """
+        warmup = {}
+        for k in self._curr_indicators:
+            params = self._curr_indicators[k]['params']
+            warmup[k] = self.indicator_warmup(self._curr_indicators[k]['function'].__name__, params, tolerance)
+        return warmup
+
+    def required_bars(self, tolerance: float = WARMUP_TOLERANCE) -> int:
+        """
+        Số nến lịch sử mỗi ticker cần giữ cho mọi chỉ báo đã đăng ký
+        """
+        return max(self.warmup_bars(tolerance).values(), default=0)
     
 
     def update(self):
+        parallel = self._pool is not None and self._pool.accepts(self._spf)
+        pending = []
+
         for k in self._curr_indicators:
             params = self._curr_indicators[k]['params']
             indicator_function = self._curr_indicators[k]['function']
 
-            indicator_function(**params)
+            stream = self.__get_stream(k)
+            if stream:
+                # Stream mới phải được dựng trạng thái ngay, kể cả khi kết quả đã có trong memo
+                if stream.ready and self.__recall(indicator_function.__name__, params):
+                    continue
+                stream.update(self._spf)
+                self._spf.apply_schema()
+                # Chỉ đánh dấu các cột, không giữ giá trị (copy cả cột mỗi nến sẽ mất lợi ích của bản tăng dần)
+                self.__remember(indicator_function.__name__, params, dict.fromkeys(stream.outputs))
+            elif parallel:
+                if not self.__recall(indicator_function.__name__, params):
+                    pending.append((indicator_function.__name__, params))
+            else:
+                indicator_function(**params)
+
+        if len(pending) > 0:
+            for (name, params), outputs in zip(pending, self._pool.compute(self._spf, pending)):
+                self.__write(name, params, outputs)
+
+    def __get_stream(self, key: str) -> StreamingIndicator:
+        """
+        Bản tính tăng dần của chỉ báo key (None nếu không bật incremental hoặc chỉ báo chưa hỗ trợ)
+        """
+        if not self._incremental:
+            return None
+
+        params = self._curr_indicators[key]['params']
+        stream = self._streams.get(key)
+        if stream is None or stream.params != params:
+            stream_class = STREAMING_INDICATORS.get(self._curr_indicators[key]['function'].__name__)
+            if stream_class is None:
+                return None
+            stream = stream_class(**params)
+            self._streams[key] = stream
+        return stream
     
     def set_signal(self, indicator:str, buy_threshold:float, sell_threshold:float, buy_condition:Any, sell_condition:Any,
                    buy_max:float = None, sell_max:float = None, buy_max_condition:Any = None, sell_max_condition:Any = None):
@@ -336,10 +578,11 @@ class StockIndicator:
     def check_indicator_in_dataframe(self, col_names:List[str]) -> bool:
 
         set_cols = set(col_names)
-        if set_cols.issubset(self._price_frame.columns):
+        columns = self._spf.columns
+        if set_cols.issubset(columns):
             return True
         
-        missing_cols = set_cols.difference(self._price_frame.columns)
+        missing_cols = set_cols.difference(columns)
         print(f"Missing indicator columns: {missing_cols}")
         return False
         
@@ -347,7 +590,7 @@ class StockIndicator:
     def check_signals(self):
 
         signals = {}
-        last_rows = self._ticker_groupby.tail(1)
+        last_rows = self._spf.get_last_rows()
 
         if self.check_indicator_in_dataframe(col_names=list(self._indicator_signals.keys())):
 
@@ -1,15 +1,21 @@
 from viiquant.data_stock_price import DataStockPrice
 from viiquant.stock_price_frame import StockPriceFrame
+from viiquant.exceptions import DataProviderError
+from viiquant.trading_calendar import sessions_start_date
 
 from typing import List
 from typing import Any
 from typing import Union
 
-from datetime import datetime, timedelta
+from datetime import datetime
 import math
 import numpy as np
 from pandas import DataFrame
 
+# Số ngày giao dịch dùng để tính mean/std/cov lợi suất ngày của danh mục (khoảng một năm)
+METRICS_SESSIONS = 250
+
+
 class Portfolio:
 
     def __init__(self, dsp:DataStockPrice):
@@ -123,19 +129,25 @@ class Portfolio:
         
         return projected_mv
     
-    def fetch_historical_price_daily(self) -> StockPriceFrame:
+    def fetch_historical_price_daily(self, sessions:int = METRICS_SESSIONS) -> StockPriceFrame:
+        """
+        Giá ngày của các mã đang sở hữu trong sessions ngày giao dịch gần nhất (không tính theo ngày lịch)
+        """
         tickers = self.get_owner_asset_labels()
 
         end_date = datetime.today()
-        start_date = end_date - timedelta(days=365)
-
-        data = {}
-        for ticker in tickers:
-            data[ticker] = self._dsp.get_historical_price(
-                                        ticker=ticker,
-                                        start_date=start_date.strftime('%Y-%m-%d'),
-                                        end_date=end_date.strftime('%Y-%m-%d')
-                                    )
+        start_date = sessions_start_date(end_date, sessions)
+
+        data, errors = self._dsp.get_historical_frames(
+                                    tickers=tickers,
+                                    start_date=start_date.strftime('%Y-%m-%d'),
+                                    end_date=end_date.strftime('%Y-%m-%d')
+                                )
+
+        # Metrics cần đủ dữ liệu của tất cả các mã đang sở hữu
+        if len(errors) > 0:
+            failed = ', '.join(f"{ticker}: {errors[ticker]}" for ticker in errors)
+            raise DataProviderError(f"Daily history unavailable for {failed}")
             
         return StockPriceFrame(data)
     
@@ -10,52 +10,289 @@ from datetime import datetime as dt
 from typing import List
 from typing import Dict
 from typing import Union
+from typing import Tuple
+
+from viiquant.ring_buffer import RingBufferStore
+from viiquant.ring_buffer import COMPACT_BAR_DTYPES
+from viiquant.grouped_kernels import TickerSegments
+from viiquant.bar_resampler import resample_arrays
+from viiquant.bar_resampler import resample_frame
+from viiquant.trading_calendar import session_buckets
 
 
 class StockPriceFrame:
 
-    def __init__(self, origin_data: Dict[str, List[dict]]):
+    # Schema gọn: giá và chỉ báo float32, khối lượng số nguyên
+    COMPACT_PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+    def __init__(self, origin_data: Dict[str, Union[List[dict], pd.DataFrame]], backend: str='pandas', retention: int=10000, compact: bool=False,
+                 mirrored: bool=True):
+        """
+        backend = 'pandas': toàn bộ dữ liệu trong một DataFrame index (ticker, ts), không giới hạn số nến.
+        backend = 'ring': mỗi ticker một ring buffer NumPy giữ tối đa retention nến. Thêm nến chỉ ghi vào buffer,
+        _price_frame được dựng lại từ các buffer khi được đọc (mỗi phiên bản dữ liệu một lần).
+        mirrored = True: mỗi cột của buffer (kể cả cột chỉ báo) chiếm 2 x retention phần tử để đọc không phải copy;
+        mirrored = False: đúng retention phần tử, đọc một cột đã quay vòng thì copy (xem memory_report).
+        compact = True: giá và chỉ báo lưu dạng float32, volume dạng int64 (xem apply_schema).
+        """
         self._data = origin_data        
-        self._price_frame: pd.DataFrame = None
+        self._backend = backend
+        self._compact = compact
+        self._store: RingBufferStore = RingBufferStore(retention, COMPACT_BAR_DTYPES if compact else None, mirrored) if backend == 'ring' else None
+        self._frame: pd.DataFrame = None
         self._ticker_groupby: DataFrameGroupBy = None
         self._ticker_groupby_rolling: RollingGroupby = None
+
+        # Phiên bản dữ liệu: tăng mỗi khi dữ liệu giá thay đổi (tạo mới, thêm/sửa dòng).
+        # Groupby, vị trí từng ticker và các lát cắt theo ticker chỉ được tính lại khi phiên bản thay đổi
+        self._version: int = 0
+        self._groupby_version: int = -1
+        # Phiên bản của _frame (backend 'ring': khác _version thì phải dựng lại từ buffer)
+        self._frame_version: int = -1
+        # Cột ts ghép từ buffer (backend 'ring', khi _price_frame chưa được dựng)
+        self._ts_values: np.ndarray = None
+        self._ts_version: int = -1
+
+        # Vị trí [start, end) và ts cuối của từng ticker
+        self._positions: Dict[str, Tuple[int, int]] = {}
+        self._last_ts: Dict[str, int] = {}
+        self._positions_version: int = -1
+
+        self._slices: Dict[str, pd.DataFrame] = {}
+        self._slices_key: tuple = None
+
+        self._segments: TickerSegments = None
+        self._segments_version: int = -1
+
+        # Các khung thời gian lớn hơn (15m, 1H, ...) dựng từ khung nến gốc: tên -> (bar_size, bar_type, StockPriceFrame)
+        self._timeframes: Dict[str, Tuple[int, str, 'StockPriceFrame']] = {}
+
         self.create_data_frame()
         self.get_ticker_groupby()
+
+    @property
+    def _price_frame(self) -> pd.DataFrame:
+        if self._store is not None and self._frame_version != self._version:
+            self._frame = self.__cast_schema(self._store.to_frame())
+            self._frame_version = self._version
+        return self._frame
+
+    @_price_frame.setter
+    def _price_frame(self, df: pd.DataFrame):
+        self._frame = df
+        self._frame_version = self._version
+
+    def __frame_ready(self) -> bool:
+        # Backend 'pandas', hoặc _price_frame của backend 'ring' đã dựng cho phiên bản hiện tại
+        return self._store is None or self._frame_version == self._version
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Tên các cột dữ liệu (không gồm ticker, ts). Backend 'ring' không phải dựng khung giá
+        """
+        if self.__frame_ready():
+            return list(self._price_frame.columns)
+        return [col for col in self._store.columns if col != 'ts']
+
+    def row_count(self) -> int:
+        return sum(end - start for start, end in self.__ticker_positions().values())
+
+    def column_values(self, col: str) -> np.ndarray:
+        """
+        Mảng giá trị của cột col (kể cả 'ts') theo thứ tự dòng của _price_frame.
+        Backend 'ring' khi _price_frame chưa được dựng: ghép thẳng từ buffer, chỉ copy cột này
+        """
+        if not self.__frame_ready():
+            return self._store.concat_column(col)
+        frame = self._price_frame
+        if col == 'ts':
+            return frame.index.levels[1].values[frame.index.codes[1]]
+        return frame[col].values
+
+    def ts_at(self, positions: np.ndarray) -> np.ndarray:
+        """
+        ts của các dòng tại positions (vị trí trong _price_frame)
+        """
+        if self.__frame_ready():
+            index = self._price_frame.index
+            return index.levels[1].values[index.codes[1][positions]]
+        if self._ts_version != self._version:
+            self._ts_values = self._store.concat_column('ts')
+            self._ts_version = self._version
+        return self._ts_values[positions]
     
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, compact: bool=False) -> 'StockPriceFrame':
+        """
+        StockPriceFrame (backend 'pandas') dùng trực tiếp một DataFrame đã có index (ticker, ts) và đã sort,
+        không gộp/sort lại (vd. một nhóm ticker dựng lại trong process con của IndicatorPool)
+        """
+        spf = cls({}, compact=compact)
+        spf._price_frame = spf.__cast_schema(df)
+        spf._version += 1
+        return spf
+
     def create_data_frame(self) -> pd.DataFrame:
         """
-        Tạo dataframe từ historical data lấy từ API
+        Tạo dataframe từ historical data lấy từ API.
+        Dữ liệu của mỗi ticker có thể là list[dict] hoặc DataFrame dạng cột (DataStockPrice.get_historical_frame)
         """
+        cols = ['ticker', 'ts', 'datetime', 'open', 'high', 'low', 'close', 'volume']
+
+        frames = []
         lst_prices = []
-        for k in self._data:           
-            # Merge các dữ liệu giá của các ticker lại với nhau thành một list duy nhất
-            lst_prices += self._data[k]
+        for k in self._data:
+            if isinstance(self._data[k], pd.DataFrame):
+                if self._data[k].shape[0] > 0:
+                    frames.append(self._data[k][cols])
+            else:
+                # Merge các dữ liệu giá của các ticker lại với nhau thành một list duy nhất
+                lst_prices += self._data[k]
 
         # Tạo dataframe
-        cols = ['ticker', 'ts', 'datetime', 'open', 'high', 'low', 'close', 'volume']
-        if len(lst_prices) == 0:
+        if len(lst_prices) > 0:
+            frames.append(pd.DataFrame(lst_prices, columns=cols))
+
+        if len(frames) == 0:
             df = pd.DataFrame(columns=cols)
+        elif len(frames) == 1:
+            df = frames[0]
         else:
-            df = pd.DataFrame(lst_prices, columns=cols)
+            df = pd.concat(frames, ignore_index=True)
 
-        df['datetime'] = pd.to_datetime(df['datetime'])
+        if not pd.api.types.is_datetime64_any_dtype(df['datetime']):
+            df['datetime'] = pd.to_datetime(df['datetime'])
 
         # Tạo multi index từ ticker và timestamp
         df = df.set_index(keys=['ticker', 'ts'])
 
         df.sort_index(inplace=True)
 
-        self._price_frame = df
+        self._version += 1
+        if self._store:
+            self._store.load_frame(df)
+            return self._price_frame
+
+        self._price_frame = self.__cast_schema(df)
 
         return self._price_frame
        
     
+    def append_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Nối thêm một khối dữ liệu dạng cột (vd. từng trang của DataStockPrice.iter_historical_frames) vào dataframe hiện tại.
+        Các dòng trùng (ticker, ts) được ghi đè bằng dòng mới. Các dòng còn lại được chèn vào cuối nhóm ticker của chúng
+        bằng một lần concat, không sort lại toàn bộ dataframe.
+        """
+        if df.shape[0] == 0:
+            return self._price_frame
+
+        first_ts = df.groupby('ticker', sort=False)['ts'].min().to_dict() if self._timeframes else {}
+        self.__append_frame(df)
+        self.__update_timeframes(first_ts)
+
+        return self._price_frame
+
+    def __append_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+
+        block = df.set_index(keys=['ticker', 'ts'])
+        if not pd.api.types.is_datetime64_any_dtype(block['datetime']):
+            block['datetime'] = pd.to_datetime(block['datetime'])
+
+        if block.index.has_duplicates:
+            block = block[~block.index.duplicated(keep='last')]
+        if not block.index.is_monotonic_increasing:
+            block = block.sort_index()
+        block = self.__cast_schema(block)
+
+        # Vị trí từng ticker của dataframe hiện tại, lấy trước khi đổi phiên bản (cache theo phiên bản cũ vẫn đúng)
+        ticker_positions = self.__ticker_positions() if not self._store else None
+        self._version += 1
+
+        if self._store:
+            # Chỉ ghi vào buffer, khung giá được dựng lại khi đọc
+            self._store.load_frame(block)
+            return None
+
+        if self._price_frame.shape[0] == 0:
+            self._price_frame = block
+            return self._price_frame
+
+        current = self._price_frame
+
+        # Các dòng đã có: cập nhật tại chỗ
+        positions = current.index.get_indexer(block.index)
+        exists = positions >= 0
+        if exists.any():
+            for col in block.columns:
+                if col in current.columns:
+                    current.iloc[positions[exists], current.columns.get_loc(col)] = block[col].values[exists]
+            block = block[~exists]
+
+        if block.shape[0] == 0:
+            return self._price_frame
+
+        n = current.shape[0]
+        merged = pd.concat([current, block])
+
+        inserts = self.__insert_positions(current.index, block.index, ticker_positions)
+        if inserts is None:
+            merged = merged.sort_index()
+        elif inserts[0] < n:
+            order = np.insert(np.arange(n), inserts, np.arange(n, n + block.shape[0]))
+            merged = merged.take(order)
+
+        self._price_frame = merged
+
+        return self._price_frame
+
+    def __insert_positions(self, index: pd.MultiIndex, new_index: pd.MultiIndex, positions: Dict[str, Tuple[int, int]]) -> np.ndarray:
+        """
+        Vị trí chèn (kiểu np.insert) của các dòng mới (đã sort) vào index (ticker, ts) đã sort.
+        positions: đoạn [start, end) của từng ticker trong index (__ticker_positions), chỉ searchsorted trên ts
+        của đúng ticker đó. Trả về None nếu index không ở dạng sort chuẩn.
+        """
+        tickers = index.levels[0]
+        codes = index.codes[0]
+        if not tickers.is_monotonic_increasing or not (codes[1:] >= codes[:-1]).all():
+            return None
+
+        present = np.asarray(list(positions.keys()), dtype=object)
+        bounds_present = np.asarray(list(positions.values()), dtype=np.int64).reshape(-1, 2)
+
+        new_tickers = new_index.get_level_values(0)
+        new_ts = new_index.get_level_values(1).values
+        bounds = np.flatnonzero(np.r_[True, new_tickers[1:] != new_tickers[:-1], True])
+
+        # Một lần searchsorted cho mọi ticker của khối mới trên danh sách ticker (đã sort) của dataframe
+        names = np.asarray(new_tickers[bounds[:-1]], dtype=object)
+        slots = np.searchsorted(present, names, side='left')
+        ts_values = index.levels[1].values
+        ts_codes = index.codes[1]
+
+        inserts = np.empty(len(new_ts), dtype=np.int64)
+        for i in range(len(bounds) - 1):
+            lo, hi = bounds[i], bounds[i + 1]
+            slot = slots[i]
+            if slot < len(present) and present[slot] == names[i]:
+                start, end = bounds_present[slot]
+                ts = ts_values[ts_codes[start:end]]
+                inserts[lo:hi] = start + np.searchsorted(ts, new_ts[lo:hi], side='left')
+            else:
+                # Ticker mới: chèn trước nhóm của ticker kế tiếp
+                inserts[lo:hi] = bounds_present[slot][0] if slot < len(present) else len(index)
+
+        return inserts
+       
     def add_new_row_price(self, new_rows: Dict[str, List[dict]]):
         """
-        Cập nhật thêm dữ liệu mới chạy về vào dataframe hiện tại
+        Cập nhật thêm dữ liệu mới chạy về vào dataframe hiện tại.
+        Các dòng của mọi ticker được gom thành một khối và nối vào bằng append_frame
         """
         # Tên các cột dữ liệu trong dataframe
         column_names = [
+            'ts',
             'datetime',
             'open',
             'high',
@@ -64,27 +301,222 @@ class StockPriceFrame:
             'volume'
         ]
 
-        # if self._price_frame.shape[0] > 0:
-        #     column_names = self._price_frame.columns
+        if sum(len(rows) for rows in new_rows.values()) == 0:
+            return
+
+        if self._store:
+            # Ring buffer: O(1) cho mỗi nến, nến cũ vượt quá retention tự bị loại. Khung giá được dựng lại khi đọc
+            self._store.append_rows(new_rows)
+            self._version += 1
+            self.__update_timeframes({k: min(row['ts'] for row in new_rows[k]) for k in new_rows if len(new_rows[k]) > 0})
+            return
 
+        records = []
+        tickers = []
         for k in new_rows:
-            lst_prices = new_rows[k]
-            for item in lst_prices:
-                # Tạo multi index = (ticker, timestamp)
-                _idx = (k, item['ts'])
-                
-                # Tạo dict chứa các giá trị của các cột trên một dòng
-                _values = {}
-                for col in column_names:
-                    _values[col] = item[col]
+            records += new_rows[k]
+            tickers += [k] * len(new_rows[k])
 
-                # Thêm _values này vào dataframe để tạo dòng dữ liệu mới
-                # self._price_frame.loc[_idx] = pd.Series(data=_values, index=column_names)
-                self._price_frame.loc[_idx, column_names] = _values
+        block = pd.DataFrame.from_records(records, columns=column_names)
+        block.insert(0, 'ticker', tickers)
 
-        # Sort lại dataframe
-        self._price_frame.sort_index(inplace=True)
+        self.append_frame(block)
 
+    def trim(self, max_bars: int, slack: int=0) -> int:
+        """
+        Chỉ giữ max_bars nến mới nhất của mỗi ticker, khi có ticker vượt quá max_bars + slack
+        (slack > 0: cắt theo đợt, không phải mỗi nến mới đều đổi phiên bản dữ liệu và tính lại chỉ báo từ đầu).
+        Backend 'ring' đã giới hạn bằng retention. Các khung thời gian lớn (add_timeframe) giữ nguyên. Trả về số dòng bị bỏ
+        """
+        if self._store or max_bars <= 0 or self._price_frame.shape[0] == 0:
+            return 0
+
+        segments = self.get_segments()
+        if segments.lengths.max() <= max_bars + slack:
+            return 0
+
+        keep = segments.offsets >= np.repeat(segments.lengths - max_bars, segments.lengths)
+        dropped = int(keep.size - keep.sum())
+        self._price_frame = self._price_frame.take(np.flatnonzero(keep))
+        self._version += 1
+
+        return dropped
+
+    def add_timeframe(self, bar_size: int=15, bar_type: str='m', name: str=None) -> 'StockPriceFrame':
+        """
+        Dựng khung thời gian lớn hơn (vd. 15m, 1H) từ khung nến gốc (1 phút) theo phiên giao dịch, không vắt qua giờ nghỉ trưa.
+        Khung này được cập nhật mỗi khi khung gốc có nến mới: chỉ nến đang hình thành của nó được tính lại.
+        Trả về một StockPriceFrame riêng (dùng được với StockIndicator)
+        """
+        name = name if name else f"{bar_size}{bar_type}"
+        if name not in self._timeframes:
+            spf = StockPriceFrame({name: resample_frame(self._price_frame, bar_size, bar_type)}, compact=self._compact)
+            self._timeframes[name] = (bar_size, bar_type, spf)
+        return self._timeframes[name][2]
+
+    def get_timeframe(self, name: str) -> 'StockPriceFrame':
+        return self._timeframes[name][2] if name in self._timeframes else None
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(self._timeframes.keys())
+
+    def __update_timeframes(self, first_ts: Dict[str, int]):
+        """
+        Tính lại các nến của khung lớn kể từ bucket chứa nến mới sớm nhất của mỗi ticker (thường chỉ là nến đang hình thành)
+        """
+        if not self._timeframes or len(first_ts) == 0:
+            return
+
+        frame = self._price_frame
+        positions = self.__ticker_positions()
+        ts_values = frame.index.levels[1].values
+        ts_codes = frame.index.codes[1]
+        columns = {col: frame[col].values for col in ['open', 'high', 'low', 'close', 'volume']}
+
+        for bar_size, bar_type, spf in self._timeframes.values():
+            tickers = list(first_ts.keys())
+            buckets = session_buckets(np.asarray([first_ts[t] for t in tickers], dtype=np.int64), bar_size, bar_type)
+
+            parts = []
+            names = []
+            for i, ticker in enumerate(tickers):
+                start, end = positions.get(ticker, (0, 0))
+                ts = ts_values[ts_codes[start:end]]
+                lo = start + int(np.searchsorted(ts, buckets[i], side='left'))
+                if lo < end:
+                    parts.append(np.arange(lo, end))
+                    names.append(np.full(end - lo, ticker, dtype=object))
+
+            if len(parts) == 0:
+                continue
+
+            rows = np.concatenate(parts)
+            spf.append_frame(resample_arrays(np.concatenate(names), ts_values[ts_codes[rows]],
+                                             *[columns[col][rows] for col in ['open', 'high', 'low', 'close', 'volume']],
+                                             bar_size=bar_size, bar_type=bar_type))
+
+    def __cast_schema(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ép kiểu các cột theo schema gọn (nếu bật compact): float64 -> float32, volume -> int64
+        """
+        if not self._compact or df.shape[0] == 0:
+            return df
+
+        dtypes = {}
+        for col, dtype in df.dtypes.items():
+            if col == 'volume':
+                if dtype.kind != 'i':
+                    dtypes[col] = np.int64
+            elif dtype == np.float64 or (col in self.COMPACT_PRICE_COLUMNS and dtype.kind in 'iuO'):
+                dtypes[col] = np.float32
+
+        if len(dtypes) == 0:
+            return df
+        if 'volume' in dtypes:
+            df = df.assign(volume=df['volume'].fillna(0))
+        return df.astype(dtypes)
+
+    def apply_schema(self):
+        """
+        Ép lại kiểu các cột của _price_frame (vd. cột chỉ báo float64 vừa được thêm) theo schema gọn. Không làm gì nếu compact = False
+        """
+        if not self._compact or not self.__frame_ready():
+            return
+        for col, dtype in self._price_frame.dtypes.items():
+            if dtype == np.float64:
+                self._price_frame[col] = self._price_frame[col].astype(np.float32)
+
+    def set_columns(self, columns: Dict[str, np.ndarray]):
+        """
+        Gán các cột (vd. cột chỉ báo), mỗi cột đủ số dòng theo thứ tự của _price_frame.
+        Backend 'ring': ghi vào buffer của từng ticker để cột không mất khi khung giá được dựng lại sau nến mới
+        (khung giá chưa dựng thì chỉ ghi vào buffer)
+        """
+        if self.__frame_ready():
+            for col, values in columns.items():
+                self._price_frame[col] = values
+        if self._store:
+            columns = {col: np.asarray(values) for col, values in columns.items()}
+            for col in columns:
+                self._store.add_column(col, np.float32 if self._compact else np.float64)
+            for ticker, (start, end) in self.__ticker_positions().items():
+                self._store.buffer(ticker).set_values({col: values[start:end] for col, values in columns.items()})
+
+    def set_rows(self, positions: np.ndarray, columns: Dict[str, np.ndarray]):
+        """
+        Ghi giá trị của các cột tại các vị trí dòng positions của _price_frame (cột chưa có thì tạo với NaN).
+        Giữ kiểu của cột (float32 khi dùng schema gọn)
+        """
+        ready = self.__frame_ready()
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            if ready:
+                self.set_columns({col: np.full(self.row_count(), np.nan) for col in missing})
+            else:
+                for col in missing:
+                    self._store.add_column(col, np.float32 if self._compact else np.float64)
+
+        dtypes = self._price_frame.dtypes if ready else self._store.dtypes
+        columns = {col: np.asarray(values).astype(dtypes[col], copy=False) for col, values in columns.items()}
+        if ready:
+            frame = self._price_frame
+            for col, values in columns.items():
+                frame.iloc[positions, frame.columns.get_loc(col)] = values
+
+        if self._store and len(positions) > 0:
+            positions = np.asarray(positions, dtype=np.int64)
+            order = np.argsort(positions, kind='stable')
+            positions = positions[order]
+            columns = {col: values[order] for col, values in columns.items()}
+
+            tickers = list(self.__ticker_positions().items())
+            starts = np.asarray([start for _, (start, _) in tickers], dtype=np.int64)
+            owner = np.searchsorted(starts, positions, side='right') - 1
+            bounds = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1], True])
+            for i in range(len(bounds) - 1):
+                lo, hi = bounds[i], bounds[i + 1]
+                ticker, (start, _) = tickers[owner[lo]]
+                self._store.buffer(ticker).set_values({col: values[lo:hi] for col, values in columns.items()},
+                                                      positions[lo:hi] - start)
+
+    def memory_report(self) -> dict:
+        """
+        Bộ nhớ (bytes) của khung giá: tổng, phần index, theo từng cột và theo từng ticker.
+        Backend 'ring': 'store' là dung lượng cấp phát sẵn của các buffer (2 x retention mỗi cột nếu mirrored, kể cả
+        khi ticker chưa đủ retention nến), 'frame' là bản _price_frame dựng lại từ buffer (copy toàn bộ dữ liệu,
+        dựng một lần cho mỗi phiên bản dữ liệu được đọc)
+        """
+        if self._store:
+            by_column = pd.Series(self._store.nbytes_by_column(), dtype=np.int64)
+            by_ticker = pd.Series(self._store.nbytes_by_ticker(), dtype=np.int64)
+            # _price_frame là bản dựng lại từ ring buffer, tính riêng
+            frame_bytes = int(self._price_frame.memory_usage(index=True, deep=True).sum())
+            return {
+                'total': int(by_column.sum()) + frame_bytes,
+                'store': int(by_column.sum()),
+                'frame': frame_bytes,
+                'index': int(self._price_frame.index.memory_usage(deep=True)),
+                'by_column': by_column,
+                'by_ticker': by_ticker
+            }
+
+        frame = self._price_frame
+        by_column = frame.memory_usage(index=False, deep=True).astype(np.int64)
+        index_bytes = int(frame.index.memory_usage(deep=True))
+        total = int(by_column.sum()) + index_bytes
+
+        # Các cột là mảng liên tục nên phần của mỗi ticker tỉ lệ với số dòng của nó
+        n = max(frame.shape[0], 1)
+        positions = self.__ticker_positions()
+        by_ticker = pd.Series({ticker: int(total * (end - start) / n) for ticker, (start, end) in positions.items()}, dtype=np.int64)
+
+        return {
+            'total': total,
+            'index': index_bytes,
+            'by_column': by_column,
+            'by_ticker': by_ticker
+        }
 
     def get_last_row(self, ticker: str=None) -> dict:
         # filtered = self._price_frame.filter(like=ticker, axis=0)
@@ -98,22 +530,146 @@ class StockPriceFrame:
         return self.get_previous_row_at(ticker, 1)
     
     def get_previous_row_at(self, ticker: str=None, n: int=1) -> dict:
-        filtered = None
+        if self._store:
+            if not ticker:
+                tickers = self._store.tickers
+                ticker = tickers[-1] if len(tickers) > 0 else None
+            return self._store.previous_row_at(ticker, n) if ticker else {}
+
+        frame = self._price_frame
         if not ticker:
-            filtered = self._price_frame
+            start, end = 0, frame.shape[0]
         else:
-            filtered = self._price_frame.filter(like=ticker, axis=0)
+            # Tra cứu chính xác theo ticker (không khớp chuỗi con như filter(like=...): 'FPT' != 'FPTS')
+            start, end = self.__ticker_positions().get(ticker, (0, 0))
 
-        if filtered.shape[0] >= n:
-            row = filtered.iloc[-n].to_dict()
-            row['ts'] = row['datetime'].tz_localize('Asia/Ho_Chi_Minh').timestamp()
-            return row
-        
-        return {}
+        pos = end - n
+        if n < 1 or pos < start:
+            return {}
+
+        row = frame.iloc[pos].to_dict()
+        row['ts'] = int(frame.index.levels[1][frame.index.codes[1][pos]])
+        return row
+
+    def get_last_rows(self, n: int=1) -> pd.DataFrame:
+        """
+        n nến cuối cùng của mỗi ticker, index (ticker, ts) như get_ticker_groupby().tail(n).
+        Backend 'ring': đọc thẳng từ buffer, không dựng khung giá
+        """
+        positions = self.__ticker_positions()
+        if self.__frame_ready():
+            rows = [np.arange(max(start, end - n), end) for start, end in positions.values()]
+            return self._price_frame.iloc[np.concatenate(rows) if rows else []]
+
+        columns = self._store.tail_columns(n)
+        index = pd.MultiIndex.from_arrays([columns.pop('ticker'), columns.pop('ts')], names=['ticker', 'ts'])
+        return self.__cast_schema(pd.DataFrame(columns, index=index))
+
+    def get_last_timestamp(self, ticker: str=None) -> int:
+        """
+        ts của nến cuối cùng của ticker (không có ticker: nến mới nhất của mọi ticker), 0 nếu chưa có dữ liệu
+        """
+        if self._store:
+            if ticker:
+                buf = self._store.buffer(ticker)
+                return buf.last_ts() or 0
+            return max([self._store.buffer(t).last_ts() or 0 for t in self._store.tickers], default=0)
+
+        self.__ticker_positions()
+        if ticker:
+            return self._last_ts.get(ticker, 0)
+        return max(self._last_ts.values(), default=0)
+
+    def __ticker_positions(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Vị trí [start, end) của từng ticker trong dataframe (đã sort theo (ticker, ts)) và ts cuối của ticker.
+        Chỉ tính lại khi phiên bản dữ liệu thay đổi
+        """
+        if self._positions_version == self._version:
+            return self._positions
+
+        positions = {}
+        last_ts = {}
+        if self._store:
+            # Thứ tự của RingBufferStore.to_frame: ticker sort tăng dần, bỏ ticker rỗng. Không cần dựng khung giá
+            start = 0
+            for ticker in self._store.tickers:
+                buf = self._store.buffer(ticker)
+                if buf.size == 0:
+                    continue
+                positions[ticker] = (start, start + buf.size)
+                last_ts[ticker] = buf.last_ts()
+                start += buf.size
+
+        index = self._price_frame.index if not self._store else []
+        if len(index) > 0:
+            codes = index.codes[0]
+            bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+            tickers = index.levels[0].values[codes[bounds[:-1]]]
+            ends = bounds[1:]
+            ts = index.levels[1].values[index.codes[1][ends - 1]]
+            for i in range(len(tickers)):
+                positions[tickers[i]] = (int(bounds[i]), int(ends[i]))
+                last_ts[tickers[i]] = int(ts[i])
+
+        self._positions = positions
+        self._last_ts = last_ts
+        self._positions_version = self._version
+
+        return self._positions
     
     
+    @property
+    def store(self) -> RingBufferStore:
+        return self._store
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_group_indices(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Vị trí [start, end) các dòng của từng ticker trong _price_frame
+        """
+        return self.__ticker_positions()
+
+    def get_segments(self) -> TickerSegments:
+        """
+        Các đoạn liên tục của từng ticker, dùng cho các phép shift/diff/ewm/rolling theo nhóm không cần groupby.transform
+        """
+        if self._segments is None or self._segments_version != self._version:
+            self._segments = TickerSegments.from_positions(self.__ticker_positions())
+            self._segments_version = self._version
+        return self._segments
+
+    def get_ticker_frame(self, ticker: str) -> pd.DataFrame:
+        """
+        Dữ liệu của một ticker, index theo ts. Với backend 'ring' là view trực tiếp trên ring buffer (không copy).
+        Với backend 'pandas' là lát cắt theo vị trí, được cache tới khi dữ liệu hoặc danh sách cột thay đổi
+        """
+        if self._store:
+            return self._store.ticker_frame(ticker)
+
+        key = (self._version, tuple(self._price_frame.columns))
+        if self._slices_key != key:
+            self._slices = {}
+            self._slices_key = key
+
+        frame = self._slices.get(ticker)
+        if frame is None:
+            start, end = self.__ticker_positions().get(ticker, (0, 0))
+            frame = self._price_frame.iloc[start:end].droplevel('ticker')
+            self._slices[ticker] = frame
+        return frame
+
     def get_ticker_groupby(self) -> DataFrameGroupBy:
-        self._ticker_groupby = self._price_frame.groupby(by='ticker', as_index=False, sort=True)
+        """
+        Groupby theo ticker, chỉ tạo lại khi dữ liệu thay đổi. Groupby giữ tham chiếu tới dataframe
+        nên vẫn thấy các cột chỉ báo được thêm sau khi tạo
+        """
+        if self._ticker_groupby is None or self._groupby_version != self._version:
+            self._ticker_groupby = self._price_frame.groupby(by='ticker', as_index=False, sort=True)
+            self._groupby_version = self._version
         return self._ticker_groupby
     
     @property
@@ -0,0 +1,428 @@
+import numpy as np
+
+from abc import ABC
+from abc import abstractmethod
+
+from typing import List
+from typing import Dict
+from typing import Tuple
+
+from viiquant.stock_price_frame import StockPriceFrame
+
+
+class EwmKernel:
+    """
+    Trạng thái ewm(...).mean() của nhiều ticker (mỗi ticker một slot), cập nhật O(1) mỗi nến.
+    Cùng công thức với pandas (adjust=True, ignore_na=False, min_periods tính trên số quan sát khác NaN)
+    """
+
+    def __init__(self, span: float = None, alpha: float = None, min_periods: int = 0, adjust: bool = True):
+        self._alpha = alpha if alpha else 2.0 / (span + 1.0)
+        self._min_periods = max(int(min_periods), 1)
+        self._adjust = adjust
+        self._weighted = np.empty(0)
+        self._old_wt = np.empty(0)
+        self._nobs = np.empty(0, dtype=np.int64)
+
+    def resize(self, n: int):
+        grow = n - len(self._weighted)
+        if grow > 0:
+            self._weighted = np.r_[self._weighted, np.full(grow, np.nan)]
+            self._old_wt = np.r_[self._old_wt, np.ones(grow)]
+            self._nobs = np.r_[self._nobs, np.zeros(grow, dtype=np.int64)]
+
+    def step(self, slots: np.ndarray, x: np.ndarray, commit: np.ndarray) -> np.ndarray:
+        weighted = self._weighted[slots]
+        old_wt = self._old_wt[slots]
+        is_obs = x == x
+        nobs = self._nobs[slots] + is_obs
+        new_wt = 1.0 if self._adjust else self._alpha
+
+        has = weighted == weighted
+        old_wt = np.where(has, old_wt * (1.0 - self._alpha), old_wt)
+        upd = has & is_obs
+        with np.errstate(invalid='ignore'):
+            mixed = (old_wt * weighted + new_wt * x) / (old_wt + new_wt)
+        weighted = np.where(upd & (weighted != x), mixed, weighted)
+        if self._adjust:
+            old_wt = np.where(upd, old_wt + new_wt, old_wt)
+        else:
+            old_wt = np.where(upd, 1.0, old_wt)
+        # Chưa có giá trị nào: lấy luôn quan sát đầu tiên
+        weighted = np.where(~has & is_obs, x, weighted)
+
+        keep = slots[commit]
+        self._weighted[keep] = weighted[commit]
+        self._old_wt[keep] = old_wt[commit]
+        self._nobs[keep] = nobs[commit]
+
+        return np.where(nobs >= self._min_periods, weighted, np.nan)
+
+
+class WindowKernel:
+    """
+    window - 1 giá trị gần nhất của mỗi ticker, step() trả về cửa sổ đủ window giá trị (n, window) tính cả giá trị mới.
+    Các phép rolling (mean, std, min, max) với min_periods = window cho NaN khi chưa đủ window giá trị hoặc trong cửa sổ có NaN
+    """
+
+    def __init__(self, window: int):
+        self._window = int(window)
+        self._values = np.empty((0, self._window - 1))
+
+    def resize(self, n: int):
+        grow = n - self._values.shape[0]
+        if grow > 0:
+            self._values = np.vstack([self._values, np.full((grow, self._window - 1), np.nan)])
+
+    def step(self, slots: np.ndarray, x: np.ndarray, commit: np.ndarray) -> np.ndarray:
+        window = np.hstack([self._values[slots], x[:, None]])
+        self._values[slots[commit]] = window[commit, 1:]
+        return window
+
+
+class LagKernel:
+    """
+    Giá trị của nến trước (shift(1)) cho mỗi ticker
+    """
+
+    def __init__(self):
+        self._values = np.empty(0)
+
+    def resize(self, n: int):
+        grow = n - len(self._values)
+        if grow > 0:
+            self._values = np.r_[self._values, np.full(grow, np.nan)]
+
+    def step(self, slots: np.ndarray, x: np.ndarray, commit: np.ndarray) -> np.ndarray:
+        prev = self._values[slots]
+        self._values[slots[commit]] = x[commit]
+        return prev
+
+
+def _rolling_mean(window: np.ndarray) -> np.ndarray:
+    return window.mean(axis=1)
+
+
+def _rolling_std(window: np.ndarray) -> np.ndarray:
+    return window.std(axis=1, ddof=1)
+
+
+class StreamingIndicator(ABC):
+    """
+    Chỉ báo tính tăng dần: giữ trạng thái nhỏ cho mỗi ticker, mỗi lần update() chỉ tính các nến mới.
+
+    Trạng thái được chốt tới nến áp chót của mỗi ticker, nến cuối cùng chỉ được tính tạm: nến đang hình thành
+    được tải lại (ghi đè cùng ts) thì chỉ nến đó được tính lại. Dữ liệu cũ hơn nến đã chốt thay đổi
+    (chèn nến vào giữa, ...) thì toàn bộ trạng thái được tính lại từ đầu.
+    Lớp con khai báo inputs, outputs, các kernel và compute().
+    """
+
+    inputs: List[str] = ['close']
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._counts = np.empty(0, dtype=np.int64)
+        self._committed_ts = np.empty(0, dtype=np.int64)
+        self._kernels: list = []
+        self.outputs: List[str] = []
+
+    @property
+    def params(self) -> dict:
+        return self._params
+
+    @property
+    def ready(self) -> bool:
+        # Đã được cập nhật ít nhất một lần (trạng thái đã dựng từ dữ liệu)
+        return len(self._slots) > 0
+
+    def kernel(self, kernel):
+        self._kernels.append(kernel)
+        return kernel
+
+    def reset(self):
+        # Dựng lại toàn bộ trạng thái (các kernel) với cùng tham số
+        self.__init__(**self._params)
+
+    @abstractmethod
+    def compute(self, slots: np.ndarray, values: Dict[str, np.ndarray], commit: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Giá trị các outputs của nến kế tiếp của từng slot, chỉ cập nhật trạng thái kernel của các dòng commit
+        """
+
+    def __slot(self, ticker: str) -> int:
+        slot = self._slots.get(ticker)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[ticker] = slot
+        return slot
+
+    def __pending(self, spf: StockPriceFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (slot, vị trí dòng, thứ tự trong ticker) của các nến chưa chốt, None nếu cần tính lại từ đầu
+        """
+        slots = []
+        starts = []
+        ends = []
+        for ticker, (start, end) in spf.get_group_indices().items():
+            slots.append(self.__slot(ticker))
+            starts.append(start)
+            ends.append(end)
+
+        n = len(self._slots)
+        for kernel in self._kernels:
+            kernel.resize(n)
+        if len(self._counts) < n:
+            grow = n - len(self._counts)
+            self._counts = np.r_[self._counts, np.zeros(grow, dtype=np.int64)]
+            self._committed_ts = np.r_[self._committed_ts, np.zeros(grow, dtype=np.int64)]
+
+        slots = np.asarray(slots, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        counts = self._counts[slots]
+        sizes = ends - starts
+
+        # Nến đã chốt phải còn nguyên vị trí: không có nến nào bị chèn vào trước nó
+        chosen = np.flatnonzero(counts > 0)
+        if len(chosen) > 0:
+            check = spf.ts_at(starts[chosen] + np.minimum(counts[chosen], sizes[chosen]) - 1)
+            moved = chosen[(counts[chosen] > sizes[chosen]) | (check != self._committed_ts[slots[chosen]])]
+            if len(moved) > 0:
+                # Các nến cũ nhất bị bỏ (ring buffer đầy, trim): nến đã chốt chỉ được lùi lên trước, trạng thái vẫn đúng.
+                # Tìm nhị phân ts đã chốt trong đoạn của từng ticker cùng lúc
+                committed_ts = self._committed_ts[slots[moved]]
+                lo = starts[moved].copy()
+                hi = ends[moved].copy()
+                last = ends[moved] - 1
+                while (lo < hi).any():
+                    active = lo < hi
+                    mid = (lo + hi) // 2
+                    less = spf.ts_at(np.minimum(mid, last)) < committed_ts
+                    lo = np.where(active & less, mid + 1, lo)
+                    hi = np.where(active & ~less, mid, hi)
+                found = (lo <= last) & (spf.ts_at(np.minimum(lo, last)) == committed_ts)
+                k = lo - starts[moved]
+                if not found.all() or (k + 1 >= counts[moved]).any():
+                    return None
+                counts[moved] = k + 1
+                self._counts[slots[moved]] = counts[moved]
+
+        pending = ends - starts - counts
+        total = int(pending.sum())
+        owner = np.repeat(np.arange(len(slots)), pending)
+        order = np.arange(total) - np.repeat(np.cumsum(pending) - pending, pending)
+        positions = starts[owner] + counts[owner] + order
+        return slots[owner], positions, order
+
+    def update(self, spf: StockPriceFrame):
+        # Chỉ đọc các cột inputs và ts (backend 'ring': ghép thẳng từ buffer, không dựng khung giá)
+        if spf.row_count() == 0:
+            return
+
+        pending = self.__pending(spf)
+        if pending is None:
+            self.reset()
+            pending = self.__pending(spf)
+
+        slots, positions, order = pending
+        if len(slots) == 0:
+            return
+
+        columns = {col: spf.column_values(col) for col in self.inputs}
+
+        # Nến cuối cùng của mỗi ticker: chỉ tính tạm, không chốt
+        last = np.r_[slots[1:] != slots[:-1], True]
+
+        outputs = {col: np.full(len(slots), np.nan) for col in self.outputs}
+        # Xử lý lần lượt nến thứ j chưa chốt của mọi ticker cùng lúc
+        by_step = np.argsort(order, kind='stable')
+        bounds = np.searchsorted(order[by_step], np.arange(int(order.max()) + 2))
+        for j in range(len(bounds) - 1):
+            rows = by_step[bounds[j]:bounds[j + 1]]
+            pos = positions[rows]
+            values = {col: columns[col][pos].astype(np.float64) for col in self.inputs}
+            commit = ~last[rows]
+            result = self.compute(slots[rows], values, commit)
+            for col in self.outputs:
+                outputs[col][rows] = result[col]
+
+            done = slots[rows][commit]
+            self._counts[done] += 1
+            self._committed_ts[done] = spf.ts_at(pos[commit])
+
+        spf.set_rows(positions, outputs)
+
+
+class StreamingEMA(StreamingIndicator):
+
+    def __init__(self, period: int = 20, alpha: float = 0, ema_col: str = 'ema_20', indicator_key: str = None):
+        super().__init__()
+        self._params = dict(period=period, alpha=alpha, ema_col=ema_col, indicator_key=indicator_key)
+        self._ema = self.kernel(EwmKernel(span=period, alpha=alpha if 0 < alpha <= 1 else None))
+        self.outputs = [ema_col]
+
+    def compute(self, slots, values, commit):
+        return {self.outputs[0]: self._ema.step(slots, values['close'], commit)}
+
+
+class StreamingSMA(StreamingIndicator):
+
+    def __init__(self, period: int = 20, sma_col: str = 'sma_20', indicator_key: str = None):
+        super().__init__()
+        self._params = dict(period=period, sma_col=sma_col, indicator_key=indicator_key)
+        self._window = self.kernel(WindowKernel(period))
+        self.outputs = [sma_col]
+
+    def compute(self, slots, values, commit):
+        return {self.outputs[0]: _rolling_mean(self._window.step(slots, values['close'], commit))}
+
+
+class StreamingMACD(StreamingIndicator):
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, macd_signal_period: int = 9,
+                 macd_col: str = 'macd', signal_col: str = 'macd_signal', indicator_key: str = None):
+        super().__init__()
+        self._params = dict(fast_period=fast_period, slow_period=slow_period, macd_signal_period=macd_signal_period,
+                            macd_col=macd_col, signal_col=signal_col, indicator_key=indicator_key)
+        self._fast = self.kernel(EwmKernel(span=fast_period, min_periods=fast_period))
+        self._slow = self.kernel(EwmKernel(span=slow_period, min_periods=slow_period))
+        self._signal = self.kernel(EwmKernel(span=macd_signal_period, min_periods=macd_signal_period))
+        self.outputs = [macd_col, signal_col]
+
+    def compute(self, slots, values, commit):
+        macd = self._fast.step(slots, values['close'], commit) - self._slow.step(slots, values['close'], commit)
+        return {self.outputs[0]: macd, self.outputs[1]: self._signal.step(slots, macd, commit)}
+
+
+class StreamingRSI(StreamingIndicator):
+
+    def __init__(self, period: int = 14, ewm: bool = True, rsi_col: str = 'rsi_14', indicator_key: str = None):
+        super().__init__()
+        self._params = dict(period=period, ewm=ewm, rsi_col=rsi_col, indicator_key=indicator_key)
+        self._prev = self.kernel(LagKernel())
+        if ewm:
+            self._gain = self.kernel(EwmKernel(span=period, min_periods=period))
+            self._loss = self.kernel(EwmKernel(span=period, min_periods=period))
+        else:
+            self._gain = self.kernel(WindowKernel(period))
+            self._loss = self.kernel(WindowKernel(period))
+        self._ewm = ewm
+        self.outputs = [rsi_col]
+
+    def compute(self, slots, values, commit):
+        close = values['close']
+        changed = close - self._prev.step(slots, close, commit)
+        # Giống bản batch: nến đầu tiên (diff NaN) có gain = loss = 0
+        gain = np.where(changed >= 0, changed, 0)
+        loss = np.where(changed < 0, np.abs(changed), 0)
+
+        avg_gain = self._gain.step(slots, gain, commit)
+        avg_loss = self._loss.step(slots, loss, commit)
+        if not self._ewm:
+            avg_gain = _rolling_mean(avg_gain)
+            avg_loss = _rolling_mean(avg_loss)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+            return {self.outputs[0]: 100 - (100 / (1 + rs))}
+
+
+class StreamingATR(StreamingIndicator):
+
+    inputs = ['high', 'low', 'close']
+
+    def __init__(self, period: int = 14, ewm: bool = True, atr_col: str = 'atr_14', indicator_key: str = None):
+        super().__init__()
+        self._params = dict(period=period, ewm=ewm, atr_col=atr_col, indicator_key=indicator_key)
+        self._prev = self.kernel(LagKernel())
+        self._avg = self.kernel(EwmKernel(span=period, min_periods=period) if ewm else WindowKernel(period))
+        self._ewm = ewm
+        self.outputs = [atr_col]
+
+    def compute(self, slots, values, commit):
+        high, low = values['high'], values['low']
+        prev_close = self._prev.step(slots, values['close'], commit)
+        # max(axis=1, skipna=False): NaN nếu một trong ba khoảng là NaN
+        true_range = np.maximum(np.maximum(np.abs(high - low), np.abs(high - prev_close)), np.abs(low - prev_close))
+
+        avg = self._avg.step(slots, true_range, commit)
+        return {self.outputs[0]: avg if self._ewm else _rolling_mean(avg)}
+
+
+class StreamingBollingerBands(StreamingIndicator):
+
+    def __init__(self, period: int = 20, sigma_width: int = 2, bb_upper_col: str = 'bb_upper', bb_lower_col: str = 'bb_lower',
+                 bb_width_col: str = 'bbw', indicator_key: str = 'bbands'):
+        super().__init__()
+        self._params = dict(period=period, sigma_width=sigma_width, bb_upper_col=bb_upper_col, bb_lower_col=bb_lower_col,
+                            bb_width_col=bb_width_col, indicator_key=indicator_key)
+        self._window = self.kernel(WindowKernel(period))
+        self._sigma_width = sigma_width
+        self.outputs = [bb_upper_col, bb_lower_col] + ([bb_width_col] if bb_width_col else [])
+
+    def compute(self, slots, values, commit):
+        window = self._window.step(slots, values['close'], commit)
+        sma = _rolling_mean(window)
+        sigma = _rolling_std(window)
+
+        result = {
+            self.outputs[0]: sma + self._sigma_width * sigma,
+            self.outputs[1]: sma - self._sigma_width * sigma
+        }
+        if len(self.outputs) > 2:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[self.outputs[2]] = (result[self.outputs[0]] - result[self.outputs[1]]) / sma * 100
+        return result
+
+
+class StreamingSTOCH(StreamingIndicator):
+
+    inputs = ['high', 'low', 'close']
+
+    def __init__(self, k_period: int = 14, d_period: int = 3, stoch_k_col: str = 'stoch_14', stoch_d_col: str = 'stoch_3',
+                 indicator_key: str = 'stoch'):
+        super().__init__()
+        self._params = dict(k_period=k_period, d_period=d_period, stoch_k_col=stoch_k_col, stoch_d_col=stoch_d_col,
+                            indicator_key=indicator_key)
+        self._high = self.kernel(WindowKernel(k_period))
+        self._low = self.kernel(WindowKernel(k_period))
+        self._k = self.kernel(WindowKernel(d_period))
+        self.outputs = [stoch_k_col, stoch_d_col]
+
+    def compute(self, slots, values, commit):
+        k_high = self._high.step(slots, values['high'], commit).max(axis=1)
+        k_low = self._low.step(slots, values['low'], commit).min(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = 100 * (values['close'] - k_low) / (k_high - k_low)
+        return {self.outputs[0]: k, self.outputs[1]: _rolling_mean(self._k.step(slots, k, commit))}
+
+
+class StreamingCHAIKIN(StreamingIndicator):
+
+    inputs = ['high', 'low', 'close', 'volume']
+
+    def __init__(self, fast_period: int = 3, slow_period: int = 10, chaikin_col: str = 'chaikin', indicator_key: str = 'chaikin'):
+        super().__init__()
+        self._params = dict(fast_period=fast_period, slow_period=slow_period, chaikin_col=chaikin_col, indicator_key=indicator_key)
+        self._fast = self.kernel(EwmKernel(span=fast_period, min_periods=fast_period))
+        self._slow = self.kernel(EwmKernel(span=slow_period, min_periods=slow_period))
+        self.outputs = [chaikin_col]
+
+    def compute(self, slots, values, commit):
+        high, low, close = values['high'], values['low'], values['close']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            money_flow_vol = ((2 * close) - low - high) / (high - low) * values['volume']
+            return {self.outputs[0]: self._fast.step(slots, money_flow_vol, commit) - self._slow.step(slots, money_flow_vol, commit)}
+
+
+# Tên phương thức của StockIndicator -> bản tính tăng dần
+STREAMING_INDICATORS = {
+    'EMA': StreamingEMA,
+    'SMA': StreamingSMA,
+    'MACD': StreamingMACD,
+    'RSI': StreamingRSI,
+    'ATR': StreamingATR,
+    'BOLLINGER_BANDS': StreamingBollingerBands,
+    'STOCH': StreamingSTOCH,
+    'CHAIKIN': StreamingCHAIKIN
+}
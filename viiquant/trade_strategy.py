@@ -53,7 +53,7 @@ class Strategy():
     def check_signals(self):
         
         # last_rows = self._indicator._ticker_groupby.tail(1)
-        last_rows = self._spf.get_ticker_groupby().tail(1)
+        last_rows = self._spf.get_last_rows()
         print('='*100)
         print('Check Signals:')
         print(Fore.LIGHTYELLOW_EX + str(self._conditions))
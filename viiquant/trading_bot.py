@@ -1,8 +1,14 @@
 from viiquant.stock_price_frame import StockPriceFrame
 from viiquant.data_stock_price import DataStockPrice
 from viiquant.stock_indicator import StockIndicator
+from viiquant.stock_indicator import WARMUP_TOLERANCE
 from viiquant.stock_portfolio import Portfolio
 from viiquant.trade_strategy import Strategy
+from viiquant.exceptions import DataProviderError
+from viiquant.quote_bar_aggregator import QuoteBarAggregator
+from viiquant.trading_calendar import bars_per_session
+from viiquant.trading_calendar import sessions_for_bars
+from viiquant.trading_calendar import sessions_start_date
 
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
@@ -19,19 +25,32 @@ from colorama import Fore, Back, Style
 from colorama import init as init_terminal_color
 
 
+# Số lần lấy lùi thêm lịch sử cho các mã thiếu nến khởi động (nghỉ lễ, mã ngừng giao dịch)
+HISTORY_RETRIES = 3
+
+
 class TradingBot:
 
-    def __init__(self, start_date:datetime, end_date:datetime, bar_size:int=15, bar_type:str='m', show_tail_rows:int = 5, write_log:bool=False):
-        self._end_date:datetime = end_date
+    def __init__(self, start_date:datetime=None, end_date:datetime=None, bar_size:int=15, bar_type:str='m', show_tail_rows:int = 5, write_log:bool=False, max_workers:int=8, cache_path:str=None,
+                 bar_source:str='entrade', quote_poll_interval:float=5, data_stock_price:DataStockPrice=None,
+                 frame_backend:str='pandas', retention:int=None, compact_frame:bool=False, incremental_indicators:bool=False,
+                 indicator_workers:int=0, warmup_tolerance:float=WARMUP_TOLERANCE, mirrored_ring:bool=True):
+        self._end_date:datetime = end_date if end_date else datetime.today()
+        # start_date = None: lấy lịch sử vừa đủ khởi động các chỉ báo đã chọn (set_used_indicators trước create_price_frame)
+        # và chỉ giữ lại chừng đó nến mỗi ticker
         self._start_date:datetime = start_date
+        self._warmup_tolerance = warmup_tolerance
+        self._history_bars:int = 0
         self._bar_size = bar_size # minute: 1, 5, 10, 15, 30 | hourly: 1 | Daily: 1
         self._bar_type = bar_type # m: minute, H: hourly, D: daily
         self._ticker_type = 'stock' # stock: Stock, index: Index (VNINDEX, VN30, HNX, HNX30, UPCOM, VNXALLSHARE, VN30F1M, VN30F2M, VN30F1Q, VN30F2Q)
 
-        self._dsp:DataStockPrice = DataStockPrice(ticker_type=self._ticker_type)
+        # data_stock_price: dùng nguồn dữ liệu khác (fake server, replay fixture, ...) thay cho API thật
+        self._dsp:DataStockPrice = data_stock_price if data_stock_price else DataStockPrice(ticker_type=self._ticker_type, max_workers=max_workers, cache_path=cache_path)
         self._spf:StockPriceFrame = None
         self._portfolio: Portfolio = Portfolio(self._dsp)
-        self._indicator: StockIndicator = StockIndicator()
+        # incremental_indicators: chỉ tính lại các nến mới, indicator_workers > 1: chia ticker cho process pool (danh mục lớn)
+        self._indicator: StockIndicator = StockIndicator(incremental=incremental_indicators, workers=indicator_workers)
         self._strategy: Strategy = Strategy()
 
         self._used_indicators:Dict[str, dict] = {}
@@ -41,7 +60,19 @@ class TradingBot:
 
         self._new_data_come:dict = {}
 
+        # Nơi lưu khung giá: 'pandas' (không giới hạn) hoặc 'ring' (mỗi ticker giữ tối đa retention nến).
+        # retention = None: số nến khởi động của các chỉ báo cộng thêm một ngày giao dịch
+        self._frame_backend = frame_backend
+        self._retention = retention
+        self._compact_frame = compact_frame # float32 cho giá/chỉ báo
+        self._mirrored_ring = mirrored_ring # False: buffer 'ring' chỉ cấp phát retention (không phải 2 x retention) mỗi cột
+
         self._write_log = write_log
+
+        # bar_source = 'vps': tự gom nến từ bảng giá VPS (một request cho cả danh mục), Entrade chỉ dùng để đối chiếu
+        self._bar_source = bar_source if bar_type in ['m', 'H'] else 'entrade'
+        self._quote_poll_interval = quote_poll_interval # second
+        self._bar_aggregator = QuoteBarAggregator(bar_size=bar_size, bar_type=bar_type)
         
         init_terminal_color()
         print(Style.RESET_ALL, end='')
@@ -50,31 +81,100 @@ class TradingBot:
         self._portfolio.add_assets(assets_list)
         return self._portfolio
     
+    def required_history_bars(self) -> int:
+        """
+        Số nến lịch sử mỗi ticker cần để các chỉ báo đã chọn (set_used_indicators) hội tụ ở nến cuối cùng
+        """
+        return max([self._indicator.indicator_warmup(name, params, self._warmup_tolerance)
+                    for name, params in self._used_indicators.items()], default=0)
+
+    def __fetch_history(self, tickers:List[str]) -> Tuple[dict, dict]:
+        if self._start_date:
+            return self._dsp.get_historical_frames(
+                            tickers,
+                            self._start_date.strftime('%Y-%m-%d'),
+                            self._end_date.strftime('%Y-%m-%d'),
+                            bar_size=self._bar_size,
+                            bar_type=self._bar_type)
+
+        if len(self._used_indicators) == 0:
+            raise ValueError("Call set_used_indicators() before create_price_frame() or give a start_date")
+
+        # Đếm theo ngày giao dịch, thêm một ngày cho phiên hiện tại (có thể chưa có hoặc mới có một phần nến)
+        bars = self._history_bars
+        sessions = sessions_for_bars(bars, self._bar_size, self._bar_type) + 1
+        data, errors = self.__fetch_since(tickers, sessions)
+
+        # Nghỉ lễ không có trong lịch, mã ngừng giao dịch: chỉ lấy lùi thêm các mã còn thiếu nến.
+        # Mã không có thêm nến nào khi lùi xa hơn (mới niêm yết) được giữ nguyên phần lịch sử đang có
+        short = [ticker for ticker in data if ticker not in errors and len(data[ticker]) < bars]
+        for _ in range(HISTORY_RETRIES):
+            if len(short) == 0:
+                break
+            sessions += sessions_for_bars(bars - min(len(data[ticker]) for ticker in short), self._bar_size, self._bar_type)
+            more, more_errors = self.__fetch_since(short, sessions)
+
+            grown = [ticker for ticker in short if ticker not in more_errors and len(more[ticker]) > len(data[ticker])]
+            for ticker in grown:
+                data[ticker] = more[ticker]
+            short = [ticker for ticker in grown if len(data[ticker]) < bars]
+
+        return data, errors
+
+    def __fetch_since(self, tickers:List[str], sessions:int) -> Tuple[dict, dict]:
+        start_date = sessions_start_date(self._end_date, sessions)
+        return self._dsp.get_historical_frames(
+                    tickers,
+                    start_date.strftime('%Y-%m-%d'),
+                    self._end_date.strftime('%Y-%m-%d'),
+                    bar_size=self._bar_size,
+                    bar_type=self._bar_type)
+
     def create_price_frame(self):
-        data = {}
-        for ticker in self._portfolio.get_asset_labels():
-            data[ticker] = self._dsp.get_historical_price(
-                                ticker,
-                                self._start_date.strftime('%Y-%m-%d'),
-                                self._end_date.strftime('%Y-%m-%d'),
-                                bar_size=self._bar_size,
-                                bar_type=self._bar_type)
-        
-        self._spf = StockPriceFrame(data)
+        self._history_bars = 0 if self._start_date else self.required_history_bars()
+        data, errors = self.__fetch_history(self._portfolio.get_asset_labels())
+
+        for ticker in errors:
+            print(Fore.LIGHTRED_EX + f"Fetch {ticker} failed: {errors[ticker]}")
+            print(Style.RESET_ALL, end='')
+            data[ticker] = []
+
+        retention = self._retention
+        if retention is None:
+            retention = self._history_bars + bars_per_session(self._bar_size, self._bar_type) if self._history_bars > 0 else 10000
+
+        self._spf = StockPriceFrame(data, backend=self._frame_backend, retention=retention, compact=self._compact_frame,
+                                    mirrored=self._mirrored_ring)
+        self._spf.trim(self._history_bars)
         # print(self._spf._ticker_groupby.tail(self._show_tail_rows))
         self._indicator.set_price_frame(self._spf)
         self.create_strategy()
 
+    def trim_history(self):
+        """
+        Bỏ các nến cũ hơn số nến khởi động của chỉ báo, cắt theo đợt mỗi ngày giao dịch một lần
+        """
+        if self._history_bars > 0:
+            self._spf.trim(self._history_bars, slack=bars_per_session(self._bar_size, self._bar_type))
+
+    def add_timeframe(self, bar_size:int=15, bar_type:str='m') -> StockPriceFrame:
+        """
+        Khung thời gian lớn hơn dựng từ khung nến của bot (gọi sau create_price_frame).
+        Dùng chung một luồng dữ liệu: mỗi nến mới của bot cập nhật luôn các khung này
+        """
+        return self._spf.add_timeframe(bar_size, bar_type)
+
     def create_strategy(self):
         self._strategy.set_indicator(self._indicator)
         
 
     def get_available_indicators(self) -> dict:
-        return self._strategy.get_available_indicators()
+        # Đọc trực tiếp từ StockIndicator: dùng được trước create_price_frame (lúc strategy chưa gắn indicator)
+        return self._indicator.get_available_indicators()
 
     def set_used_indicators(self, used_indicators: Union[List[str], Dict[str, dict]]):
         
-        _available_indicators = self._strategy.get_available_indicators()
+        _available_indicators = self.get_available_indicators()
         if isinstance(used_indicators, list):
             for ind_name in used_indicators:
                 self._used_indicators[ind_name] = copy.deepcopy(_available_indicators[ind_name])
@@ -88,26 +188,93 @@ class TradingBot:
         self._strategy.set_signals(conditions, mapping_state)
 
     def get_lastest_row(self):
-        new_data = {}
+        last_timestamps = {}
         for ticker in self._portfolio.get_asset_labels():
-            last_row = self._spf.get_last_row(ticker)
-            new_data[ticker] = self._dsp.get_lastest_price_rows(
-                                ticker,
+            last_timestamps[ticker] = self._spf.get_last_timestamp(ticker)
+
+        new_data, errors = self._dsp.get_lastest_prices_rows(
+                                last_timestamps,
                                 self._end_date.strftime('%Y-%m-%d'),
                                 self._end_date.strftime('%Y-%m-%d'),
-                                last_row['ts'],
                                 bar_size=self._bar_size,
                                 bar_type=self._bar_type)
-            
+
+        for ticker in errors:
+            # Báo lỗi rõ ràng thay vì âm thầm coi như không có dữ liệu mới
+            print(Fore.LIGHTRED_EX + f"Fetch {ticker} failed: {errors[ticker]}")
+            print(Style.RESET_ALL, end='')
+            new_data[ticker] = []
+
+        for ticker in new_data:
             self._new_data_come[ticker] = True if len(new_data[ticker]) > 0 else False
         
         print("Fetch lastest price:")
         print(Fore.LIGHTCYAN_EX + str(new_data))
         print(Style.RESET_ALL, end='')
+
+        poll = self._dsp.get_poll_summary(list(last_timestamps.keys()))
+        print(f"{self._space_tab}-Delta poll: {poll['rows']} rows, {round(poll['bytes']/1024, 1)} KB"
+              f" (saved ~{poll['rows_saved']} rows, ~{round(poll['bytes_saved']/1024, 1)} KB, skipped {poll['skipped']} requests)")
         self._spf.add_new_row_price(new_data)
         
         # print(self._spf.get_ticker_groupby().tail())
 
+    def collect_quote_bars(self):
+        """
+        Poll bảng giá VPS cho cả danh mục mỗi quote_poll_interval giây và gom thành nến cho tới khi có nến đóng.
+        Các nến không quan sát đầy đủ được lấy lại từ Entrade.
+        """
+        tickers = self._portfolio.get_asset_labels()
+        new_data = {}
+
+        while len(new_data) == 0:
+            if self.is_market_lunch_break():
+                end_time_break = datetime.now(tz=ZoneInfo("Asia/Ho_Chi_Minh")).replace(hour=13, minute=0, second=0)
+                time.sleep(max((end_time_break - datetime.now(tz=ZoneInfo("Asia/Ho_Chi_Minh"))).total_seconds(), 0) + 1)
+                continue
+
+            is_open, _ = self.is_market_opening()
+            if not is_open:
+                break
+
+            try:
+                quotes = self._dsp.get_market_quotes(tickers, max_age=0)
+            except DataProviderError as err:
+                print(Fore.LIGHTRED_EX + f"Fetch quotes failed: {err}")
+                print(Style.RESET_ALL, end='')
+                quotes = {}
+
+            new_data = self._bar_aggregator.update(quotes, time.time())
+            if len(new_data) == 0:
+                time.sleep(self._quote_poll_interval)
+
+        # Đối chiếu các nến chưa đầy đủ với dữ liệu của Entrade
+        partial = self._bar_aggregator.pop_partial()
+        if len(partial) > 0:
+            last_timestamps = {ticker: min(partial[ticker]) - 1 for ticker in partial}
+            reconciled, errors = self._dsp.get_lastest_prices_rows(
+                                    last_timestamps,
+                                    self._end_date.strftime('%Y-%m-%d'),
+                                    self._end_date.strftime('%Y-%m-%d'),
+                                    bar_size=self._bar_size,
+                                    bar_type=self._bar_type)
+
+            for ticker in reconciled:
+                if len(reconciled[ticker]) > 0:
+                    new_data[ticker] = reconciled[ticker]
+
+            for ticker in errors:
+                print(Fore.LIGHTRED_EX + f"Reconcile {ticker} failed: {errors[ticker]}")
+                print(Style.RESET_ALL, end='')
+
+        for ticker in tickers:
+            self._new_data_come[ticker] = True if len(new_data.get(ticker, [])) > 0 else False
+
+        print("Bars built from quotes:")
+        print(Fore.LIGHTCYAN_EX + str(new_data))
+        print(Style.RESET_ALL, end='')
+        self._spf.add_new_row_price(new_data)
+
     def clear_terminal(self):
         if sys.platform in ['linux', 'darwin', 'cygwin']:
             os.system('clear')
@@ -167,8 +334,7 @@ class TradingBot:
         #     print(Fore.LIGHTYELLOW_EX + "The Vietnam Stock Market is close now!")
         #     sys.exit()
 
-        last_row = self._spf.get_last_row()
-        last_time = datetime.fromtimestamp(last_row['ts'], tz=ZoneInfo("Asia/Ho_Chi_Minh"))
+        last_time = datetime.fromtimestamp(self._spf.get_last_timestamp(), tz=ZoneInfo("Asia/Ho_Chi_Minh"))
         delta = 0
         if self._bar_type.upper() == 'D':
             delta = timedelta(days=1)
@@ -223,11 +389,19 @@ class TradingBot:
         return (row)
     
     def portfolio_metrics(self):
-        print(pd.DataFrame(self._portfolio.metrics()).rename(columns={'portfolio': 'Portfolio'}))
+        try:
+            print(pd.DataFrame(self._portfolio.metrics()).rename(columns={'portfolio': 'Portfolio'}))
+        except DataProviderError as err:
+            print(Fore.LIGHTRED_EX + f"Portfolio metrics unavailable: {err}")
+            print(Style.RESET_ALL, end='')
         
 
     def portfolio_summary(self):
-        print(pd.DataFrame(self._portfolio.summary()['projected_market_values']).rename(columns={'portfolio': 'Portfolio'}))
+        try:
+            print(pd.DataFrame(self._portfolio.summary()['projected_market_values']).rename(columns={'portfolio': 'Portfolio'}))
+        except DataProviderError as err:
+            print(Fore.LIGHTRED_EX + f"Portfolio summary unavailable: {err}")
+            print(Style.RESET_ALL, end='')
     
     def portfolio_info(self):
         print('='*100)
@@ -247,18 +421,25 @@ class TradingBot:
         
         self._strategy.set_used_indicators(self._used_indicators)
 
+        first_loop = True
         while (True):
             try:
                 self.waiting_until_market_open()                                
 
                 self.clear_terminal()
                 
-                self.get_lastest_row()
+                # Lần đầu luôn lấy phần còn thiếu từ Entrade, sau đó gom nến từ bảng giá nếu bar_source = 'vps'
+                if self._bar_source == 'vps' and not first_loop:
+                    self.collect_quote_bars()
+                else:
+                    self.get_lastest_row()
+                first_loop = False
+                self.trim_history()
 
                 self._strategy.refresh_indicators()
                 
                 print('='*100)
-                print(self._spf.get_ticker_groupby().tail(self._show_tail_rows))
+                print(self._spf.get_last_rows(self._show_tail_rows))
 
                 signals = self._strategy.check_signals()
 
@@ -303,8 +484,11 @@ class TradingBot:
                 print('Portfolio Summary:')
                 self.portfolio_summary()
                 
-                self.waiting_for_next_rows()
+                if self._bar_source != 'vps':
+                    self.waiting_for_next_rows()
 
             except KeyboardInterrupt:
                 print("Exit. Bye!!!")
+                self._indicator.close()
+                self._dsp.close()
                 sys.exit()
@@ -0,0 +1,104 @@
+import numpy as np
+
+from datetime import date
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from viiquant.constant import TIMEZONE
+from viiquant.constant import TRADING_SESSIONS
+
+from typing import Iterable
+
+
+def session_minutes_elapsed(ts: int) -> int:
+    """
+    Số phút giao dịch đã trôi qua trong ngày (theo giờ Việt Nam) tính tới thời điểm ts, không tính giờ nghỉ trưa
+    """
+    local = datetime.fromtimestamp(ts, tz=ZoneInfo(TIMEZONE))
+    minute_of_day = local.hour * 60 + local.minute
+
+    elapsed = 0
+    for start, end in TRADING_SESSIONS:
+        _start = start[0] * 60 + start[1]
+        _end = end[0] * 60 + end[1]
+        if minute_of_day <= _start:
+            break
+        elapsed += min(minute_of_day, _end) - _start
+
+    return elapsed
+
+
+def utc_offset_seconds(ts: int) -> int:
+    """
+    Độ lệch (giây) của giờ Việt Nam so với UTC tại thời điểm ts
+    """
+    return int(datetime.fromtimestamp(int(ts), tz=ZoneInfo(TIMEZONE)).utcoffset().total_seconds())
+
+
+def session_buckets(ts: np.ndarray, bar_size: int = 15, bar_type: str = 'm') -> np.ndarray:
+    """
+    Timestamp bắt đầu của nến bar_size/bar_type chứa từng nến 1 phút ts.
+    Nến được chia từ đầu mỗi phiên (09:00, 13:00) và không bao giờ vắt qua giờ nghỉ trưa,
+    nến cuối phiên có thể ngắn hơn (vd. nến 1H 11:00 - 11:30). bar_type 'D': nến ngày, mốc 00:00.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    if len(ts) == 0:
+        return ts.copy()
+
+    offset = utc_offset_seconds(ts[0])
+    local = ts + offset
+    day_start = local - local % 86400 - offset
+    if bar_type.upper() == 'D':
+        return day_start
+
+    bar_minutes = int(bar_size) * 60 if bar_type == 'H' else int(bar_size)
+    minute = (local % 86400) // 60
+
+    # Phiên chứa từng phút: phiên cuối cùng có giờ bắt đầu <= phút đó (trước 09:00 tính vào phiên sáng)
+    sess_start = np.full(len(ts), TRADING_SESSIONS[0][0][0] * 60 + TRADING_SESSIONS[0][0][1], dtype=np.int64)
+    sess_end = np.full(len(ts), TRADING_SESSIONS[0][1][0] * 60 + TRADING_SESSIONS[0][1][1], dtype=np.int64)
+    for start, end in TRADING_SESSIONS[1:]:
+        _start = start[0] * 60 + start[1]
+        mask = minute >= _start
+        sess_start[mask] = _start
+        sess_end[mask] = end[0] * 60 + end[1]
+
+    minute = np.clip(minute, sess_start, sess_end - 1)
+    bucket = sess_start + ((minute - sess_start) // bar_minutes) * bar_minutes
+
+    return day_start + bucket * 60
+
+
+def bars_per_session(bar_size: int = 15, bar_type: str = 'm') -> int:
+    """
+    Số nến bar_size/bar_type trong một ngày giao dịch, theo cách chia của session_buckets (nến cuối phiên có thể ngắn hơn)
+    """
+    if bar_type.upper() == 'D':
+        return 1
+
+    bar_minutes = int(bar_size) * 60 if bar_type == 'H' else int(bar_size)
+    bars = 0
+    for start, end in TRADING_SESSIONS:
+        minutes = (end[0] * 60 + end[1]) - (start[0] * 60 + start[1])
+        bars += -(-minutes // bar_minutes)
+    return bars
+
+
+def sessions_for_bars(bars: int, bar_size: int = 15, bar_type: str = 'm') -> int:
+    """
+    Số ngày giao dịch tối thiểu chứa được bars nến
+    """
+    per_session = bars_per_session(bar_size, bar_type)
+    return max(1, -(-int(bars) // per_session))
+
+
+def sessions_start_date(end_date: date, sessions: int, holidays: Iterable[date] = ()) -> date:
+    """
+    Ngày giao dịch thứ sessions tính lùi từ end_date (kể cả end_date nếu là ngày giao dịch).
+    Chỉ bỏ thứ Bảy, Chủ nhật và các ngày trong holidays: nghỉ lễ không được khai báo làm số phiên thực tế ít hơn
+    """
+    if isinstance(end_date, datetime):
+        end_date = end_date.date()
+    day = np.busday_offset(np.datetime64(end_date, 'D'), 0, roll='backward', holidays=list(holidays))
+    day = np.busday_offset(day, -(max(1, int(sessions)) - 1), roll='backward', holidays=list(holidays))
+    return day.astype(date)